@@ -1,113 +1,206 @@
-from mom6_bathy.grid import *
-
-try:
-    from CrocoDash.topo import *
-except:
-    from mom6_bathy.topo import *
-import argparse
+import sys
 from pathlib import Path
-from typing import List
-from CrocoDash.case import Case
-from CrocoDash.vgrid import VGrid
+from typing import List, Optional
 
+import re
 import shutil
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from baseline_tools import profiling
+from baseline_tools.backends import (
+    Backend,
+    baseline_filename,
+    register,
+    save_baseline_file,
+)
+from baseline_tools.bathy import bathymetry_window
+from baseline_tools.cache import (
+    ArtifactCache,
+    file_fingerprint,
+    library_versions,
+    run_stage,
+    spec_key,
+)
+from baseline_tools.fetch import (
+    DEFAULT_JOBS as DEFAULT_FETCH_JOBS,
+    FetchTask,
+    fetch_missing,
+    raw_piece_name,
+    source_fetcher,
+)
+from baseline_tools.driver import main
+from baseline_tools.formats import DEFAULT_FORMAT, recompress
+from baseline_tools.lazy import LazyNames
+from baseline_tools.manifest import write_manifest
+from baseline_tools.storage import link_or_copy, promote
+from baseline_tools.suite import load_cases
+from baseline_tools.synthetic import (
+    BOUNDARIES,
+    SYNTHETIC_VERSION,
+    synthetic_bathymetry_window,
+    synthetic_raw_forcing,
+)
+from baseline_tools.taskgraph import TaskGraph
+from baseline_tools.tiled import build_banded, latitude_bands
+from baseline_tools.writer import DEFAULT_WRITE_JOBS, shared_writer
+
+# Backend classes, each imported by the first stage that needs it, so --help
+# and grid-only runs do not load the CESM case and forcing stacks
+lib = LazyNames(
+    Grid=["mom6_bathy.grid"],
+    Topo=["CrocoDash.topo", "mom6_bathy.topo"],
+    VGrid=["CrocoDash.vgrid"],
+    Case=["CrocoDash.case"],
+)
+
+
+def grid_spec(case) -> dict:
+    """Grid(...) arguments of a baseline case from baseline_cases.toml."""
+    ystart, ystop = case.lat_extent
+    if case.is_global:
+        return dict(
+            lenx=360,
+            leny=ystop - ystart,  # grid length in y direction
+            cyclic_x=True,
+            ystart=ystart,
+            resolution=case.resolution,
+        )
+    xstart, xstop = case.lon_extent
+    return dict(
+        resolution=case.resolution,  # in degrees
+        xstart=xstart,  # min longitude in [0, 360]
+        lenx=xstop - xstart,  # longitude extent in degrees
+        ystart=ystart,  # min latitude in [-90, 90]
+        leny=ystop - ystart,  # latitude extent in degrees
+    )
 
 
-def generate_grids() -> List:
-    """
-    Placeholder: build and return a list of grid objects.
-    Replace this with your actual grid-generation logic.
-    Each grid object should implement `write_supergrid(path)` and preferably have a `name` attribute.
-    """
+CASES = {}
 
-    # Northern Hemisphere Basic
-    grid_north_hem_basic = Grid(
-        resolution=0.05,  # in degrees
-        xstart=304,  # min longitude in [0, 360]
-        lenx=3.0,  # longitude extent in degrees
-        ystart=38.0,  # min latitude in [-90, 90]
-        leny=3.0,  # latitude extent in degrees
-        name="north_hem_basic",
-    )
-    # South Long Seam
-    grid_south_long_seam = Grid(
-        resolution=0.05,  # in degrees
-        xstart=175.0,  # min longitude in [0, 360]
-        lenx=6.0,  # longitude extent in degrees
-        ystart=-25.0,  # min latitude in [-90, 90]
-        leny=2.0,  # latitude extent in degrees
-        name="south_long_seam",
-    )
+# Horizontal grid definitions, keyed by grid name
+GRID_SPECS = {}
 
-    # South Prime Seam
-    grid_south_prime_seam = Grid(
-        resolution=0.05,  # in degrees
-        xstart=357,  # min longitude in [0, 360]
-        lenx=4.0,  # longitude extent in degrees
-        ystart=-18.0,  # min latitude in [-90, 90]
-        leny=2.0,  # latitude extent in degrees
-        name="south_prime_seam",
-    )
+# Global grids are too large to build in one go (it hangs on dask), so they are
+# built in latitude bands of BAND_HEIGHT degrees, see run_global_grid_pipeline
+GLOBAL_GRID_SPECS = {}
+
+
+def reload_cases():
+    """(Re)read the cases from baseline_cases.toml, updating the dicts above in place."""
+    cases = load_cases("CrocoDash")
+    for specs, is_global in ((GRID_SPECS, False), (GLOBAL_GRID_SPECS, True)):
+        specs.clear()
+        specs.update(
+            (name, grid_spec(case))
+            for name, case in cases.items()
+            if case.is_global == is_global
+        )
+    CASES.clear()
+    CASES.update(cases)
+
+
+reload_cases()
+
+BAND_HEIGHT = 10.0  # in degrees
+# Latitude dimensions of the supergrid and topo files mom6_bathy writes,
+# along which the bands are appended
+SUPERGRID_LAT_DIMS = ("nyp", "ny")
+TOPO_LAT_DIMS = ("ny",)
+
+# Vertical grid shared by every horizontal grid
+VGRID_SPEC = dict(
+    nk=10,  # number of vertical levels
+    depth=4000,
+    ratio=20.0,  # target ratio of top to bottom layer thicknesses
+)
+
+MIN_DEPTH = 9.5  # in meters
+
+BATHYMETRY_PATH = Path(
+    "/glade/campaign/cgd/oce/projects/CROCODILE/workshops/2025/CrocoDash/data/gebco/GEBCO_2024.nc"
+)
 
-    # Global Grid - This hangs on dask for some reason
-    # glofas_grid = Grid(
-    #     lenx=360,
-    #     leny       = 150,         # grid length in y direction
-    #     cyclic_x=True   ,
-    #     ystart     = -60,       # start/end 10 degrees above/below poles to avoid singularity
-    #     resolution = 0.05,
-    #     name = "GLOFAS",
-    # )
+DATE_RANGE = ["2020-01-01 00:00:00", "2020-01-03 00:00:00"]
 
-    return [grid_north_hem_basic, grid_south_long_seam, grid_south_prime_seam]
+CESMROOT = "/glade/u/home/manishrv/work/installs/CROCESM_workshop_2025"
 
+# Libraries whose version is part of every cache key
+CACHE_LIBRARIES = ["CrocoDash", "mom6_bathy", "numpy", "xarray", "xesmf"]
 
+
+@profiling.stage("hgrid")
+def generate_grids(names: Optional[List[str]] = None) -> List:
+    """
+    Build and return a list of grid objects, one per entry of GRID_SPECS.
+    If `names` is given, only those grids are built.
+    """
+    if names is None:
+        names = list(GRID_SPECS)
+    return [lib.Grid(name=name, **GRID_SPECS[name]) for name in names]
+
+
+@profiling.stage("vgrid")
 def generate_vgrids(grids) -> list:
     vgrids = []
     for grid in grids:
-        vgrids.append(
-            VGrid.hyperbolic(
-                nk=10,  # number of vertical levels
-                depth=4000,
-                ratio=20.0,  # target ratio of top to bottom layer thicknesses
-            )
-        )
+        vgrids.append(lib.VGrid.hyperbolic(**VGRID_SPEC))
 
     return vgrids
 
 
-def generate_bathys(grids) -> list:
-    """ """
-    bathymetry_path = Path(
-        "/glade/campaign/cgd/oce/projects/CROCODILE/workshops/2025/CrocoDash/data/gebco/GEBCO_2024.nc"
-    )
+def set_topo_from_file(topo, bathymetry_path: Path):
+    try:
+        topo.set_from_dataset(
+            bathymetry_path=bathymetry_path,
+            longitude_coordinate_name="lon",
+            latitude_coordinate_name="lat",
+            vertical_coordinate_name="elevation",
+            write_to_file=False,
+        )
+    except:
+        topo.interpolate_from_file(
+            file_path=bathymetry_path,
+            longitude_coordinate_name="lon",
+            latitude_coordinate_name="lat",
+            vertical_coordinate_name="elevation",
+        )
+
 
+@profiling.stage("bathy")
+def generate_bathys(
+    grids, cache_dir: Optional[Path] = None, synthetic: bool = False
+) -> list:
+    """
+    Generate a topo for each grid from GEBCO. If cache_dir is given, each grid
+    reads a padded window of GEBCO cached in cache_dir/bathy_windows instead
+    of the whole global file. With `synthetic`, the window is a synthetic
+    GEBCO-like stand-in cached in cache_dir/synthetic.
+    """
     topos = []
     for grid in grids:
-        topo = Topo(
+        topo = lib.Topo(
             grid=grid,
-            min_depth=9.5,  # in meters
+            min_depth=MIN_DEPTH,
         )
         print(f"Generating bathymetry for grid: {grid.name}")
-        if grid.name == "GLOFAS":
-            print("GLOFAS grid is too big, just setting spoon depth for bathy")
-            topo.set_spoon(10)
-        else:
-            try:
-                topo.set_from_dataset(
-                    bathymetry_path=bathymetry_path,
-                    longitude_coordinate_name="lon",
-                    latitude_coordinate_name="lat",
-                    vertical_coordinate_name="elevation",
-                    write_to_file=False,
-                )
-            except:
-                topo.interpolate_from_file(
-                    file_path=bathymetry_path,
-                    longitude_coordinate_name="lon",
-                    latitude_coordinate_name="lat",
-                    vertical_coordinate_name="elevation",
-                )
+        bathymetry_path = BATHYMETRY_PATH
+        spec = GRID_SPECS[grid.name]
+        lon_extent = (spec["xstart"], spec["xstart"] + spec["lenx"])
+        lat_extent = (spec["ystart"], spec["ystart"] + spec["leny"])
+        if synthetic:
+            bathymetry_path = synthetic_bathymetry_window(
+                cache_dir, lon_extent, lat_extent
+            )
+        elif cache_dir is not None:
+            bathymetry_path = bathymetry_window(
+                BATHYMETRY_PATH,
+                lon_extent=lon_extent,
+                lat_extent=lat_extent,
+                cache_dir=cache_dir,
+            )
+        set_topo_from_file(topo, bathymetry_path)
         topos.append(topo)
     return topos
 
@@ -117,7 +210,7 @@ def generate_cases(topos, vgrids, names, cache_dir, cesmroot):
     for i, name in enumerate(names):
         inputdir = cache_dir / (name + "_input")
         caseroot = cache_dir / (name + "_case")
-        case = Case(
+        case = lib.Case(
             cesmroot=cesmroot,
             caseroot=caseroot,
             inputdir=inputdir,
@@ -133,154 +226,608 @@ def generate_cases(topos, vgrids, names, cache_dir, cesmroot):
     return cases
 
 
-def get_raw_data(cases: List, cache_dir: Path):
+def raw_cache_file(cache_dir: Path, grid_name: str, boundary: str) -> Path:
+    """
+    Cached raw data of one boundary of one grid over DATE_RANGE. The same
+    name is used on a --raw-data-source, so a copy of another machine's
+    cache/raw_data can serve as one.
+    """
+    start, end = (datetime.fromisoformat(d) for d in DATE_RANGE)
+    return cache_dir / "raw_data" / raw_piece_name(grid_name, boundary, start, end)
+
+
+def migrate_raw_cache(cache_dir: Path):
+    """
+    Rename raw data cached under the names used before they carried their
+    date range, {grid}_{boundary}_raw.nc, to raw_cache_file's. Those files
+    were all fetched for the same DATE_RANGE as now.
+    """
+    for path in (cache_dir / "raw_data").glob("*_raw.nc"):
+        stem = path.name[: -len("_raw.nc")]
+        if re.search(r"_\d{8}-\d{8}$", stem):
+            continue
+        grid_name, boundary = stem.rsplit("_", 1)
+        dest = raw_cache_file(cache_dir, grid_name, boundary)
+        if not dest.exists():
+            path.rename(dest)
+            print(f"Renamed cached raw data {path.name} -> {dest.name}")
+
+
+def raw_fetch_tasks(
+    cache_dir: Path, grid_name: str, boundaries: List[str], raw_data_source: str
+) -> List[FetchTask]:
+    """Tasks fetching the raw data of each of `boundaries` from `raw_data_source` into the cache."""
+    return [
+        FetchTask(
+            f"{grid_name}/{boundary}",
+            raw_cache_file(cache_dir, grid_name, boundary),
+            source_fetcher(
+                raw_data_source, raw_cache_file(cache_dir, grid_name, boundary).name
+            ),
+        )
+        for boundary in boundaries
+    ]
+
+
+@profiling.stage("raw_data")
+def get_raw_data(
+    cases: List,
+    cache_dir: Path,
+    synthetic: bool = False,
+    raw_data_source: Optional[str] = None,
+    fetch_jobs: int = DEFAULT_FETCH_JOBS,
+):
     """
     Subset and gather raw data needed for forcing generation.
     Uses cache_dir to store and reuse previously downloaded data.
-    """
-    cache_dir_raw_data = cache_dir / "raw_data"
+    With `synthetic`, GLORYS-like stand-ins are written into each case's raw
+    data directory instead; they never enter the raw data cache.
 
+    Only the boundaries missing from the cache are fetched. With
+    `raw_data_source` (a URL or directory), they are downloaded from it
+    concurrently into the cache; otherwise CrocoDash's RDA workflow refetches
+    the case.
+    """
     for case in cases:
-        files_found = True
         case.configure_forcings(
-            date_range=["2020-01-01 00:00:00", "2020-01-03 00:00:00"],
+            date_range=DATE_RANGE,
             function_name="get_glorys_data_from_rda",
             too_much_data=True,
         )
-        for boundary in case.boundaries:
-            cache_file = cache_dir_raw_data / f"{case.ocn_grid.name}_{boundary}_raw.nc"
-            if cache_file.exists():
-                print(f"  Using cached raw data for {case.caseroot.name}: {cache_file}")
-                # Copy into input raw directory
-                shutil.copy(
-                    cache_file,
-                    case.inputdir / "glorys" / "large_data_workflow" / "raw_data",
-                )
-            else:
-                files_found = False
-                print(f"Cant find one {cache_file} so probably won't find any")
-                break
-        if not files_found:
-            print(f"  Fetching raw data for {case.caseroot.name}...")
+        name = case.ocn_grid.name
+        raw_dir = case.inputdir / "glorys" / "large_data_workflow" / "raw_data"
+        if synthetic:
+            spec = GRID_SPECS[name]
+            print(f"  Using synthetic raw data for {case.caseroot.name}")
+            synthetic_raw_forcing(
+                raw_dir,
+                lon_extent=(spec["xstart"], spec["xstart"] + spec["lenx"]),
+                lat_extent=(spec["ystart"], spec["ystart"] + spec["leny"]),
+                date_range=DATE_RANGE,
+                boundaries=case.boundaries,
+                # Named like the files restored from cache_dir/raw_data
+                filenames={
+                    segment: f"{name}_{segment}_raw.nc"
+                    for segment in ["ic", *case.boundaries]
+                },
+            )
+            continue
+        if raw_data_source is not None:
+            fetch_missing(
+                raw_fetch_tasks(cache_dir, name, case.boundaries, raw_data_source),
+                jobs=fetch_jobs,
+            )
+        missing = [
+            boundary
+            for boundary in case.boundaries
+            if not raw_cache_file(cache_dir, name, boundary).exists()
+        ]
+        if missing:
+            # CrocoDash's RDA workflow fetches all of a case's boundaries at once
+            print(
+                f"  Raw data for {case.caseroot.name} is missing {', '.join(missing)}, "
+                "fetching it from RDA..."
+            )
             case.configure_forcings(
-                date_range=["2020-01-01 00:00:00", "2020-01-03 00:00:00"],
+                date_range=DATE_RANGE,
                 function_name="get_glorys_data_from_rda",
             )
-
-
-def generate_forcings(cases: List, cache_dir: Path):
+            continue
+        for boundary in case.boundaries:
+            cache_file = raw_cache_file(cache_dir, name, boundary)
+            print(f"  Using cached raw data for {case.caseroot.name}: {cache_file}")
+            # Copy into input raw directory
+            link_or_copy(cache_file, raw_dir / f"{name}_{boundary}_raw.nc")
+
+
+def generate_forcings(
+    cases: List,
+    cache_dir: Path,
+    synthetic: bool = False,
+    raw_data_source: Optional[str] = None,
+    fetch_jobs: int = DEFAULT_FETCH_JOBS,
+):
     """
-    Generate forcing files for each grid using raw data from cache_dir.
+    Generate forcing files for each grid using raw data from cache_dir, or
+    synthetic raw data with `synthetic`. See get_raw_data for the other
+    arguments.
     """
     print("\n-- Preparing raw data for forcing generation --")
-    get_raw_data(cases, cache_dir)
+    get_raw_data(cases, cache_dir, synthetic, raw_data_source, fetch_jobs)
 
-    forcings = []
-    for case in cases:
-        print(f"Generating forcing for grid: {case.name}")
-        case.process_forcings()
+    with profiling.stage("forcing"):
+        for case in cases:
+            print(f"Generating forcing for grid: {case.name}")
+            case.process_forcings()
 
     return
 
 
-def save_grids_to_baseline(grids: List, outdir: Path, prefix: str = ""):
+@profiling.stage("save_hgrid")
+def save_grids_to_baseline(
+    grids: List, outdir: Path, prefix: str = "", output_format: str = DEFAULT_FORMAT
+):
     outdir.mkdir(parents=True, exist_ok=True)
     if not grids:
         print("No grids to save (generate_grids returned empty list).")
         return
     for i, grid in enumerate(grids):
         name = getattr(grid, "name", None) or f"grid_{i}"
-        filename = f"{prefix + '_' if prefix else ''}{name}.nc"
-        outpath = outdir / filename
+        outpath = outdir / baseline_filename(name, "hgrid", prefix)
         print(f"Writing grid '{name}' -> {outpath}")
-        grid.write_supergrid(outpath)
+        save_baseline_file(outpath, grid.write_supergrid, output_format)
 
 
-def save_vgrids_to_baseline(grids: List, vgrids, outdir: Path, prefix: str = ""):
+@profiling.stage("save_vgrid")
+def save_vgrids_to_baseline(
+    grids: List,
+    vgrids,
+    outdir: Path,
+    prefix: str = "",
+    output_format: str = DEFAULT_FORMAT,
+):
     outdir.mkdir(parents=True, exist_ok=True)
     if not grids:
         print("No grids to save (generate_grids returned empty list).")
         return
     for i, grid in enumerate(grids):
-        name = (getattr(grid, "name", None) or f"vgrid_{i}") + "_vgrid"
-        filename = f"{prefix + '_' if prefix else ''}{name}.nc"
-        outpath = outdir / filename
+        name = getattr(grid, "name", None) or f"vgrid_{i}"
+        outpath = outdir / baseline_filename(name, "vgrid", prefix)
         print(f"Writing vgrid '{name}' -> {outpath}")
-        vgrids[i].write(outpath)
+        save_baseline_file(outpath, vgrids[i].write, output_format)
 
 
+@profiling.stage("save_bathy")
 def save_bathys_to_baseline(
-    topos: List, outdir: Path, prefix: str = "", cache_dir=None
+    topos: List,
+    outdir: Path,
+    prefix: str = "",
+    cache_dir=None,
+    output_format: str = DEFAULT_FORMAT,
 ):
+    """
+    Save each topo to outdir and, with `cache_dir`, link the saved file into
+    cache_dir/topos for later runs skipping bathymetry (see load_topos).
+    """
     outdir.mkdir(parents=True, exist_ok=True)
     if cache_dir is not None:
         (cache_dir / "topos").mkdir(exist_ok=True)
     for i, topo in enumerate(topos):
         name = getattr(topo._grid, "name", None) or f"bathy_{i}"
-        filename = f"{prefix + '_' if prefix else ''}{name}_bathy.nc"
-        outpath = outdir / filename
+        outpath = outdir / baseline_filename(name, "bathy", prefix)
         print(f"Writing bathymetry '{name}' -> {outpath}")
-        topo.write_topo(outpath)  # assuming Topo implements `write()`
+        links = []
         if cache_dir is not None:
-            topo.write_topo(cache_dir / "topos" / (topo._grid.name + "_topo.nc"))
+            links.append(cache_dir / "topos" / (topo._grid.name + "_topo.nc"))
+        save_baseline_file(outpath, topo.write_topo, output_format, links=links)
 
 
-def save_forcings_to_baseline(cases: List, outdir: Path, prefix: str = ""):
-    """
-    Placeholder: write forcings to disk.
-    Replace this with the appropriate write method for your forcing objects.
-    """
+@profiling.stage("save_forcing")
+def save_forcings_to_baseline(
+    cases: List, outdir: Path, prefix: str = "", output_format: str = DEFAULT_FORMAT
+):
+    """Save each case's forcing and initial condition files to outdir."""
     outdir.mkdir(parents=True, exist_ok=True)
     for i, case in enumerate(cases):
         for file in (case.inputdir / "ocnice").iterdir():
             if file.is_file() and (
                 file.name.startswith("forcing_") or file.name.startswith("init_")
             ):
-                shutil.copy2(file, outdir / file.name)
+                # The case input directory is deleted by wrap_up, so the
+                # forcing files can be linked rather than copied
+                link_or_copy(file, outdir / file.name)
+                # Rewrites under a new name, so the linked source is untouched
+                recompress(outdir / file.name, output_format)
+                write_manifest(outdir / file.name)
 
 
-def parse_args():
-    p = argparse.ArgumentParser(
-        description="Generate baseline supergrids and optionally bathymetry files."
-    )
+def add_arguments(p):
+    """Add CrocoDash's own options to the driver's parser."""
     p.add_argument(
-        "baseline_dir",
-        nargs="?",
-        default="baselines",
-        help="Output baselines directory",
+        "--cesmroot",
+        default=CESMROOT,
+        help="CESM source tree used to create the CrocoDash forcing cases.",
     )
-    p.add_argument(
-        "--prefix", "-p", default="", help="Optional filename prefix for saved grids"
+
+
+def backend_options(args) -> dict:
+    return dict(cesmroot=args.cesmroot)
+
+
+def load_topos(grids: List, cache_dir: Path) -> list:
+    """Load previously generated topos for `grids` from cache_dir/topos."""
+    topos_dir = cache_dir / "topos"
+    return [load_topo(grid, topos_dir / (grid.name + "_topo.nc")) for grid in grids]
+
+
+@profiling.stage("load_hgrid")
+def load_grid(path: Path, name: str):
+    """Rebuild the Grid `name` from its saved supergrid file at `path`."""
+    return lib.Grid.from_supergrid(str(path), name=name)
+
+
+@profiling.stage("load_bathy")
+def load_topo(grid, path: Path):
+    """Rebuild the topo of `grid` from its saved topo file at `path`."""
+    return lib.Topo.from_topo_file(
+        grid, topo_file_path=path, min_depth=MIN_DEPTH
     )
-    p.add_argument(
-        "--with-bathy",
-        action="store_true",
-        help="If set, generate and save bathymetry files for each grid.",
+
+
+def stage_keys(
+    name: str, synthetic: bool = False, output_format: str = DEFAULT_FORMAT
+) -> dict:
+    """
+    Cache keys for every artifact of grid `name`. Each key includes the keys
+    of the artifacts it is built from, so a change invalidates everything
+    downstream of it.
+    """
+    if synthetic:
+        source = {"synthetic": SYNTHETIC_VERSION}
+    else:
+        source = file_fingerprint(BATHYMETRY_PATH)
+    versions = library_versions(CACHE_LIBRARIES)
+    if name in GLOBAL_GRID_SPECS:
+        spec = {**GLOBAL_GRID_SPECS[name], "band_height": BAND_HEIGHT}
+    else:
+        spec = GRID_SPECS[name]
+    keys = {}
+    keys["hgrid"] = spec_key("hgrid", name, spec, output_format, versions)
+    # The cached vgrid file is named after the grid, so the key needs the name
+    keys["vgrid"] = spec_key("vgrid", name, VGRID_SPEC, output_format, versions)
+    keys["bathy"] = spec_key("bathy", keys["hgrid"], MIN_DEPTH, source, versions)
+    keys["forcing"] = spec_key(
+        "forcing", keys["bathy"], keys["vgrid"], DATE_RANGE, versions
     )
-    p.add_argument(
-        "--with-forcings",
-        action="store_true",
-        help="If set, generate and save forcing files for each grid.",
+    return keys
+
+
+def add_grid_tasks(
+    graph: TaskGraph,
+    name: str,
+    outdir: Path,
+    prefix: str,
+    cache_dir: Path,
+    with_bathy: bool,
+    with_forcings: bool,
+    cesmroot: str = CESMROOT,
+    use_cache: bool = True,
+    synthetic: bool = False,
+    raw_data_source: Optional[str] = None,
+    fetch_jobs: int = DEFAULT_FETCH_JOBS,
+    output_format: str = DEFAULT_FORMAT,
+    source_cache_dir: Optional[Path] = None,
+    write_jobs: int = DEFAULT_WRITE_JOBS,
+):
+    """
+    Add the pipeline of a single grid to `graph`, saving every artifact to
+    the baseline directory as soon as it is built:
+
+        vgrid -------------+
+        hgrid ---> bathy --+-> case -> forcing -> flush
+        raw data fetch ---------------/
+
+    Each stage builds its objects in its task and hands their saving to the
+    process's background writer (see baseline_tools.writer, `write_jobs`
+    threads), so the next stage, or the next grid, is computed meanwhile.
+    The final flush task waits for the grid's writes and fails the grid if
+    one of them failed.
+
+    Artifacts whose cache key is unchanged are restored from
+    cache_dir/artifacts instead of being rebuilt. The entries also warm-start
+    the objects later stages need: on a hit, Grid and Topo are rebuilt from
+    the cached supergrid and topo files rather than from GEBCO, and only if
+    a stage asks for them, so a fully cached grid builds nothing at all.
+    VGrid is cheaper to build than to read and is always built in memory.
+    With `synthetic`, bathymetry and raw forcing data come from
+    baseline_tools.synthetic. Bathymetry windows are cached in
+    `source_cache_dir` (default cache_dir).
+
+    Fetching raw data from `raw_data_source` only needs the grid's name, so it
+    is an I/O task that starts at once, overlapping with the CPU-bound stages.
+    The RDA workflow needs the case and stays part of the forcing task.
+    """
+    if name in GLOBAL_GRID_SPECS:
+        graph.add(
+            f"{name}/global",
+            lambda: run_global_grid_pipeline(
+                name,
+                outdir,
+                prefix,
+                cache_dir,
+                with_bathy,
+                with_forcings,
+                use_cache,
+                synthetic,
+                output_format,
+                source_cache_dir,
+            ),
+            grid=name,
+        )
+        return
+    source_cache_dir = source_cache_dir or cache_dir
+    cache = ArtifactCache(cache_dir / "artifacts") if use_cache else None
+    keys = stage_keys(name, synthetic, output_format)
+    writes = shared_writer(write_jobs).group(name)
+    grids = vgrids = topos = cases = None
+
+    def stage_cached(stage: str) -> bool:
+        return cache is not None and cache.has(stage, keys[stage])
+
+    def forcing_cached() -> bool:
+        return stage_cached("forcing")
+
+    def save_stage(stage: str, save, pre: str = prefix):
+        """run_stage `stage` with `save` as its writer, in the background."""
+        writes.submit(stage, run_stage, cache, stage, keys[stage], outdir, save, pre)
+
+    def cached(stage: str, filename: str) -> Optional[Path]:
+        """Path of `filename` in the cache entry of `stage`, if there is one."""
+        if cache is None or not cache.has(stage, keys[stage]):
+            return None
+        return cache.entry(stage, keys[stage]) / filename
+
+    def get_grids() -> List:
+        nonlocal grids
+        if grids is None:
+            path = cached("hgrid", baseline_filename(name, "hgrid"))
+            grids = [load_grid(path, name)] if path else generate_grids([name])
+        return grids
+
+    def get_topos() -> List:
+        nonlocal topos
+        if topos is None:
+            path = cached("bathy", baseline_filename(name, "bathy"))
+            if path is not None:
+                topos = [load_topo(get_grids()[0], path)]
+            else:
+                print(
+                    f"No cached bathymetry for {name}, loading its topo from "
+                    f"{cache_dir / 'topos'}"
+                )
+                topos = load_topos(get_grids(), cache_dir)
+        return topos
+
+    def hgrid():
+        if not stage_cached("hgrid"):
+            get_grids()
+        save_stage(
+            "hgrid",
+            lambda dest, pre: save_grids_to_baseline(
+                grids, dest, prefix=pre, output_format=output_format
+            ),
+        )
+
+    def vgrid():
+        nonlocal vgrids
+        vgrids = generate_vgrids([SimpleNamespace(name=name)])
+        save_stage(
+            "vgrid",
+            lambda dest, pre: save_vgrids_to_baseline(
+                [SimpleNamespace(name=name)],
+                vgrids,
+                dest,
+                prefix=pre,
+                output_format=output_format,
+            ),
+        )
+
+    def bathy():
+        nonlocal topos
+        if not stage_cached("bathy"):
+            topos = generate_bathys(get_grids(), source_cache_dir, synthetic)
+        save_stage(
+            "bathy",
+            lambda dest, pre: save_bathys_to_baseline(
+                topos,
+                dest,
+                prefix=pre,
+                cache_dir=cache_dir,
+                output_format=output_format,
+            ),
+        )
+
+    def fetch_raw():
+        if forcing_cached():
+            return
+        with profiling.stage("fetch_raw"):
+            fetch_missing(
+                raw_fetch_tasks(cache_dir, name, BOUNDARIES, raw_data_source),
+                jobs=fetch_jobs,
+            )
+
+    def case():
+        nonlocal cases
+        if not forcing_cached():
+            cases = generate_cases(get_topos(), vgrids, [name], cache_dir, cesmroot)
+
+    def forcing():
+        forcing_cases = None
+        if not forcing_cached():
+            forcing_cases = cases or generate_cases(
+                get_topos(), vgrids, [name], cache_dir, cesmroot
+            )
+            generate_forcings(
+                forcing_cases, cache_dir, synthetic, raw_data_source, fetch_jobs
+            )
+        # Forcing files have never carried the prefix
+        save_stage(
+            "forcing",
+            lambda dest, pre: save_forcings_to_baseline(
+                forcing_cases, dest, prefix=pre, output_format=output_format
+            ),
+            pre="",
+        )
+
+    hgrid_task = graph.add(f"{name}/hgrid", hgrid, grid=name)
+    vgrid_task = graph.add(f"{name}/vgrid", vgrid, grid=name)
+    bathy_task = forcing_task = None
+    if with_bathy:
+        bathy_task = graph.add(f"{name}/bathy", bathy, [hgrid_task], grid=name)
+    if with_forcings:
+        fetch_task = None
+        if raw_data_source is not None and not synthetic:
+            fetch_task = graph.add(f"{name}/fetch_raw", fetch_raw, io=True, grid=name)
+        case_task = graph.add(
+            f"{name}/case", case, [hgrid_task, vgrid_task, bathy_task], grid=name
+        )
+        forcing_task = graph.add(
+            f"{name}/forcing", forcing, [case_task, fetch_task], grid=name
+        )
+    # Waits on the I/O pool, so the CPU-bound tasks of other grids go on
+    graph.add(
+        f"{name}/flush",
+        writes.flush,
+        [hgrid_task, vgrid_task, bathy_task, forcing_task],
+        io=True,
+        grid=name,
+        always=True,
     )
-    return p.parse_args()
+
+
+def run_global_grid_pipeline(
+    name: str,
+    outdir: Path,
+    prefix: str,
+    cache_dir: Path,
+    with_bathy: bool,
+    with_forcings: bool,
+    use_cache: bool = True,
+    synthetic: bool = False,
+    output_format: str = DEFAULT_FORMAT,
+    source_cache_dir: Optional[Path] = None,
+):
+    """
+    Build a global grid and its topo in latitude bands of BAND_HEIGHT degrees.
+
+    Each band is a regular Grid / Topo built by mom6_bathy, and bands are
+    appended to a single supergrid / topo file as they are built, so memory is
+    bounded by one band. Topo steps that look beyond a cell's neighbours see
+    only the cell's band. Forcings are not generated for global grids.
+    """
+    source_cache_dir = source_cache_dir or cache_dir
+    cache = ArtifactCache(cache_dir / "artifacts") if use_cache else None
+    keys = stage_keys(name, synthetic, output_format)
+    spec = GLOBAL_GRID_SPECS[name]
+    bands = latitude_bands(spec["ystart"], spec["leny"], spec["resolution"], BAND_HEIGHT)
+    xstart = spec.get("xstart", 0.0)
+
+    def band_grid(ystart, leny):
+        return lib.Grid(name=name, **{**spec, "ystart": ystart, "leny": leny})
+
+    def write_grid(dest, pre):
+        outpath = dest / baseline_filename(name, "hgrid", pre)
+        print(f"Writing grid '{name}' in {len(bands)} bands -> {outpath}")
+        with profiling.stage("hgrid"):
+            build_banded(
+                outpath,
+                bands,
+                lambda ystart, leny, path: band_grid(ystart, leny).write_supergrid(
+                    path
+                ),
+                stacked_dims=SUPERGRID_LAT_DIMS,
+                rows_per_cell=2,
+            )
+        with profiling.stage("save_hgrid"):
+            recompress(outpath, output_format)
+            write_manifest(outpath)
+
+    run_stage(cache, "hgrid", keys["hgrid"], outdir, write_grid, prefix=prefix)
+    run_stage(
+        cache,
+        "vgrid",
+        keys["vgrid"],
+        outdir,
+        lambda dest, pre: save_vgrids_to_baseline(
+            [SimpleNamespace(name=name)],
+            [lib.VGrid.hyperbolic(**VGRID_SPEC)],
+            dest,
+            prefix=pre,
+            output_format=output_format,
+        ),
+        prefix=prefix,
+    )
+
+    if with_bathy:
+
+        def write_band_topo(ystart, leny, path):
+            topo = lib.Topo(grid=band_grid(ystart, leny), min_depth=MIN_DEPTH)
+            lon_extent = (xstart, xstart + spec["lenx"])
+            lat_extent = (ystart, ystart + leny)
+            if synthetic:
+                window = synthetic_bathymetry_window(
+                    source_cache_dir, lon_extent, lat_extent
+                )
+            else:
+                window = bathymetry_window(
+                    BATHYMETRY_PATH,
+                    lon_extent=lon_extent,
+                    lat_extent=lat_extent,
+                    cache_dir=source_cache_dir,
+                )
+            set_topo_from_file(topo, window)
+            topo.write_topo(path)
+
+        def write_bathys(dest, pre):
+            outpath = dest / baseline_filename(name, "bathy", pre)
+            print(f"Writing bathymetry '{name}' in {len(bands)} bands -> {outpath}")
+            with profiling.stage("bathy"):
+                build_banded(
+                    outpath,
+                    bands,
+                    write_band_topo,
+                    stacked_dims=TOPO_LAT_DIMS,
+                    rows_per_cell=1,
+                )
+            with profiling.stage("save_bathy"):
+                recompress(outpath, output_format)
+                write_manifest(outpath)
+
+        run_stage(cache, "bathy", keys["bathy"], outdir, write_bathys, prefix=prefix)
+
+    if with_forcings:
+        print(f"Skipping forcing for global grid '{name}'")
 
 
 def wrap_up(cache_dir):
 
     ## Cache the inputdir
     """
-    Searches recursively for directories ending in '_input'.
+    Searches cache_dir for the case input directories, ending in '_input'.
     For each one, enters 'glorys/large_data_workflow' and finds
     all files starting with 'boundary_'. Copies them into a
-    'raw_data' folder next to this script, naming them:
-        {parentcase}_{boundary}_raw.nc
+    'raw_data' folder next to this script, named by raw_cache_file:
+        {parentcase}_{boundary}_{start}-{end}_raw.nc
     """
 
     raw_data_dir = cache_dir / "raw_data"
     topos_dir = cache_dir / "topos"
     raw_data_dir.mkdir(exist_ok=True)
+    migrate_raw_cache(cache_dir)
 
-    for path in cache_dir.rglob("*_input"):
+    # Cases are created at the top of cache_dir (see generate_cases), so there
+    # is no need to walk the artifacts and windows below it
+    for path in cache_dir.glob("*_input"):
         if not path.is_dir():
             continue
 
@@ -295,11 +842,11 @@ def wrap_up(cache_dir):
         for file in workflow_dir.glob("*unprocessed*"):
             if file.is_file():
                 boundary_name = file.name.split("_")[0]
-                dest_name = f"{case_name}_{boundary_name}_raw.nc"
-                dest_path = raw_data_dir / dest_name
+                dest_path = raw_cache_file(cache_dir, case_name, boundary_name)
                 if not dest_path.exists():
-                    shutil.copy(file, dest_path)
-                    print(f"Copied {file} -> {dest_path}")
+                    # The input directory is deleted below, so move the file
+                    method = promote(file, dest_path)
+                    print(f"Cached {file} -> {dest_path} ({method})")
 
     # Delete all folders in cache_dir ending in _input or _case
 
@@ -309,53 +856,22 @@ def wrap_up(cache_dir):
             print(f"Deleted: {d}")
 
 
-if __name__ == "__main__":
-
-    args = parse_args()
-    outdir = Path(args.baseline_dir)
-    cache_dir = Path(__file__).resolve().parent / "cache"
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    wrap_up(cache_dir)
-    grids = generate_grids()
-    vgrids = generate_vgrids(grids)
-    save_grids_to_baseline(grids, outdir, prefix=args.prefix)
-    save_vgrids_to_baseline(grids, vgrids, outdir, prefix=args.prefix)
-
-    if args.with_bathy:
-        print("\n-- Generating bathymetry because --with-bathy was specified --")
-        topos = generate_bathys(grids)
-        save_bathys_to_baseline(topos, outdir, prefix=args.prefix, cache_dir=cache_dir)
-    else:
-        print("\n-- Skipping bathymetry generation (use --with-bathy to enable) --")
-        if args.with_forcings:
-            print(
-                "Since bathy is skipped, and we still want forcing, we need to load previous bathy from cache"
-            )
-            topos_dir = cache_dir / "topos"
-            topos = []
-            for grid in grids:
-                topos.append(
-                    Topo.from_topo_file(
-                        grid, topo_file_path=topos_dir / (grid.name + "_topo.nc")
-                    )
-                )
+BACKEND = register(
+    Backend(
+        name="CrocoDash",
+        cases=CASES,
+        add_tasks=add_grid_tasks,
+        cache_dir=Path(__file__).resolve().parent / "cache",
+        cache_libraries=CACHE_LIBRARIES,
+        add_arguments=add_arguments,
+        options=backend_options,
+        # Cache the raw data of interrupted runs before, and of this run after
+        setup=wrap_up,
+        teardown=wrap_up,
+        reload_cases=reload_cases,
+    )
+)
 
-    if args.with_forcings:
-        print("\n-- Generating forcings because --with-forcings was specified --")
-        names = []
-
-        for grid in grids:
-            names.append(grid.name)
-        cases = generate_cases(
-            topos,
-            vgrids,
-            names,
-            cache_dir,
-            "/glade/u/home/manishrv/work/installs/CROCESM_workshop_2025",
-        )
-        forcings = generate_forcings(cases, cache_dir)
-        save_forcings_to_baseline(forcings, outdir, prefix=args.prefix)
-    else:
-        print("\n-- Skipping forcing generation (use --with-forcing to enable) --")
 
-    wrap_up(cache_dir)
+if __name__ == "__main__":
+    sys.exit(main(backend=BACKEND))
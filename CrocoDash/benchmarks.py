@@ -0,0 +1,73 @@
+"""
+Timing baselines for the CrocoDash / mom6_bathy calls used by
+baseline_grid_generation.py, on the same reference grids.
+
+Bathymetry is read from a small synthetic GEBCO-like file, so nothing here
+needs /glade or the network. The generator's start-up is timed too: --help,
+and loading the script with only what a grid-only run imports.
+
+Usage:
+    python CrocoDash/benchmarks.py [BASELINE_DIR] [--update] [--threshold 2]
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+import baseline_grid_generation as gen
+from baseline_tools import bench
+from baseline_tools.synthetic import synthetic_bathymetry
+
+GENERATOR = Path(gen.__file__).resolve()
+
+STARTUP = {
+    "--help": [sys.executable, str(GENERATOR), "--help"],
+    "import_hgrid": [
+        sys.executable,
+        "-c",
+        f"import runpy; runpy.run_path({str(GENERATOR)!r})['lib'].Grid",
+    ],
+}
+
+
+def bench_grid(name: str, workdir: Path):
+    return lambda: gen.lib.Grid(name=name, **gen.GRID_SPECS[name])
+
+
+def bench_vgrid(name: str, workdir: Path):
+    return lambda: gen.lib.VGrid.hyperbolic(**gen.VGRID_SPEC)
+
+
+def bench_topo(name: str, workdir: Path):
+    spec = gen.GRID_SPECS[name]
+    grid = gen.lib.Grid(name=name, **spec)
+    bathymetry_path = synthetic_bathymetry(
+        workdir / "gebco.nc",
+        lon_extent=(spec["xstart"], spec["xstart"] + spec["lenx"]),
+        lat_extent=(spec["ystart"], spec["ystart"] + spec["leny"]),
+    )
+
+    def run():
+        topo = gen.lib.Topo(grid=grid, min_depth=gen.MIN_DEPTH)
+        gen.set_topo_from_file(topo, bathymetry_path)
+
+    return run
+
+
+BENCHMARKS = {
+    "Grid": bench_grid,
+    "VGrid.hyperbolic": bench_vgrid,
+    "Topo.set_from_dataset": bench_topo,
+}
+
+
+if __name__ == "__main__":
+    sys.exit(
+        bench.main(
+            BENCHMARKS,
+            {name: gen.CASES[name] for name in gen.GRID_SPECS},
+            gen.CACHE_LIBRARIES,
+            generator="CrocoDash",
+            startup=STARTUP,
+        )
+    )
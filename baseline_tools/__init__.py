@@ -0,0 +1,6 @@
+"""
+Shared helpers for the CrocoDash and regional_mom6 baseline generators.
+
+The generator scripts add the repository root to ``sys.path`` so this package
+can be imported without installing anything.
+"""
@@ -0,0 +1,120 @@
+"""
+Adapters between the shared baseline driver (baseline_tools.driver) and the
+backend generator scripts.
+
+Each generator script (CrocoDash/, regional_mom6/) describes itself with a
+Backend and registers it when loaded. The driver only goes through the
+adapter: the backend's cases, the function adding a case's tasks to a task
+graph, its cache directory and its own command line options. The scripts
+are loaded by path, since their directories are named like the libraries
+they drive.
+
+Every backend names its baseline files with `baseline_filename`, so the
+grids of a case built by two backends can be compared file for file.
+"""
+
+import argparse
+import importlib.util
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .formats import DEFAULT_FORMAT, recompress
+from .manifest import write_manifest
+from .storage import link_or_copy, prepare_output
+from .suite import BaselineCase
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Generator script of each backend, in the order they are run
+BACKEND_SCRIPTS = {
+    "CrocoDash": REPO_ROOT / "CrocoDash" / "baseline_grid_generation.py",
+    "regional_mom6": REPO_ROOT / "regional_mom6" / "baseline_grid_generation.py",
+}
+
+# Windows of the source datasets (GEBCO, synthetic stand-ins), shared by every
+# backend so one run's windows serve the other backends
+SOURCE_CACHE_DIR = REPO_ROOT / "cache"
+
+# Suffix of each artifact's file name, after the case name
+_SUFFIXES = {"hgrid": "", "vgrid": "_vgrid", "bathy": "_bathy"}
+
+
+def _no_arguments(p: argparse.ArgumentParser):
+    pass
+
+
+def _no_options(args: argparse.Namespace) -> dict:
+    return {}
+
+
+@dataclass
+class Backend:
+    name: str
+    cases: Dict[str, BaselineCase]
+    # add_tasks(graph, name, outdir, prefix, cache_dir, with_bathy,
+    # with_forcings, use_cache, synthetic, raw_data_source, fetch_jobs,
+    # output_format, source_cache_dir, write_jobs, **options) adds the
+    # pipeline of case `name` to a TaskGraph
+    add_tasks: Callable
+    cache_dir: Path
+    # Libraries whose version is part of every cache key and run report
+    cache_libraries: List[str] = field(default_factory=list)
+    # Adds the backend's own options to the driver's parser...
+    add_arguments: Callable[[argparse.ArgumentParser], None] = _no_arguments
+    # ...and turns them into extra keyword arguments of add_tasks
+    options: Callable[[argparse.Namespace], dict] = _no_options
+    # Called with cache_dir before and after the run
+    setup: Optional[Callable[[Path], None]] = None
+    teardown: Optional[Callable[[Path], None]] = None
+    # Re-reads the case manifest into `cases`, in place, for --watch
+    reload_cases: Optional[Callable[[], None]] = None
+
+
+_REGISTRY: Dict[str, Backend] = {}
+
+
+def register(backend: Backend) -> Backend:
+    """Make `backend` available to load_backend, returning it."""
+    _REGISTRY[backend.name] = backend
+    return backend
+
+
+def load_backend(name: str) -> Backend:
+    """The Backend registered by the generator script of backend `name`, loading it if needed."""
+    if name not in _REGISTRY:
+        if name not in BACKEND_SCRIPTS:
+            raise SystemExit(
+                f"Unknown backend {name!r}; available: {', '.join(BACKEND_SCRIPTS)}"
+            )
+        spec = importlib.util.spec_from_file_location(
+            f"{name}_baseline_generation", BACKEND_SCRIPTS[name]
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+    return _REGISTRY[name]
+
+
+def baseline_filename(name: str, stage: str = "hgrid", prefix: str = "") -> str:
+    """File name of the `stage` ("hgrid", "vgrid" or "bathy") baseline of case `name`."""
+    return f"{prefix + '_' if prefix else ''}{name}{_SUFFIXES[stage]}.nc"
+
+
+def save_baseline_file(
+    outpath: Path,
+    write: Callable[[Path], None],
+    output_format: str = DEFAULT_FORMAT,
+    links: Iterable[Path] = (),
+):
+    """
+    Write a baseline file with `write(path)`, then convert it to
+    `output_format` and checksum it. The finished file is then linked (or
+    copied) to every path of `links`, so it is only serialized once.
+    """
+    write(prepare_output(outpath))
+    recompress(outpath, output_format)
+    write_manifest(outpath)
+    for link in links:
+        link_or_copy(outpath, link)
@@ -0,0 +1,128 @@
+"""
+Padded lat/lon windows of a global bathymetry source (GEBCO).
+
+Regional baselines only need a few degrees of a global dataset. Instead of
+handing the whole file to the backend for every grid, the source is opened
+once per process and a padded window around each grid is cut out and cached
+on disk. Windows are returned in the grid's own longitude convention, so a
+grid crossing the 0 or 180 degree seam gets one contiguous window.
+"""
+
+import functools
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
+
+from .cache import file_fingerprint, spec_key, touch
+
+if TYPE_CHECKING:
+    import xarray as xr
+
+DEFAULT_PAD = 1.0  # degrees added on every side of the grid extent
+
+
+@functools.lru_cache(maxsize=None)
+def open_source(path: str) -> "xr.Dataset":
+    """Open a bathymetry source lazily, once per process."""
+    import xarray as xr
+
+    return xr.open_dataset(path, cache=False)
+
+
+def _contiguous_runs(indices: np.ndarray):
+    """Split sorted-by-position indices into runs of consecutive values."""
+    breaks = np.flatnonzero(np.diff(indices) != 1) + 1
+    return np.split(indices, breaks)
+
+
+def subset_window(
+    ds: "xr.Dataset",
+    lon_extent: Sequence[float],
+    lat_extent: Sequence[float],
+    longitude_coordinate_name: str = "lon",
+    latitude_coordinate_name: str = "lat",
+    pad: float = DEFAULT_PAD,
+) -> "xr.Dataset":
+    """
+    Select the padded window around lon_extent/lat_extent from ds.
+
+    Longitudes are relabelled into [west, west + 360) where west is the
+    padded western edge, so the window is contiguous and uses the same
+    convention as lon_extent whatever convention the source uses.
+    """
+    lon_name, lat_name = longitude_coordinate_name, latitude_coordinate_name
+    west, east = lon_extent[0] - pad, lon_extent[1] + pad
+    south, north = lat_extent[0] - pad, lat_extent[1] + pad
+
+    lat = ds[lat_name].values
+    lat_idx = np.flatnonzero((lat >= south) & (lat <= north))
+    lat_slice = slice(int(lat_idx.min()), int(lat_idx.max()) + 1)
+
+    lon = ds[lon_name].values
+    shifted = west + np.mod(lon - west, 360.0)
+    lon_idx = np.flatnonzero(shifted <= east)
+    lon_idx = lon_idx[np.argsort(shifted[lon_idx], kind="stable")]
+
+    # At most two contiguous pieces (either side of the source's own seam),
+    # read as slices rather than with fancy indexing
+    pieces = [
+        ds.isel({lon_name: slice(int(run[0]), int(run[-1]) + 1), lat_name: lat_slice})
+        for run in _contiguous_runs(lon_idx)
+    ]
+    if len(pieces) == 1:
+        window = pieces[0]
+    else:
+        import xarray as xr
+
+        window = xr.concat(pieces, dim=lon_name)
+    return window.assign_coords({lon_name: shifted[lon_idx]})
+
+
+def bathymetry_window(
+    bathymetry_path: Path,
+    lon_extent: Sequence[float],
+    lat_extent: Sequence[float],
+    cache_dir: Path,
+    longitude_coordinate_name: str = "lon",
+    latitude_coordinate_name: str = "lat",
+    vertical_coordinate_name: str = "elevation",
+    pad: float = DEFAULT_PAD,
+) -> Path:
+    """
+    Path of a NetCDF file holding the padded window of the bathymetry source
+    around the given extents, writing it to cache_dir/bathy_windows first if
+    it is not there yet.
+    """
+    key = spec_key(
+        "bathy_window",
+        file_fingerprint(bathymetry_path),
+        list(lon_extent),
+        list(lat_extent),
+        pad,
+        longitude_coordinate_name,
+        latitude_coordinate_name,
+        vertical_coordinate_name,
+    )
+    window_path = Path(cache_dir) / "bathy_windows" / f"{key}.nc"
+    if window_path.exists():
+        print(f"  Using cached bathymetry window {window_path}")
+        touch(window_path)
+        return window_path
+
+    window_path.parent.mkdir(parents=True, exist_ok=True)
+    source = open_source(str(bathymetry_path))
+    window = subset_window(
+        source[[vertical_coordinate_name]],
+        lon_extent,
+        lat_extent,
+        longitude_coordinate_name,
+        latitude_coordinate_name,
+        pad,
+    )
+    tmp = window_path.with_name(f"{key}.tmp{os.getpid()}.nc")
+    print(f"  Writing bathymetry window {window_path}")
+    window.to_netcdf(tmp)
+    os.replace(tmp, window_path)
+    return window_path
@@ -0,0 +1,218 @@
+"""
+Timing baselines for the backend calls the generators depend on.
+
+Each generator directory has a ``benchmarks.py`` mapping a benchmark name to
+a setup function. ``setup(grid_name, workdir)`` prepares its inputs (grids,
+synthetic source files) untimed and returns the zero-argument callable to
+time. Every benchmark runs on every reference grid, `repeat` times, and the
+fastest run is kept.
+
+A generator's ``STARTUP`` maps names to command lines, each timed the same
+way in a fresh interpreter (e.g. ``--help``, or importing what a grid-only run
+needs), since import time dominates short runs. Their records use the grid
+name "startup".
+
+Timings are stored as ``timings.json`` in the baseline directory, in the same
+format as a profile report (see baseline_tools.profiling), so they are
+compared with the same code: a benchmark more than `threshold` times slower
+than its stored baseline fails the run.
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import tempfile
+import time
+import traceback
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .profiling import compare_reports, read_report, write_report
+from .suite import BaselineCase, add_selection_args, select_cases
+
+TIMINGS_FILE = "timings.json"
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 2.0
+# Benchmarks are small on purpose, so noise matters below this many seconds
+DEFAULT_MIN_SECONDS = 0.05
+STARTUP_GRID = "startup"
+
+Setup = Callable[[str, Path], Callable[[], None]]
+
+
+def time_benchmark(
+    setup: Setup, grid: str, workdir: Path, repeat: int = DEFAULT_REPEAT
+) -> dict:
+    """Time one benchmark on one grid, returning a profile-style stage record."""
+    func = setup(grid, workdir)
+    walls, cpus = [], []
+    for _ in range(repeat):
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        func()
+        walls.append(time.perf_counter() - wall0)
+        cpus.append(time.process_time() - cpu0)
+    return {
+        "wall_s": round(min(walls), 5),
+        "cpu_s": round(min(cpus), 5),
+        "runs": [round(w, 5) for w in walls],
+    }
+
+
+def time_command(argv: List[str], repeat: int = DEFAULT_REPEAT) -> dict:
+    """Time the command line `argv` in a fresh process, as time_benchmark does."""
+    walls = []
+    for _ in range(repeat):
+        wall0 = time.perf_counter()
+        subprocess.run(argv, check=True, stdout=subprocess.DEVNULL)
+        walls.append(time.perf_counter() - wall0)
+    # The child's CPU time is not available per run, so record wall time only
+    return {
+        "wall_s": round(min(walls), 5),
+        "cpu_s": 0.0,
+        "runs": [round(w, 5) for w in walls],
+    }
+
+
+def run_startup(
+    commands: Dict[str, List[str]],
+    repeat: int = DEFAULT_REPEAT,
+    only: Optional[List[str]] = None,
+) -> Tuple[List[dict], List[str]]:
+    """Time every startup command line (or those named in `only`), see run_benchmarks."""
+    records, failed = [], []
+    for name, argv in commands.items():
+        if only and name not in only:
+            continue
+        try:
+            timing = time_command(argv, repeat)
+        except (OSError, subprocess.CalledProcessError):
+            print(f"[{STARTUP_GRID}] {name} FAILED\n{traceback.format_exc()}")
+            failed.append(f"{STARTUP_GRID}/{name}")
+            continue
+        print(f"[{STARTUP_GRID}] {name}: {timing['wall_s']:.3f}s")
+        records.append({"grid": STARTUP_GRID, "stage": name, **timing})
+    return records, failed
+
+
+def run_benchmarks(
+    benchmarks: Dict[str, Setup],
+    grids: List[str],
+    repeat: int = DEFAULT_REPEAT,
+    only: Optional[List[str]] = None,
+) -> Tuple[List[dict], List[str]]:
+    """
+    Run every benchmark (or those named in `only`) on every grid, each with
+    its own scratch directory as the working directory. Returns the stage
+    records and the names of the benchmarks that failed.
+    """
+    records, failed = [], []
+    for name, setup in benchmarks.items():
+        if only and name not in only:
+            continue
+        for grid in grids:
+            cwd = os.getcwd()
+            with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as workdir:
+                os.chdir(workdir)
+                try:
+                    timing = time_benchmark(setup, grid, Path(workdir), repeat)
+                except Exception:
+                    print(f"[{grid}] {name} FAILED\n{traceback.format_exc()}")
+                    failed.append(f"{grid}/{name}")
+                    continue
+                finally:
+                    os.chdir(cwd)
+            print(f"[{grid}] {name}: {timing['wall_s']:.3f}s")
+            records.append({"grid": grid, "stage": name, **timing})
+    return records, failed
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        description="Time the backend calls on the reference grids and compare "
+        "them with the stored timing baselines."
+    )
+    p.add_argument(
+        "baseline_dir",
+        nargs="?",
+        default="baselines",
+        help="Baselines directory holding " + TIMINGS_FILE,
+    )
+    p.add_argument(
+        "--update",
+        action="store_true",
+        help="Store the new timings as the baseline instead of comparing against it.",
+    )
+    p.add_argument(
+        "--bench",
+        action="append",
+        help="Benchmark to run (repeatable). Defaults to every benchmark.",
+    )
+    p.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help="Runs per benchmark, the fastest is kept",
+    )
+    p.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Fail if a benchmark is more than this many times slower than its baseline",
+    )
+    p.add_argument(
+        "--min-seconds",
+        type=float,
+        default=DEFAULT_MIN_SECONDS,
+        help="Ignore benchmarks shorter than this in both the baseline and the new run",
+    )
+    p.add_argument(
+        "--report",
+        help="Also write the new timings to this file (e.g. for CI artifacts)",
+    )
+    add_selection_args(p)
+    return p.parse_args(argv)
+
+
+def main(
+    benchmarks: Dict[str, Setup],
+    cases: Dict[str, BaselineCase],
+    libraries: List[str],
+    generator: str,
+    argv=None,
+    startup: Optional[Dict[str, List[str]]] = None,
+) -> int:
+    """Command line entry point shared by the generators' benchmarks.py."""
+    args = parse_args(argv)
+    grids = select_cases(cases, only=args.only, match=args.match)
+    records, failed = run_startup(startup or {}, args.repeat, args.bench)
+    bench_records, bench_failed = run_benchmarks(
+        benchmarks, grids, args.repeat, args.bench
+    )
+    records += bench_records
+    failed += bench_failed
+    timings_path = Path(args.baseline_dir) / TIMINGS_FILE
+    meta = dict(generator=generator, repeat=args.repeat, failed=failed)
+    if args.report:
+        write_report(args.report, records, libraries, **meta)
+    if args.update:
+        write_report(timings_path, records, libraries, **meta)
+        return 1 if failed else 0
+    if not timings_path.exists():
+        print(f"No timing baseline at {timings_path}, run with --update to create one")
+        return 1 if failed else 0
+
+    baseline = read_report(timings_path)
+    if baseline.get("host") != socket.gethostname():
+        print(f"Note: timing baseline was recorded on {baseline.get('host')}")
+    slow = compare_reports(
+        baseline,
+        {"stages": records},
+        threshold=args.threshold,
+        min_seconds=args.min_seconds,
+    )
+    for line in slow:
+        print(f"SLOWER {line}")
+    if not slow:
+        print(f"No benchmark slowed down more than {args.threshold}x")
+    return 1 if (slow or failed) else 0
@@ -0,0 +1,38 @@
+"""
+Split arrays into bounded-size blocks for streaming reads.
+"""
+
+import itertools
+from typing import Iterator, Tuple
+
+import numpy as np
+
+DEFAULT_BLOCK_BYTES = 64 * 2**20
+
+
+def iter_blocks(
+    shape: Tuple[int, ...], itemsize: int, block_bytes: int = DEFAULT_BLOCK_BYTES
+) -> Iterator[Tuple[slice, ...]]:
+    """
+    Yield index tuples that tile an array of `shape` in C order, each covering
+    at most `block_bytes` (or a single element row if that is larger).
+    """
+    if len(shape) == 0:
+        yield ()
+        return
+    # Find the outermost axis that has to be split so a block fits the budget;
+    # axes before it are walked one index at a time, axes after it are whole.
+    split = len(shape) - 1
+    for axis in range(len(shape)):
+        if int(np.prod(shape[axis + 1 :])) * itemsize <= block_bytes:
+            split = axis
+            break
+    inner = int(np.prod(shape[split + 1 :])) * itemsize
+    step = max(1, block_bytes // max(inner, 1))
+    outer = [range(n) for n in shape[:split]]
+    for index in itertools.product(*outer):
+        for start in range(0, shape[split], step):
+            stop = min(start + step, shape[split])
+            yield tuple(slice(i, i + 1) for i in index) + (slice(start, stop),) + tuple(
+                slice(None) for _ in shape[split + 1 :]
+            )
@@ -0,0 +1,200 @@
+"""
+Content-addressed cache for baseline artifacts.
+
+Every artifact (supergrid, vgrid, bathymetry, forcing set) is stored under a
+key that hashes everything it was built from: the grid specification, the
+keys of the artifacts it depends on, a fingerprint of the source datasets and
+the versions of the libraries that built it. A rerun with unchanged inputs
+finds the key in the cache and skips the build; a change anywhere upstream
+changes every downstream key, so exactly the affected artifacts are rebuilt.
+
+Entries double as the on-disk state of the objects they were saved from, so
+a generator can reload a Grid or Topo from a hit instead of rebuilding it.
+Every hit marks its entry as used, and `prune_lru` evicts the least recently
+used entries once the cache outgrows its budget.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from importlib import metadata
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from . import profiling
+from .storage import link_or_copy
+
+
+def spec_key(*parts) -> str:
+    """Hash JSON-serialisable `parts` into a stable hex key."""
+    blob = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()[:24]
+
+
+def library_versions(packages: Iterable[str]) -> Dict[str, Optional[str]]:
+    """Installed version of each package, or None if it is not installed."""
+    versions = {}
+    for package in packages:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def file_fingerprint(path) -> Optional[dict]:
+    """
+    Cheap fingerprint of a (possibly very large) source dataset: its path,
+    size and modification time. Returns None if the file does not exist.
+    """
+    path = Path(path)
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return {"path": str(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def touch(path: Path):
+    """Mark the cached file or entry directory at `path` as just used."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _freed_size(path: Path) -> int:
+    st = path.stat()
+    return st.st_size if st.st_nlink == 1 else 0
+
+
+def entry_size(path: Path) -> int:
+    """
+    Bytes deleting the cached file or entry directory at `path` would free.
+    Files also linked elsewhere (e.g. restored into a baseline directory,
+    see restore) free nothing, so they are not counted.
+    """
+    path = Path(path)
+    if path.is_file():
+        return _freed_size(path)
+    return sum(_freed_size(f) for f in path.rglob("*") if f.is_file())
+
+
+def prune_lru(
+    paths: Iterable[Path], max_bytes: float, keep_since: Optional[float] = None
+) -> List[Path]:
+    """
+    Delete the least recently used of the cached files and entry directories
+    in `paths` until they total at most `max_bytes`, counted by entry_size.
+    Entries used at or after the `keep_since` timestamp (e.g. by the current
+    run) are never deleted, nor are those whose deletion would free nothing.
+    Returns the deleted paths.
+    """
+    entries = []
+    for path in paths:
+        try:
+            entries.append((Path(path).stat().st_mtime, entry_size(path), Path(path)))
+        except OSError:
+            continue  # Deleted by a concurrent run
+    total = sum(size for _, size, _ in entries)
+    removed = []
+    for used, size, path in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        if size == 0 or (keep_since is not None and used >= keep_since):
+            continue
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+        total -= size
+        removed.append(path)
+    return removed
+
+
+class ArtifactCache:
+    """
+    Artifacts live in ``root/<stage>/<key>/`` as the files the stage wrote.
+    Entries are written to a temporary directory and renamed into place, so
+    an interrupted build never leaves a half-written entry behind.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def entry(self, stage: str, key: str) -> Path:
+        return self.root / stage / key
+
+    def has(self, stage: str, key: str) -> bool:
+        return self.entry(stage, key).is_dir()
+
+    def entries(self) -> List[Path]:
+        """Every committed entry, of every stage."""
+        return sorted(
+            entry
+            for entry in self.root.glob("*/*")
+            if entry.is_dir() and ".tmp" not in entry.name
+        )
+
+    def build(self, stage: str, key: str, writer: Callable[[Path], None]) -> Path:
+        """
+        Return the entry for (stage, key), calling `writer(entry_dir)` to
+        create it first if it is not cached yet.
+        """
+        entry = self.entry(stage, key)
+        if entry.is_dir():
+            print(f"  Cache hit for {stage} ({key})")
+            touch(entry)
+            return entry
+        tmp = entry.with_name(f"{key}.tmp{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        try:
+            writer(tmp)
+            tmp.rename(entry)
+        except OSError:
+            # Another process committed the same key first
+            if not entry.is_dir():
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return entry
+
+
+def restore(entry: Path, outdir: Path, prefix: str = ""):
+    """
+    Link (or if that fails, copy) every file of a cache entry into outdir,
+    applying the filename prefix.
+    """
+    outdir.mkdir(parents=True, exist_ok=True)
+    for file in sorted(entry.iterdir()):
+        if file.is_file():
+            dest = outdir / f"{prefix + '_' if prefix else ''}{file.name}"
+            link_or_copy(file, dest)
+
+
+def run_stage(
+    cache: Optional[ArtifactCache],
+    stage: str,
+    key: str,
+    outdir: Path,
+    writer: Callable[[Path, str], None],
+    prefix: str = "",
+) -> bool:
+    """
+    Produce one stage's baseline files in outdir.
+
+    `writer(dest_dir, prefix)` builds the artifact and writes it to dest_dir.
+    Without a cache it writes straight to outdir. With a cache it only runs on
+    a miss (into the cache entry, unprefixed) and the entry is then restored
+    into outdir. Returns True if the stage was served from the cache.
+    """
+    if cache is None:
+        writer(outdir, prefix)
+        return False
+    hit = cache.has(stage, key)
+    entry = cache.build(stage, key, lambda dest: writer(dest, ""))
+    with profiling.stage(f"restore_{stage}"):
+        restore(entry, outdir, prefix)
+    return hit
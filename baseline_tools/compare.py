@@ -0,0 +1,744 @@
+"""
+Block-wise comparison of baseline NetCDF files.
+
+Variables are read from disk one block at a time (sized to `block_bytes`), so
+memory use is bounded regardless of how large the grid is. Each variable
+yields a VariableResult with the mismatch count, the largest absolute and
+relative errors and the index bounding box of the region that differs.
+
+When the manifests of both files carry tile checksum trees (see
+baseline_tools.tiles), a variable whose checksums differ is only read in the
+tiles whose hashes differ, and the tiles holding mismatches are reported
+with their longitude / latitude extents.
+
+Either directory may also be a Zarr store written by
+baseline_tools.formats.pack_zarr, whose groups stand in for the files.
+
+Comparing two directories pairs up every artifact the generators saved (by
+file name, optionally after stripping each side's --prefix), compares the
+pairs in parallel, one process per file, and can write the outcome as a JSON
+summary and an HTML report. The exit code is nonzero if anything differs.
+
+Usage:
+    python -m baseline_tools.compare OLD_DIR NEW_DIR [--var area --var x ...]
+    python -m baseline_tools.compare OLD_DIR NEW_DIR -j 8 --json report.json --html report.html
+"""
+
+import argparse
+import html
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .blocks import DEFAULT_BLOCK_BYTES, iter_blocks
+from .formats import is_zarr_member, open_baseline
+from .manifest import read_manifest
+from .tiles import TILE_SHAPE, Tile, changed_tiles, tile_region, tile_trees
+from .tolerance import (
+    DEFAULT_RULES,
+    DEFAULT_TOLERANCE,
+    Tolerance,
+    load_rules,
+    tolerance_for,
+)
+
+
+# Variables checked by the old analyze_grid / analyze_bathy notebook helpers
+GRID_VARIABLES = ["area", "angle_dx", "x", "y", "dx", "dy"]
+BATHY_VARIABLES = ["depth", "mask"]
+
+# (longitude, latitude) variable names tried, in order, for tile extents:
+# the supergrid's, then the usual names of bathymetry and forcing files
+LONLAT_NAMES = [
+    ("x", "y"),
+    ("geolon", "geolat"),
+    ("lon", "lat"),
+    ("tlon", "tlat"),
+    ("longitude", "latitude"),
+]
+# Most tiles described by VariableResult.describe
+_DESCRIBED_TILES = 5
+
+REPORT_VERSION = 1
+
+
+@dataclass
+class VariableResult:
+    name: str
+    shape: Tuple[int, ...] = ()
+    dims: Tuple[str, ...] = ()
+    status: str = "ok"  # ok | differ | missing_old | missing_new | shape_mismatch
+    mismatches: int = 0
+    max_abs_err: float = 0.0
+    max_rel_err: float = 0.0
+    # Largest distance in units in the last place, for float variables
+    max_ulp_err: Optional[int] = None
+    # Per dimension (start, stop) of the region containing every mismatch
+    bbox: Optional[List[Tuple[int, int]]] = None
+    # True if the checksums matched and no numeric diff was needed
+    checksum_match: bool = False
+    # Number of tiles read, when only the tiles whose checksums differ were
+    tiles_read: Optional[int] = None
+    # The tiles of those holding mismatches, with per dimension (start, stop)
+    # "region" and, where the file has coordinates, "lon" and "lat" extents
+    tiles: Optional[List[dict]] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+    def describe(self) -> str:
+        if self.status in ("missing_old", "missing_new", "shape_mismatch"):
+            return f"{self.name}: {self.status}"
+        if self.checksum_match:
+            return f"{self.name}: bitwise identical"
+        if self.ok:
+            return f"{self.name}: identical within tolerance"
+        region = " ".join(
+            f"{dim}[{start}:{stop}]" for dim, (start, stop) in zip(self.dims, self.bbox)
+        )
+        ulp = "" if self.max_ulp_err is None else f", max ulp err {self.max_ulp_err}"
+        tiles = ""
+        if self.tiles:
+            extents = [
+                f"lon {tile['lon'][0]:.4g}..{tile['lon'][1]:.4g} "
+                f"lat {tile['lat'][0]:.4g}..{tile['lat'][1]:.4g}"
+                for tile in self.tiles[:_DESCRIBED_TILES]
+                if "lon" in tile
+            ]
+            more = len(self.tiles) - _DESCRIBED_TILES
+            tiles = (
+                f", in {len(self.tiles)} of {self.tiles_read} changed tiles"
+                + (f": {'; '.join(extents)}" if extents else "")
+                + (f" and {more} more" if more > 0 and extents else "")
+            )
+        return (
+            f"{self.name}: {self.mismatches} mismatches, "
+            f"max abs err {self.max_abs_err:.3g}, max rel err {self.max_rel_err:.3g}"
+            f"{ulp}, region {region}{tiles}"
+        )
+
+
+@dataclass
+class FileResult:
+    name: str
+    status: str = "ok"  # ok | differ | missing_old | missing_new | error
+    variables: Dict[str, VariableResult] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+# Signed integer type of each float size, for ULP distances
+_FLOAT_BITS = {2: np.int16, 4: np.int32, 8: np.int64}
+
+
+def _bitwise_equal(old: np.ndarray, new: np.ndarray) -> bool:
+    """True if both blocks have the same dtype and bytes (NaNs included)."""
+    if old.dtype != new.dtype or old.dtype.kind not in "biuf":
+        return False
+    bits = np.dtype(f"u{old.dtype.itemsize}")
+    return bool(
+        np.array_equal(
+            np.ascontiguousarray(old).view(bits), np.ascontiguousarray(new).view(bits)
+        )
+    )
+
+
+def _ordered_bits(a: np.ndarray) -> np.ndarray:
+    """Float bits as integers ordered like the floats, adjacent floats 1 apart."""
+    int_type = _FLOAT_BITS[a.dtype.itemsize]
+    bits = a.view(int_type).astype(np.int64)
+    negative = bits < 0
+    bits[negative] = np.iinfo(int_type).min - bits[negative]
+    return bits
+
+
+def _block_stats(old: np.ndarray, new: np.ndarray, tol: Tolerance):
+    """
+    Mismatch mask and max abs/rel/ULP error for one block, all derived from
+    a single difference buffer updated in place. The mask is None if the
+    blocks are bitwise identical, the ULP error None unless both blocks have
+    the same float type. For a cyclic variable the ULP error is measured
+    once the new values are moved by whole periods next to the old ones.
+    """
+    if _bitwise_equal(old, new):
+        return None, 0.0, 0.0, 0 if old.dtype.kind == "f" else None
+    if not (
+        np.issubdtype(old.dtype, np.number) and np.issubdtype(new.dtype, np.number)
+    ):
+        return old != new, 0.0, 0.0, None
+    same_float = old.dtype == new.dtype and old.dtype.kind == "f"
+    near = new
+    with np.errstate(invalid="ignore"):  # inf - inf, zeroed below
+        diff = np.subtract(old, new, dtype=np.float64)
+    # NaNs and infinities are outside any tolerance: they match only a value
+    # equal to them (NaN matches NaN) and are kept out of the arithmetic below
+    nonfinite = ~np.isfinite(old) | ~np.isfinite(new)
+    has_nonfinite = bool(nonfinite.any())
+    if has_nonfinite:
+        old_nonfinite, new_nonfinite = old[nonfinite], new[nonfinite]
+        nonfinite_bad = (old_nonfinite != new_nonfinite) & ~(
+            np.isnan(old_nonfinite) & np.isnan(new_nonfinite)
+        )
+        del old_nonfinite, new_nonfinite
+        diff[nonfinite] = 0.0
+    if tol.period:
+        # Smallest difference modulo the period. Only values more than half a
+        # period apart are wrapped, so small differences stay exact
+        far = np.abs(diff) > tol.period / 2
+        if far.any():
+            turns = np.round(diff[far] / tol.period) * tol.period
+            diff[far] -= turns
+            if same_float:
+                # The new values moved by whole periods next to the old ones
+                near = new.copy()
+                near[far] = new[far] + turns
+    np.abs(diff, out=diff)
+    scale = np.absolute(new, dtype=np.float64)
+    if has_nonfinite:
+        scale[nonfinite] = 0.0
+    limit = np.multiply(scale, tol.rtol)
+    limit += tol.atol
+    bad = diff > limit
+    del limit
+    max_abs = float(diff.max()) if diff.size else 0.0
+    np.divide(diff, scale, out=scale, where=scale > 0)
+    max_rel = float(scale.max()) if scale.size else 0.0
+    del scale
+    max_ulp = None
+    if same_float:
+        old_bits, new_bits = _ordered_bits(old), _ordered_bits(near)
+        ulp = np.abs(old_bits - new_bits).astype(np.float64)
+        # Exact in integers unless the signs differ, where it may overflow
+        cross = (old_bits < 0) != (new_bits < 0)
+        if cross.any():
+            ulp[cross] = np.abs(
+                old_bits[cross].astype(np.float64) - new_bits[cross].astype(np.float64)
+            )
+        del old_bits, new_bits, near
+        if has_nonfinite:
+            ulp[nonfinite] = 0.0
+        max_ulp = int(ulp.max()) if ulp.size else 0
+        if tol.max_ulp is not None:
+            bad &= ulp > tol.max_ulp
+    if has_nonfinite:
+        bad[nonfinite] = nonfinite_bad
+    return bad, max_abs, max_rel, max_ulp
+
+
+def _bbox_of(bad: np.ndarray, offsets: List[int]) -> List[Tuple[int, int]]:
+    bbox = []
+    for axis in range(bad.ndim):
+        other = tuple(a for a in range(bad.ndim) if a != axis)
+        hits = np.flatnonzero(bad.any(axis=other) if other else bad)
+        bbox.append((offsets[axis] + int(hits[0]), offsets[axis] + int(hits[-1]) + 1))
+    return bbox
+
+
+def _merge_bbox(a, b):
+    if a is None:
+        return b
+    return [(min(x0, y0), max(x1, y1)) for (x0, x1), (y0, y1) in zip(a, b)]
+
+
+def _region_blocks(
+    region: Tuple[slice, ...], shape: Tuple[int, ...], itemsize: int, block_bytes: int
+):
+    """iter_blocks over `region` of an array of `shape`, as indices of the whole array."""
+    bounds = [s.indices(n)[:2] for s, n in zip(region, shape)]
+    lengths = tuple(stop - start for start, stop in bounds)
+    for block in iter_blocks(lengths, itemsize, block_bytes):
+        yield tuple(
+            slice(start + s.indices(n)[0], start + s.indices(n)[1])
+            for s, (start, _), n in zip(block, bounds, lengths)
+        )
+
+
+def compare_variable(
+    name: str,
+    old_var,
+    new_var,
+    tol: Tolerance = DEFAULT_TOLERANCE,
+    block_bytes: int = DEFAULT_BLOCK_BYTES,
+    tiles: Optional[List[Tile]] = None,
+    tile_shape: Tuple[int, int] = TILE_SHAPE,
+) -> VariableResult:
+    """
+    Compare two lazily-loaded variables block by block within `tol`. With
+    `tiles` (see baseline_tools.tiles.changed_tiles) only those tiles are
+    read, the rest being known identical, and the ones holding mismatches
+    are listed in the result's `tiles`.
+    """
+    result = VariableResult(name, shape=tuple(new_var.shape), dims=tuple(new_var.dims))
+    if old_var.shape != new_var.shape:
+        result.status = "shape_mismatch"
+        return result
+    itemsize = max(old_var.dtype.itemsize, new_var.dtype.itemsize, 8)
+    if tiles is None:
+        regions = [(None, iter_blocks(result.shape, itemsize, block_bytes))]
+    else:
+        result.tiles_read, result.tiles = len(tiles), []
+        regions = [
+            (region, _region_blocks(region, result.shape, itemsize, block_bytes))
+            for region in (tile_region(result.shape, t, tile_shape) for t in tiles)
+        ]
+    for region, blocks in regions:
+        mismatches = result.mismatches
+        for block in blocks:
+            old = np.asarray(old_var[block].values)
+            new = np.asarray(new_var[block].values)
+            bad, max_abs, max_rel, max_ulp = _block_stats(old, new, tol)
+            if max_ulp is not None:
+                result.max_ulp_err = max(result.max_ulp_err or 0, max_ulp)
+            if bad is None:
+                continue
+            result.max_abs_err = max(result.max_abs_err, max_abs)
+            result.max_rel_err = max(result.max_rel_err, max_rel)
+            count = int(np.count_nonzero(bad))
+            if count:
+                result.mismatches += count
+                offsets = [s.start or 0 for s in block]
+                result.bbox = _merge_bbox(
+                    result.bbox, _bbox_of(np.asarray(bad), offsets)
+                )
+        if region is not None and result.mismatches > mismatches:
+            rows, cols = (
+                list(s.indices(n)[:2]) for s, n in zip(region[-2:], result.shape[-2:])
+            )
+            result.tiles.append({"region": [rows, cols]})
+    if result.mismatches:
+        result.status = "differ"
+    return result
+
+
+def _lonlat(ds, var) -> Optional[Tuple[object, object, int, int]]:
+    """
+    Longitude and latitude variables of `ds` locating the last two axes of
+    `var`, with the number of extra rows and columns they have (1 for a
+    variable on cells of a supergrid of corners, say), or None.
+    """
+    if var.ndim < 2:
+        return None
+    ny, nx = var.shape[-2:]
+    for lon_name, lat_name in LONLAT_NAMES:
+        lon, lat = ds.variables.get(lon_name), ds.variables.get(lat_name)
+        if lon is None or lat is None:
+            continue
+        if lon.ndim == 2 and lat.shape == lon.shape:
+            extra_y, extra_x = lon.shape[0] - ny, lon.shape[1] - nx
+            if extra_y in (0, 1) and extra_x in (0, 1):
+                return lon, lat, extra_y, extra_x
+        elif (
+            lon.ndim == 1
+            and lat.ndim == 1
+            and lat.dims == var.dims[-2:-1]
+            and lon.dims == var.dims[-1:]
+        ):
+            return lon, lat, 0, 0
+    return None
+
+
+def _add_tile_extents(result: VariableResult, ds, var):
+    """Add the longitude / latitude extents of each of result.tiles, reading only their coordinates."""
+    if not result.tiles:
+        return
+    coords = _lonlat(ds, var)
+    if coords is None:
+        return
+    lon, lat, extra_y, extra_x = coords
+    for tile in result.tiles:
+        (y0, y1), (x0, x1) = tile["region"]
+        if lon.ndim == 2:
+            lons = lon[y0 : y1 + extra_y, x0 : x1 + extra_x].values
+            lats = lat[y0 : y1 + extra_y, x0 : x1 + extra_x].values
+        else:
+            lons, lats = lon[x0:x1].values, lat[y0:y1].values
+        tile["lon"] = [float(np.nanmin(lons)), float(np.nanmax(lons))]
+        tile["lat"] = [float(np.nanmin(lats)), float(np.nanmax(lats))]
+
+
+def compare_files(
+    old_path: Path,
+    new_path: Path,
+    variables: Optional[List[str]] = None,
+    rtol: float = 1e-12,
+    atol: float = 0.0,
+    block_bytes: int = DEFAULT_BLOCK_BYTES,
+    fast_path: bool = True,
+    rules: Optional[Dict[str, Tolerance]] = None,
+    max_ulp: Optional[int] = None,
+) -> FileResult:
+    """
+    Compare the variables of two NetCDF files. If `variables` is None every
+    variable present in either file is compared. Values are compared as
+    stored on disk (no CF decoding), each within the tolerance its entry of
+    `rules` gives (DEFAULT_RULES if None, see baseline_tools.tolerance), or
+    else within `rtol`, `atol` and `max_ulp`.
+
+    With `fast_path`, the files' sidecar manifests (written at save time)
+    are checked first: identical files return without opening them, only
+    variables whose checksums differ are diffed, and of those only the tiles
+    whose checksums differ. Building a missing manifest would read the whole
+    file before the diff reads it again, so unless both files have a valid
+    sidecar (and for groups of a Zarr store, which have none) the files are
+    diffed whole.
+    """
+    result = FileResult(Path(new_path).name)
+    same = set()
+    old_trees = new_trees = {}
+    if fast_path and not (is_zarr_member(old_path) or is_zarr_member(new_path)):
+        old_manifest = read_manifest(old_path)
+        new_manifest = read_manifest(new_path) if old_manifest else None
+    else:
+        old_manifest = new_manifest = None
+    if old_manifest and new_manifest:
+        old_trees, new_trees = tile_trees(old_manifest), tile_trees(new_manifest)
+        old_sums, new_sums = old_manifest["variables"], new_manifest["variables"]
+        same = {name for name, s in old_sums.items() if new_sums.get(name) == s}
+        if old_manifest["size"] == new_manifest["size"] and (
+            old_manifest["checksum"] == new_manifest["checksum"]
+        ):
+            names = sorted(old_sums) if variables is None else variables
+            for name in names:
+                if name in same:
+                    result.variables[name] = VariableResult(name, checksum_match=True)
+            return result
+    default = Tolerance(rtol=rtol, atol=atol, max_ulp=max_ulp)
+    with open_baseline(old_path) as old_ds, open_baseline(new_path) as new_ds:
+        if variables is None:
+            variables = sorted(set(old_ds.variables) | set(new_ds.variables))
+        for name in variables:
+            if name not in old_ds.variables and name not in new_ds.variables:
+                continue
+            if name not in old_ds.variables:
+                result.variables[name] = VariableResult(name, status="missing_old")
+            elif name not in new_ds.variables:
+                result.variables[name] = VariableResult(name, status="missing_new")
+            elif name in same:
+                var = new_ds.variables[name]
+                result.variables[name] = VariableResult(
+                    name, tuple(var.shape), tuple(var.dims), checksum_match=True
+                )
+            else:
+                old_var, new_var = old_ds.variables[name], new_ds.variables[name]
+                tiles = None
+                if old_var.dtype == new_var.dtype:
+                    tiles = changed_tiles(old_trees.get(name), new_trees.get(name))
+                tree = new_trees.get(name)
+                var_result = compare_variable(
+                    name,
+                    old_var,
+                    new_var,
+                    tol=tolerance_for(name, rules, default),
+                    block_bytes=block_bytes,
+                    tiles=tiles,
+                    tile_shape=tuple(tree["tile"]) if tiles is not None else TILE_SHAPE,
+                )
+                _add_tile_extents(var_result, new_ds, new_var)
+                result.variables[name] = var_result
+    if not all(v.ok for v in result.variables.values()):
+        result.status = "differ"
+    return result
+
+
+# Names regional_mom6 saved its files under before both backends shared
+# baseline_tools.backends.baseline_filename
+_LEGACY_NAMES = {"grid_": "", "vgrid_": "_vgrid", "bathy_": "_bathy"}
+
+
+def canonical_name(name: str) -> str:
+    """`name` of a baseline file, with the legacy regional_mom6 names mapped to the shared ones."""
+    path = Path(name)
+    for lead, suffix in _LEGACY_NAMES.items():
+        if path.stem.startswith(lead):
+            return f"{path.stem[len(lead):]}{suffix}{path.suffix}"
+    return name
+
+
+def artifact_kind(name: str) -> str:
+    """Stage that saved the baseline file `name`, for either generator's naming scheme."""
+    stem = Path(name).stem
+    if "forcing_" in stem or "init_" in stem or stem.endswith("_ic"):
+        return "forcing"
+    if stem.startswith("bathy_") or stem.endswith("_bathy"):
+        return "bathy"
+    if stem.startswith("vgrid_") or stem.endswith("_vgrid"):
+        return "vgrid"
+    return "hgrid"
+
+
+def discover(
+    directory: Path, pattern: str = "*.nc", prefix: str = ""
+) -> Dict[str, Path]:
+    """
+    Baseline files of `directory` (or groups of a Zarr store) matching
+    `pattern`, keyed by canonical name without the generator's filename
+    `prefix`, so baselines saved under the legacy regional_mom6 names pair
+    with current ones. Files without the prefix (forcing files never carry
+    it) are included under their own names, unless a prefixed file has the
+    same name.
+    """
+    lead = f"{prefix}_" if prefix else ""
+    files = {
+        canonical_name(path.name[len(lead) :]): path
+        for path in sorted(Path(directory).glob(lead + pattern))
+    }
+    if lead:
+        for path in sorted(Path(directory).glob(pattern)):
+            if not path.name.startswith(lead):
+                files.setdefault(canonical_name(path.name), path)
+    return files
+
+
+def _failed(name: str, error: Exception) -> FileResult:
+    """Result of a file whose comparison raised `error`."""
+    print(f"{name}: comparison failed: {error!r}")
+    return FileResult(name, status="error")
+
+
+def compare_dirs(
+    old_dir: Path,
+    new_dir: Path,
+    pattern: str = "*.nc",
+    jobs: int = 1,
+    old_prefix: str = "",
+    new_prefix: str = "",
+    select: Optional[Callable[[str], bool]] = None,
+    **kwargs,
+) -> Dict[str, FileResult]:
+    """
+    Compare every file matching `pattern` that appears in either directory,
+    pairing files by name once `old_prefix` / `new_prefix` are stripped.
+    With `select`, only the names it accepts are compared. With ``jobs > 1``
+    the pairs are compared in a pool of that many processes. A file whose
+    comparison fails gets status "error". Other keyword arguments go to
+    compare_files.
+    """
+    old_files = discover(old_dir, pattern, old_prefix)
+    new_files = discover(new_dir, pattern, new_prefix)
+    results = {}
+    pairs = []
+    for name in sorted(set(old_files) | set(new_files)):
+        if select is not None and not select(name):
+            continue
+        if name not in old_files:
+            results[name] = FileResult(name, status="missing_old")
+        elif name not in new_files:
+            results[name] = FileResult(name, status="missing_new")
+        else:
+            pairs.append(name)
+    if jobs <= 1 or len(pairs) <= 1:
+        for name in pairs:
+            try:
+                results[name] = compare_files(
+                    old_files[name], new_files[name], **kwargs
+                )
+            except Exception as e:
+                results[name] = _failed(name, e)
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pairs))) as pool:
+            futures = {
+                name: pool.submit(
+                    compare_files, old_files[name], new_files[name], **kwargs
+                )
+                for name in pairs
+            }
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    results[name] = _failed(name, e)
+    for name, result in results.items():
+        # Report files under their unprefixed names
+        result.name = name
+    return {name: results[name] for name in sorted(results)}
+
+
+def results_to_dict(results: Dict[str, FileResult], **meta) -> dict:
+    """JSON-serialisable summary of compare_dirs results, with any extra `meta`."""
+    counts = {}
+    for result in results.values():
+        counts[result.status] = counts.get(result.status, 0) + 1
+    return {
+        "version": REPORT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        **meta,
+        "ok": all(r.ok for r in results.values()),
+        "counts": counts,
+        "files": {
+            name: {
+                "kind": artifact_kind(name),
+                "status": result.status,
+                "variables": {
+                    var_name: asdict(var) for var_name, var in result.variables.items()
+                },
+            }
+            for name, result in results.items()
+        },
+    }
+
+
+def write_json(path: Path, report: dict):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"Wrote comparison summary -> {path}")
+
+
+_HTML_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body><h1>{title}</h1>
+<table border="1" cellpadding="4">
+<tr><th>File</th><th>Kind</th><th>Status</th><th>Differences</th></tr>
+{rows}
+</table></body></html>
+"""
+
+
+def write_html(
+    path: Path, results: Dict[str, FileResult], title: str = "Baseline comparison"
+):
+    """One table row per file, listing the variables that differ."""
+    rows = []
+    for name, result in results.items():
+        problems = "<br>".join(
+            html.escape(var.describe())
+            for var in result.variables.values()
+            if not var.ok
+        )
+        colour = "#dfd" if result.ok else "#fdd"
+        rows.append(
+            f'<tr style="background:{colour}"><td>{html.escape(name)}</td>'
+            f"<td>{artifact_kind(name)}</td><td>{result.status}</td>"
+            f"<td>{problems}</td></tr>"
+        )
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(_HTML_PAGE.format(title=html.escape(title), rows="\n".join(rows)))
+    print(f"Wrote comparison report -> {path}")
+
+
+def print_results(results: Dict[str, FileResult]):
+    for name, file_result in results.items():
+        print(f"{name}: {file_result.status}")
+        for var in file_result.variables.values():
+            if not var.ok:
+                print(f"  {var.describe()}")
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        description="Compare two baseline directories variable by variable."
+    )
+    p.add_argument("old_dir", help="Reference baselines directory")
+    p.add_argument("new_dir", help="Newly generated baselines directory")
+    p.add_argument(
+        "--var",
+        action="append",
+        dest="variables",
+        help="Variable to compare (repeatable). Defaults to every variable.",
+    )
+    p.add_argument("--pattern", default="*.nc", help="Glob of files to compare")
+    p.add_argument(
+        "--old-prefix", default="", help="Filename prefix of the reference baselines"
+    )
+    p.add_argument(
+        "--new-prefix", default="", help="Filename prefix of the new baselines"
+    )
+    p.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of files compared in parallel (one process per file).",
+    )
+    p.add_argument("--json", metavar="PATH", help="Write a JSON summary to PATH")
+    p.add_argument("--html", metavar="PATH", help="Write an HTML report to PATH")
+    p.add_argument(
+        "--rtol",
+        type=float,
+        default=DEFAULT_TOLERANCE.rtol,
+        help="Relative tolerance of variables without a rule",
+    )
+    p.add_argument(
+        "--atol",
+        type=float,
+        default=DEFAULT_TOLERANCE.atol,
+        help="Absolute tolerance of variables without a rule",
+    )
+    p.add_argument(
+        "--max-ulp",
+        type=int,
+        help="Also accept float values at most this many units in the last place "
+        "apart, for variables without a rule",
+    )
+    p.add_argument(
+        "--rules",
+        metavar="TOML",
+        help="Per-variable tolerance rules, taking precedence over the built-in "
+        "ones (see baseline_tools.tolerance)",
+    )
+    p.add_argument(
+        "--block-mb",
+        type=float,
+        default=DEFAULT_BLOCK_BYTES / 2**20,
+        help="Maximum size of each block read from disk, in MiB",
+    )
+    p.add_argument(
+        "--no-fast-path",
+        action="store_true",
+        help="Always run the numeric diff, even when checksums match.",
+    )
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # Rules from --rules are matched before the built-in ones
+    rules = load_rules(args.rules) if args.rules else {}
+    for pattern, rule in DEFAULT_RULES.items():
+        rules.setdefault(pattern, rule)
+    results = compare_dirs(
+        args.old_dir,
+        args.new_dir,
+        pattern=args.pattern,
+        jobs=args.jobs,
+        old_prefix=args.old_prefix,
+        new_prefix=args.new_prefix,
+        variables=args.variables,
+        rtol=args.rtol,
+        atol=args.atol,
+        max_ulp=args.max_ulp,
+        rules=rules,
+        block_bytes=int(args.block_mb * 2**20),
+        fast_path=not args.no_fast_path,
+    )
+    print_results(results)
+    if args.json:
+        write_json(
+            args.json,
+            results_to_dict(
+                results,
+                old_dir=str(args.old_dir),
+                new_dir=str(args.new_dir),
+                rtol=args.rtol,
+                atol=args.atol,
+            ),
+        )
+    if args.html:
+        write_html(args.html, results, f"{args.old_dir} vs {args.new_dir}")
+    return 0 if all(r.ok for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
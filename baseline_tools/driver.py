@@ -0,0 +1,456 @@
+"""
+One driver for every backend's baseline generator.
+
+Each generator script registers a Backend (see baseline_tools.backends) and
+hands its command line to `main`. Run directly, the driver generates the
+baselines of several backends in one process:
+
+    python -m baseline_tools.driver baselines --backend CrocoDash --backend regional_mom6
+
+With more than one backend, all their cases share one task graph (or process
+pool with --jobs), each backend writes to its own subdirectory of the
+baseline directory, and cases are reported as ``backend/case``. Every
+backend reads its bathymetry through the shared window cache, so a window
+cut out of GEBCO for one backend serves the others, and GEBCO itself is only
+opened once per process.
+
+With --watch the process stays up after the first run. It keeps the
+backend libraries imported and GEBCO open, and then waits for changes:
+    - An edit to baseline_cases.toml regenerates only the selected cases
+      whose definition changed.
+    - An edit to a library source under --watch-path reloads that module
+      and regenerates the selected cases without the artifact cache, whose
+      keys only know library versions.
+With --compare-to, each run then compares the regenerated cases' baselines
+against a reference directory:
+
+    python CrocoDash/baseline_grid_generation.py baselines --only south_long_seam \
+        --watch --watch-path ~/src/mom6_bathy/mom6_bathy --compare-to reference
+"""
+
+import argparse
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .backends import (
+    BACKEND_SCRIPTS,
+    REPO_ROOT,
+    SOURCE_CACHE_DIR,
+    Backend,
+    load_backend,
+)
+from .cache import ArtifactCache, prune_lru
+from .compare import FileResult, compare_dirs, print_results
+from .fetch import DEFAULT_JOBS as DEFAULT_FETCH_JOBS
+from .formats import DEFAULT_FORMAT, FORMATS
+from .profiling import write_report
+from .scheduler import print_summary, run_task_graph
+from .suite import DEFAULT_MANIFEST, add_selection_args, select_cases
+from .taskgraph import DEFAULT_IO_JOBS
+from .watch import DEFAULT_INTERVAL, FileWatcher, reload_modules
+from .writer import DEFAULT_WRITE_JOBS, close_shared_writer
+
+DEFAULT_CACHE_LIMIT_GB = 50.0
+
+
+def add_common_args(p: argparse.ArgumentParser):
+    """Add the options shared by every backend to an argparse parser."""
+    p.add_argument(
+        "baseline_dir",
+        nargs="?",
+        default="baselines",
+        help="Output baselines directory",
+    )
+    p.add_argument(
+        "--prefix", "-p", default="", help="Optional filename prefix for saved grids"
+    )
+    p.add_argument(
+        "--with-bathy",
+        action="store_true",
+        help="If set, generate and save bathymetry files for each case.",
+    )
+    p.add_argument(
+        "--with-forcings",
+        action="store_true",
+        help="If set, generate and save forcing files for each case.",
+    )
+    p.add_argument(
+        "--with-global",
+        action="store_true",
+        help="If set, also build the global cases, in latitude bands.",
+    )
+    add_selection_args(p)
+    p.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Rebuild every artifact instead of reusing unchanged ones from the cache.",
+    )
+    p.add_argument(
+        "--cache-limit-gb",
+        type=float,
+        default=DEFAULT_CACHE_LIMIT_GB,
+        help="After the run, evict the least recently used cached artifacts and "
+        "source windows until they fit in this many GB. Entries used by the run "
+        "are kept. Raw data downloads are never evicted.",
+    )
+    p.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of cases to process in parallel (one process per case). "
+        "With 1, every case's tasks share one task graph in this process.",
+    )
+    p.add_argument(
+        "--synthetic",
+        action="store_true",
+        help="Use deterministic synthetic GEBCO and GLORYS stand-ins instead of "
+        "the /glade bathymetry and downloaded GLORYS data, e.g. to run or "
+        "profile offline.",
+    )
+    p.add_argument(
+        "--raw-data-source",
+        metavar="URL_OR_DIR",
+        help="Fetch missing raw data from this http(s) URL or directory instead "
+        "of the backend's own download. Files are named "
+        "{case}_{segment}_{start}-{end}_raw.nc, as in CrocoDash's cache/raw_data.",
+    )
+    p.add_argument(
+        "--fetch-jobs",
+        type=int,
+        default=DEFAULT_FETCH_JOBS,
+        help="Number of raw data files fetched concurrently per case.",
+    )
+    p.add_argument(
+        "--io-jobs",
+        type=int,
+        default=DEFAULT_IO_JOBS,
+        help="Number of cases whose raw data is fetched while other cases are "
+        "being processed (with --jobs 1, where all cases share one task graph).",
+    )
+    p.add_argument(
+        "--write-jobs",
+        type=int,
+        default=DEFAULT_WRITE_JOBS,
+        help="Number of threads saving finished artifacts in the background "
+        "while the next ones are computed (per process). 0 saves each artifact "
+        "in the task that built it.",
+    )
+    p.add_argument(
+        "--profile",
+        metavar="REPORT",
+        help="Record wall time, CPU time, peak RSS and I/O of every stage per "
+        "case and write them to this JSON report.",
+    )
+    p.add_argument(
+        "--format",
+        dest="output_format",
+        choices=list(FORMATS),
+        default=DEFAULT_FORMAT,
+        help="Format of the saved baseline files: the backends' plain NetCDF, or "
+        "NetCDF4 compressed with zlib or zstd and chunked for comparison reads. "
+        "Values are bitwise identical in every format.",
+    )
+    p.add_argument(
+        "--compare-to",
+        metavar="REFERENCE_DIR",
+        help="After generating, compare the generated cases' baselines with "
+        "those in REFERENCE_DIR (forcing files not named after their case are "
+        "left out). Differences make the exit code nonzero.",
+    )
+    p.add_argument(
+        "--watch",
+        action="store_true",
+        help="Stay up after the first run, with the backends imported and the "
+        "source datasets open. Regenerate, and re-compare, the selected cases "
+        "whenever their definition in the case manifest changes.",
+    )
+    p.add_argument(
+        "--watch-path",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="With --watch, also watch this library source file or directory "
+        "(repeatable). Changed modules are reloaded and every selected case is "
+        "regenerated without the artifact cache.",
+    )
+    p.add_argument(
+        "--watch-interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help="With --watch, seconds between checks for changes.",
+    )
+
+
+def parse_args(argv=None, backend: Optional[Backend] = None):
+    """
+    Parse the driver's command line. With `backend` (a generator script's
+    own entry point) only that backend runs; otherwise --backend selects
+    them, and only the selected ones are loaded before their own options
+    are added.
+    """
+    if backend is not None:
+        backends = [backend]
+    else:
+        pre = argparse.ArgumentParser(add_help=False)
+        pre.add_argument("--backend", action="append", choices=list(BACKEND_SCRIPTS))
+        known, _ = pre.parse_known_args(argv)
+        selected = dict.fromkeys(known.backend or BACKEND_SCRIPTS)
+        backends = [load_backend(name) for name in selected]
+    names = " and ".join(b.name for b in backends)
+    p = argparse.ArgumentParser(
+        description=f"Generate {names} baseline grids, and optionally bathymetry "
+        "and forcing files."
+    )
+    add_common_args(p)
+    if backend is None:
+        p.add_argument(
+            "--backend",
+            action="append",
+            choices=list(BACKEND_SCRIPTS),
+            help="Generate this backend's baselines (repeatable, default: all), "
+            "each into its own subdirectory when there are several.",
+        )
+    for b in backends:
+        b.add_arguments(p)
+    return p.parse_args(argv), backends
+
+
+def add_case_tasks(graph, label: str, options: Dict[str, dict]):
+    """
+    Add the tasks of the case `label` to `graph` through its backend's
+    adapter. `options` holds the add_tasks arguments of every backend of the
+    run; with several, labels are ``backend/case`` and the tasks are scoped
+    under the backend's name.
+    """
+    if len(options) == 1:
+        (backend_name,) = options
+        name = label
+    else:
+        backend_name, name = label.split("/", 1)
+        graph = graph.scoped(backend_name)
+    load_backend(backend_name).add_tasks(graph, name, **options[backend_name])
+
+
+def prune_caches(backends: List[Backend], max_bytes: float, keep_since: float):
+    """
+    Evict least recently used entries from the artifact caches of `backends`
+    and the shared source window cache, until they fit in `max_bytes`.
+    """
+    entries = [
+        entry
+        for b in backends
+        for entry in ArtifactCache(b.cache_dir / "artifacts").entries()
+    ]
+    for kind in ("bathy_windows", "synthetic"):
+        entries += [
+            path
+            for path in sorted((SOURCE_CACHE_DIR / kind).glob("*.nc"))
+            if ".tmp" not in path.name
+        ]
+    removed = prune_lru(entries, max_bytes, keep_since=keep_since)
+    if removed:
+        print(f"\n-- Evicted {len(removed)} least recently used cache entries --")
+
+
+def backend_dir(directory, b: Backend, backends: List[Backend]) -> Path:
+    """Baseline directory of backend `b`: its own subdirectory when there are several."""
+    return Path(directory) / b.name if len(backends) > 1 else Path(directory)
+
+
+def select_backend_cases(args, backends: List[Backend]) -> Dict[str, List[str]]:
+    """Names of the cases selected by --only / --match / --with-global, per backend."""
+    if args.only and len(backends) > 1:
+        unknown = sorted(
+            set(args.only) - {name for b in backends for name in b.cases}
+        )
+        if unknown:
+            raise SystemExit(f"Unknown case(s) {', '.join(unknown)}")
+    selected = {}
+    for b in backends:
+        only = args.only
+        if only and len(backends) > 1:
+            # A case may exist for some of the backends only
+            only = [name for name in only if name in b.cases]
+        selected[b.name] = select_cases(
+            b.cases, only=only, match=args.match, with_global=args.with_global
+        )
+    return selected
+
+
+def generate(
+    args,
+    backends: List[Backend],
+    selected: Dict[str, List[str]],
+    use_cache: bool = True,
+    profile: Optional[list] = None,
+) -> Dict[str, Optional[str]]:
+    """
+    Generate the `selected` cases of every backend, between the backends'
+    setup and teardown. Returns run_task_graph's results.
+    """
+    labels: List[str] = []
+    options: Dict[str, dict] = {}
+    for b in backends:
+        names = selected[b.name]
+        b.cache_dir.mkdir(parents=True, exist_ok=True)
+        if b.setup is not None:
+            b.setup(b.cache_dir)
+        labels += [f"{b.name}/{name}" for name in names] if len(backends) > 1 else names
+        options[b.name] = dict(
+            outdir=backend_dir(args.baseline_dir, b, backends),
+            prefix=args.prefix,
+            cache_dir=b.cache_dir,
+            with_bathy=args.with_bathy,
+            with_forcings=args.with_forcings,
+            use_cache=use_cache,
+            synthetic=args.synthetic,
+            raw_data_source=args.raw_data_source,
+            fetch_jobs=args.fetch_jobs,
+            output_format=args.output_format,
+            source_cache_dir=SOURCE_CACHE_DIR,
+            write_jobs=args.write_jobs,
+            **b.options(args),
+        )
+
+    results = run_task_graph(
+        add_case_tasks,
+        labels,
+        jobs=args.jobs,
+        io_jobs=args.io_jobs,
+        profile=profile,
+        options=options,
+    )
+    # Every grid has flushed its own writes, so this only stops the threads
+    close_shared_writer()
+
+    for b in backends:
+        if b.teardown is not None:
+            b.teardown(b.cache_dir)
+    return results
+
+
+def _belongs_to(name: str, case: str) -> bool:
+    """True if the baseline file `name` (canonical, unprefixed) is one of case `case`."""
+    return name.startswith(case) and name[len(case) : len(case) + 1] in ("_", ".")
+
+
+def compare_cases(
+    args, backends: List[Backend], selected: Dict[str, List[str]]
+) -> bool:
+    """
+    Compare the baseline files of the `selected` cases with those in
+    --compare-to and print the differences. Returns True if all match.
+    """
+    results: Dict[str, FileResult] = {}
+    for b in backends:
+        cases = selected[b.name]
+        label = f"{b.name}/" if len(backends) > 1 else ""
+        compared = compare_dirs(
+            backend_dir(args.compare_to, b, backends),
+            backend_dir(args.baseline_dir, b, backends),
+            old_prefix=args.prefix,
+            new_prefix=args.prefix,
+            select=lambda name: any(_belongs_to(name, case) for case in cases),
+        )
+        results.update((label + name, r) for name, r in compared.items())
+    print(f"\n-- Compared {len(results)} baseline files with {args.compare_to} --")
+    print_results(results)
+    return all(r.ok for r in results.values())
+
+
+def watch(args, backends: List[Backend], selected: Dict[str, List[str]]) -> None:
+    """
+    Regenerate (and with --compare-to re-compare) the affected cases on
+    every change to the case manifest or the --watch-path sources, until
+    interrupted.
+    """
+    watcher = FileWatcher([DEFAULT_MANIFEST, *args.watch_path])
+    watched = ", ".join(str(p) for p in watcher.paths)
+    print(f"\n-- Watching {watched} for changes (Ctrl-C to stop) --")
+    try:
+        while True:
+            changed = watcher.wait(args.watch_interval)
+            started = time.time() - 1.0
+            print(f"\n-- Changed: {', '.join(str(p) for p in changed)} --")
+            try:
+                affected = {b.name: [] for b in backends}
+                use_cache = not args.no_cache
+                if DEFAULT_MANIFEST.resolve() in changed:
+                    before = {b.name: dict(b.cases) for b in backends}
+                    for b in backends:
+                        if b.reload_cases is not None:
+                            b.reload_cases()
+                    selected = select_backend_cases(args, backends)
+                    for b in backends:
+                        affected[b.name] = [
+                            name
+                            for name in selected[b.name]
+                            if before[b.name].get(name) != b.cases[name]
+                        ]
+                sources = [p for p in changed if p != DEFAULT_MANIFEST.resolve()]
+                if sources:
+                    # baseline_tools and the generator scripts hold the state
+                    # of this process, so they are never reloaded
+                    reloaded = reload_modules(sources, keep=[REPO_ROOT])
+                    print(f"Reloaded {', '.join(reloaded) or 'no imported module'}")
+                    affected = selected
+                    use_cache = False
+                if not any(affected.values()):
+                    print("No selected case is affected")
+                    continue
+                results = generate(args, backends, affected, use_cache)
+                prune_caches(backends, args.cache_limit_gb * 2**30, keep_since=started)
+                print_summary(results)
+                if args.compare_to:
+                    compare_cases(args, backends, affected)
+            except (Exception, SystemExit):
+                # E.g. a manifest or module saved half-edited: report it and
+                # wait for the next change
+                traceback.print_exc()
+    except KeyboardInterrupt:
+        print("\n-- Stopped watching --")
+
+
+def main(argv=None, backend: Optional[Backend] = None) -> int:
+    args, backends = parse_args(argv, backend)
+    # Cache entries used from here on belong to this run and are never evicted
+    # (less a second, for file systems with coarse timestamps)
+    started = time.time() - 1.0
+
+    if args.with_bathy:
+        print("\n-- Generating bathymetry because --with-bathy was specified --")
+    else:
+        print("\n-- Skipping bathymetry generation (use --with-bathy to enable) --")
+    if args.with_forcings:
+        print("\n-- Generating forcings because --with-forcings was specified --")
+    else:
+        print("\n-- Skipping forcing generation (use --with-forcings to enable) --")
+
+    selected = select_backend_cases(args, backends)
+    profile = [] if args.profile else None
+    results = generate(args, backends, selected, not args.no_cache, profile)
+    prune_caches(backends, args.cache_limit_gb * 2**30, keep_since=started)
+    if profile is not None:
+        write_report(
+            args.profile,
+            profile,
+            list(dict.fromkeys(lib for b in backends for lib in b.cache_libraries)),
+            generator="+".join(b.name for b in backends),
+            jobs=args.jobs,
+            failed=[name for name, error in results.items() if error is not None],
+        )
+    ok = print_summary(results)
+    if args.compare_to:
+        ok = compare_cases(args, backends, selected) and ok
+    if args.watch:
+        # The exit status still reports the initial run
+        watch(args, backends, selected)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
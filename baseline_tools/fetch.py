@@ -0,0 +1,152 @@
+"""
+Fetch the raw-data pieces (one file per grid and boundary) that are missing,
+concurrently and resumably.
+
+Each piece is a FetchTask: the file it should end up as and a fetcher that
+writes it. Pieces whose file exists are skipped. The rest run in a thread
+pool of `jobs` workers. A fetcher writes to ``<dest>.part`` and the file is
+renamed into place only once it is complete, so an interrupted run never
+leaves a truncated piece behind, and an HTTP download picks up where its
+``.part`` file stopped.
+
+Fetchers exist for an HTTP(S) server, a local directory (e.g. a copy of
+another machine's cache/raw_data, or a stand-in for the real service) and a
+shell command such as a line of regional_mom6's get_glorys_data.sh.
+"""
+
+import os
+import shutil
+import subprocess
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List
+
+from .storage import link_or_copy
+
+DEFAULT_JOBS = 4
+DEFAULT_RETRIES = 2
+_CHUNK_BYTES = 8 * 2**20
+
+Fetcher = Callable[[Path], None]
+
+
+@dataclass
+class FetchTask:
+    name: str
+    dest: Path
+    # Writes the piece to the given .part path, resuming it if it exists
+    fetch: Fetcher
+
+
+def raw_piece_name(grid: str, segment: str, start, end) -> str:
+    """
+    File name of one raw-data piece: `segment` ("ic" or a boundary) of
+    `grid` from `start` to `end`. Raw-data caches and sources use this name.
+    """
+    start, end = (f"{d:%Y%m%d}" for d in (start, end))
+    return f"{grid}_{segment}_{start}-{end}_raw.nc"
+
+
+def part_path(dest: Path) -> Path:
+    dest = Path(dest)
+    return dest.with_name(dest.name + ".part")
+
+
+def http_fetcher(url: str) -> Fetcher:
+    """Download `url`, resuming an existing .part file with a Range request."""
+
+    def fetch(part: Path):
+        offset = part.stat().st_size if part.exists() else 0
+        request = urllib.request.Request(url)
+        if offset:
+            request.add_header("Range", f"bytes={offset}-")
+        try:
+            response = urllib.request.urlopen(request)
+        except urllib.error.HTTPError as e:
+            if e.code == 416 and offset:
+                return  # The .part file already holds the whole file
+            raise
+        with response:
+            # 206 continues the .part file, 200 means the server ignored Range
+            mode = "ab" if response.status == 206 else "wb"
+            with open(part, mode) as f:
+                shutil.copyfileobj(response, f, _CHUNK_BYTES)
+
+    return fetch
+
+
+def file_fetcher(source: Path) -> Fetcher:
+    """Copy (or reflink) a local file."""
+
+    def fetch(part: Path):
+        link_or_copy(source, part, hardlink=False)
+
+    return fetch
+
+
+def command_fetcher(command: str, produced: Path) -> Fetcher:
+    """Run a shell command that writes the file `produced`."""
+
+    def fetch(part: Path):
+        Path(produced).unlink(missing_ok=True)
+        result = subprocess.run(command, shell=True, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"`{command}` failed with exit code {result.returncode}:\n{result.stderr}"
+            )
+        os.replace(produced, part)
+
+    return fetch
+
+
+def source_fetcher(source: str, filename: str) -> Fetcher:
+    """Fetcher for `filename` under `source`, an http(s):// or file:// URL or a directory."""
+    if source.startswith(("http://", "https://")):
+        return http_fetcher(f"{source.rstrip('/')}/{filename}")
+    return file_fetcher(Path(source.removeprefix("file://")) / filename)
+
+
+def _fetch_one(task: FetchTask, retries: int):
+    part = part_path(task.dest)
+    for attempt in range(retries + 1):
+        try:
+            task.fetch(part)
+            os.replace(part, task.dest)
+            print(f"  Fetched {task.name} -> {task.dest}")
+            return
+        except Exception as e:
+            if attempt == retries:
+                raise
+            print(f"  Fetching {task.name} failed ({e}), retrying")
+
+
+def fetch_missing(
+    tasks: List[FetchTask], jobs: int = DEFAULT_JOBS, retries: int = DEFAULT_RETRIES
+) -> List[str]:
+    """
+    Fetch every task whose destination does not exist yet, at most `jobs` at
+    a time. Returns the names of the fetched tasks. If any task still fails
+    after `retries` retries, the others are finished first and a RuntimeError
+    naming every failed task is raised.
+    """
+    missing = [task for task in tasks if not Path(task.dest).exists()]
+    if not missing:
+        return []
+    print(f"  Fetching {len(missing)} missing piece(s) with {jobs} worker(s)")
+    for task in missing:
+        Path(task.dest).parent.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {task.name: pool.submit(_fetch_one, task, retries) for task in missing}
+    errors = {}
+    for name, future in futures.items():
+        if future.exception() is not None:
+            errors[name] = future.exception()
+    if errors:
+        raise RuntimeError(
+            "Failed to fetch "
+            + ", ".join(f"{name} ({error})" for name, error in errors.items())
+        )
+    return [task.name for task in missing]
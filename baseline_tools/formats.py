@@ -0,0 +1,206 @@
+"""
+Storage formats of baseline files.
+
+The backends write plain NetCDF. `recompress` rewrites a saved file as
+NetCDF4 with zlib or zstd compression. Variables of two or more dimensions
+get one chunk per checksum tile (see baseline_tools.tiles), so diffing the
+tiles that changed decompresses nothing else; others get one chunk per
+block that the comparison and the manifest checksums read (see
+baseline_tools.blocks), so each block read decompresses exactly one chunk.
+Values are copied as stored (no CF decoding) and every variable's checksum
+is checked against the original before the rewrite replaces it, so the
+change is bitwise lossless.
+
+`pack_zarr` gathers a whole baseline directory into one consolidated Zarr
+store with a group per file, named after the file. baseline_tools.compare
+accepts such a store in place of a directory.
+
+Usage:
+    python -m baseline_tools.formats recompress BASELINE_DIR --format netcdf-zstd
+    python -m baseline_tools.formats zarr BASELINE_DIR STORE.zarr
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Tuple
+
+import numpy as np
+
+from .blocks import DEFAULT_BLOCK_BYTES, iter_blocks
+from .manifest import variable_checksum
+from .tiles import TILE_SHAPE
+
+if TYPE_CHECKING:
+    import xarray as xr
+
+# NetCDF4 encoding of each output format, None for the backend's own output
+FORMATS = {
+    "netcdf": None,
+    "netcdf-zlib": {"zlib": True, "shuffle": True},
+    "netcdf-zstd": {"compression": "zstd", "shuffle": True},
+}
+DEFAULT_FORMAT = "netcdf"
+DEFAULT_COMPLEVEL = 4
+# Largest chunk made by extending a tile along the leading axes, within the
+# HDF5 chunk cache so block reads decompress each chunk once
+TILE_CHUNK_BYTES = 2**20
+
+
+def comparison_chunks(
+    shape: Tuple[int, ...], itemsize: int, block_bytes: int = DEFAULT_BLOCK_BYTES
+) -> Optional[Tuple[int, ...]]:
+    """
+    Chunk shape of a variable of `shape` in the compressed formats, or None
+    for scalars. With two or more dimensions, a checksum tile, extended
+    along the leading axes (innermost first) up to TILE_CHUNK_BYTES for
+    small tiles such as those of boundary segments. Else the blocks
+    compare_variable and variable_checksum read. Both widen values to 8
+    bytes when sizing blocks, so the same is done here.
+    """
+    if not shape or 0 in shape:
+        return None
+    if len(shape) >= 2:
+        chunks = [1] * (len(shape) - 2) + [
+            min(n, t) for n, t in zip(shape[-2:], TILE_SHAPE)
+        ]
+        for axis in reversed(range(len(shape) - 2)):
+            fit = TILE_CHUNK_BYTES // (int(np.prod(chunks)) * max(itemsize, 8))
+            chunks[axis] = max(1, min(shape[axis], fit))
+            if chunks[axis] < shape[axis]:
+                break
+        return tuple(chunks)
+    block = next(iter_blocks(tuple(shape), max(itemsize, 8), block_bytes))
+    return tuple(len(range(*s.indices(n))) for s, n in zip(block, shape))
+
+
+def _encoding(var, fmt: str, complevel: int) -> dict:
+    if var.dtype.kind in "OSU":
+        # Strings cannot be compressed by the NetCDF4 filters
+        return {}
+    encoding = {**FORMATS[fmt], "complevel": complevel}
+    chunks = comparison_chunks(var.shape, var.dtype.itemsize)
+    if chunks is not None:
+        encoding["chunksizes"] = chunks
+    return encoding
+
+
+def recompress(path: Path, fmt: str = DEFAULT_FORMAT, complevel: int = DEFAULT_COMPLEVEL):
+    """
+    Rewrite the NetCDF file at `path` in output format `fmt`. Does nothing
+    for "netcdf". Raises ValueError, leaving the file untouched, if any
+    variable would not be bitwise identical.
+    """
+    if FORMATS[fmt] is None:
+        return
+    import xarray as xr
+
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp{os.getpid()}")
+    try:
+        with xr.open_dataset(path, decode_cf=False, cache=False) as ds:
+            before = {name: variable_checksum(var) for name, var in ds.variables.items()}
+            ds.to_netcdf(
+                tmp,
+                format="NETCDF4",
+                encoding={
+                    name: _encoding(var, fmt, complevel)
+                    for name, var in ds.variables.items()
+                },
+                unlimited_dims=ds.encoding.get("unlimited_dims"),
+            )
+        with xr.open_dataset(tmp, decode_cf=False, cache=False) as ds:
+            after = {name: variable_checksum(var) for name, var in ds.variables.items()}
+        if after != before:
+            changed = sorted(n for n in before if after.get(n) != before[n])
+            raise ValueError(f"Recompressing {path} would change {', '.join(changed)}")
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def pack_zarr(baseline_dir: Path, store: Path, pattern: str = "*.nc") -> Path:
+    """
+    Write every file of baseline_dir matching `pattern` into a consolidated
+    Zarr store, one group per file. The store is built under a temporary
+    name and replaces any existing store at once.
+    """
+    try:
+        import zarr
+    except ImportError as e:
+        raise ImportError("Writing a Zarr store requires the zarr package") from e
+    import xarray as xr
+
+    store = Path(store)
+    tmp = store.with_name(f".{store.name}.tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    try:
+        for file in sorted(Path(baseline_dir).glob(pattern)):
+            print(f"Packing {file} -> {store}/{file.name}")
+            with xr.open_dataset(file, decode_cf=False, cache=False) as ds:
+                ds.to_zarr(tmp, group=file.name, mode="w", consolidated=False)
+        zarr.consolidate_metadata(str(tmp))
+        shutil.rmtree(store, ignore_errors=True)
+        os.replace(tmp, store)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return store
+
+
+def is_zarr_member(path: Path) -> bool:
+    """True if `path` is a group of a Zarr store written by pack_zarr."""
+    path = Path(path)
+    return path.parent.suffix == ".zarr" and path.is_dir()
+
+
+def open_baseline(path: Path) -> "xr.Dataset":
+    """Open a baseline file, or a pack_zarr group, lazily and without CF decoding."""
+    import xarray as xr
+
+    path = Path(path)
+    if is_zarr_member(path):
+        return xr.open_dataset(
+            path.parent, engine="zarr", group=path.name, decode_cf=False, chunks=None
+        )
+    return xr.open_dataset(path, decode_cf=False, cache=False)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Convert baseline files between formats.")
+    sub = p.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("recompress", help="Rewrite every file in a compressed format")
+    rec.add_argument("baseline_dir")
+    rec.add_argument(
+        "--format",
+        choices=[f for f in FORMATS if FORMATS[f] is not None],
+        default="netcdf-zlib",
+    )
+    rec.add_argument("--complevel", type=int, default=DEFAULT_COMPLEVEL)
+    rec.add_argument("--pattern", default="*.nc", help="Glob of files to rewrite")
+    zr = sub.add_parser("zarr", help="Pack a baseline directory into a Zarr store")
+    zr.add_argument("baseline_dir")
+    zr.add_argument("store", help="Path of the Zarr store, ending in .zarr")
+    zr.add_argument("--pattern", default="*.nc", help="Glob of files to pack")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.command == "recompress":
+        from .manifest import write_manifest
+
+        for file in sorted(Path(args.baseline_dir).glob(args.pattern)):
+            print(f"Recompressing {file} ({args.format})")
+            recompress(file, args.format, args.complevel)
+            write_manifest(file)
+    else:
+        if Path(args.store).suffix != ".zarr":
+            sys.exit("The Zarr store's name must end in .zarr")
+        pack_zarr(args.baseline_dir, args.store, args.pattern)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Backend classes imported on first use.
+
+Importing a backend library pulls in its whole stack: CrocoDash's CESM case
+and forcing machinery, regional_mom6's regridding. A generator that only
+prints its --help, or only builds grids, should not pay for that, so the
+generator scripts look their backend classes up through a LazyNames:
+
+    lib = LazyNames(Grid=["mom6_bathy.grid"], Case=["CrocoDash.case"])
+    grid = lib.Grid(name=name, **spec)  # imports mom6_bathy.grid here
+
+Each name lists candidate modules, tried in order, so a class can come from
+an optional library with a fallback. `LazyNames.reset_all` forgets every
+name looked up so far, so the driver's --watch mode picks up reloaded
+library modules.
+"""
+
+import importlib
+import threading
+import weakref
+from typing import Dict, Sequence
+
+
+class LazyNames:
+    _instances: "weakref.WeakSet[LazyNames]" = weakref.WeakSet()
+
+    def __init__(self, **names: Sequence[str]):
+        self._modules: Dict[str, Sequence[str]] = names
+        self._loaded: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        LazyNames._instances.add(self)
+
+    @classmethod
+    def reset_all(cls):
+        """Forget the names every LazyNames has looked up, so they are looked up again."""
+        for names in list(cls._instances):
+            with names._lock:
+                names._loaded.clear()
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or name not in self._modules:
+            raise AttributeError(name)
+        with self._lock:
+            if name not in self._loaded:
+                self._loaded[name] = self._import(name)
+        return self._loaded[name]
+
+    def _import(self, name: str):
+        """`name` from the first of its candidate modules that imports."""
+        error = None
+        for module in self._modules[name]:
+            try:
+                return getattr(importlib.import_module(module), name)
+            except ImportError as e:
+                error = e
+        raise error
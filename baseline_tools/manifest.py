@@ -0,0 +1,124 @@
+"""
+Sidecar manifests of baseline files.
+
+Next to every saved baseline file ``name.nc`` the save functions write
+``name.nc.manifest.json`` holding the file size, a checksum of the whole file
+and a checksum of the raw bytes of every variable. Comparing two baselines
+can then decide "nothing changed" from the manifests alone, and only run the
+numeric diff on the variables whose checksums differ.
+
+Variables of two or more dimensions also get a tree of per-tile checksums
+(see baseline_tools.tiles), built in the same read, so the diff of a
+changed variable only reads the tiles that changed. Manifests written
+before the trees existed are still valid, their variables are diffed whole.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .blocks import DEFAULT_BLOCK_BYTES, iter_blocks
+from .tiles import TileHasher
+
+SIDECAR_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+_FILE_READ_BYTES = 8 * 2**20
+
+
+def sidecar_path(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + SIDECAR_SUFFIX)
+
+
+def file_checksum(path: Path) -> str:
+    """Streaming checksum of the file's bytes."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(_FILE_READ_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _block_bytes(values: np.ndarray) -> bytes:
+    if values.dtype == object:
+        return "\0".join(map(str, values.ravel())).encode()
+    return np.ascontiguousarray(values).tobytes()
+
+
+def variable_checksum(
+    var, block_bytes: int = DEFAULT_BLOCK_BYTES, tiles: Optional[TileHasher] = None
+) -> str:
+    """
+    Checksum of a variable's dtype, shape and raw values, read block by
+    block. Each block is also fed to `tiles`, if given.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{var.dtype}|{tuple(var.shape)}|".encode())
+    for block in iter_blocks(tuple(var.shape), max(var.dtype.itemsize, 8), block_bytes):
+        values = np.asarray(var[block].values)
+        digest.update(_block_bytes(values))
+        if tiles is not None:
+            tiles.update(block, values)
+    return digest.hexdigest()
+
+
+def build_manifest(path: Path, block_bytes: int = DEFAULT_BLOCK_BYTES) -> dict:
+    import xarray as xr
+
+    path = Path(path)
+    st = path.stat()
+    variables, trees = {}, {}
+    with xr.open_dataset(path, decode_cf=False, cache=False) as ds:
+        for name, var in ds.variables.items():
+            tiles = None
+            if var.ndim >= 2 and var.size:
+                tiles = TileHasher(var.shape, serialize=_block_bytes)
+            variables[name] = variable_checksum(var, block_bytes, tiles)
+            if tiles is not None:
+                trees[name] = tiles.tree()
+    return {
+        "version": MANIFEST_VERSION,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "checksum": file_checksum(path),
+        "variables": variables,
+        "tiles": trees,
+    }
+
+
+def write_manifest(path: Path) -> dict:
+    """Compute the manifest of a saved baseline file and write its sidecar."""
+    manifest = build_manifest(path)
+    sidecar = sidecar_path(path)
+    # Written under a temporary name, since the old sidecar may be a link
+    # to a cache entry
+    tmp = sidecar.with_name(f"{sidecar.name}.tmp{os.getpid()}")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, sidecar)
+    return manifest
+
+
+def read_manifest(path: Path) -> Optional[dict]:
+    """
+    Return the sidecar manifest of `path` if it exists and still describes
+    the file, else None. A file whose size and modification time match is
+    trusted; if only the modification time changed the file checksum decides.
+    """
+    try:
+        with open(sidecar_path(path)) as f:
+            manifest = json.load(f)
+        st = Path(path).stat()
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("size") != st.st_size:
+        return None
+    if manifest.get("mtime_ns") != st.st_mtime_ns:
+        # Touched (e.g. by a git checkout) but possibly unchanged
+        if file_checksum(path) != manifest.get("checksum"):
+            return None
+    return manifest
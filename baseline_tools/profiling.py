@@ -0,0 +1,281 @@
+"""
+Per-stage timing, memory and I/O instrumentation of the baseline generators.
+
+Pipelines wrap each stage in ``with stage("bathy"):``. While profiling is off
+this is a no-op; while it is on every stage records its wall time, CPU time
+(including child processes such as the GLORYS download script), the peak RSS
+reached during the stage and the bytes the process read and wrote. Records are
+tagged with the grid being processed and gathered into a JSON run report.
+
+CPU time, peak RSS and I/O are counted for the whole process, so stages that
+overlap (see baseline_tools.taskgraph) share them; wall times stay exact.
+
+Two reports can be compared to spot slowdowns from one run to the next:
+
+    python -m baseline_tools.profiling OLD_REPORT.json NEW_REPORT.json
+"""
+
+import argparse
+import contextlib
+import json
+import platform
+import resource
+import socket
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+REPORT_VERSION = 1
+
+# Minimum wall time for a stage to be checked for slowdowns, in seconds.
+# Shorter stages are dominated by noise.
+DEFAULT_MIN_SECONDS = 1.0
+
+
+@dataclass
+class StageRecord:
+    grid: str
+    stage: str
+    wall_s: float
+    cpu_s: float
+    peak_rss_mb: Optional[float]
+    read_bytes: Optional[int]
+    written_bytes: Optional[int]
+    ok: bool = True
+
+
+# Process-global state, so stages deep inside a pipeline need no profiler
+# handed down to them. Each pool worker has its own copy.
+_enabled = False
+_grid = ""
+_records: List[StageRecord] = []
+# Grid of the stages run by the current thread, set by `grid`
+_local = threading.local()
+
+
+def start(grid: str):
+    """Turn profiling on and tag the following stages with `grid`."""
+    global _enabled, _grid
+    _enabled = True
+    _grid = grid
+    _records.clear()
+
+
+@contextlib.contextmanager
+def grid(name: str):
+    """
+    Tag the stages run by the current thread with grid `name` instead of the
+    one given to `start`, for threads working on several grids in turn.
+    """
+    previous = getattr(_local, "grid", None)
+    _local.grid = name
+    try:
+        yield
+    finally:
+        _local.grid = previous
+
+
+def current_grid() -> str:
+    """Grid the current thread's stages are tagged with."""
+    return getattr(_local, "grid", None) or _grid
+
+
+def drain() -> List[dict]:
+    """Turn profiling off and return the records since `start`, as dicts."""
+    global _enabled
+    _enabled = False
+    records = [asdict(r) for r in _records]
+    _records.clear()
+    return records
+
+
+def _io_counters() -> Tuple[Optional[int], Optional[int]]:
+    """Bytes read and written by this process so far (Linux only)."""
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(":", 1) for line in f)
+    except OSError:
+        return None, None
+    return int(fields["rchar"]), int(fields["wchar"])
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's peak RSS counter (VmHWM). Returns False if unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def _peak_rss_mb(reset: bool) -> Optional[float]:
+    """
+    Peak RSS in MiB: since the last reset if the counter could be reset, else
+    over the lifetime of the process.
+    """
+    if reset:
+        try:
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return maxrss / (2**20 if sys.platform == "darwin" else 1024)
+
+
+def _cpu_seconds() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    """Record one stage of the current grid's pipeline, if profiling is on."""
+    if not _enabled:
+        yield
+        return
+    reset = _reset_peak_rss()
+    read0, written0 = _io_counters()
+    cpu0 = _cpu_seconds()
+    wall0 = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        wall = time.perf_counter() - wall0
+        cpu = _cpu_seconds() - cpu0
+        read1, written1 = _io_counters()
+        _records.append(
+            StageRecord(
+                grid=current_grid(),
+                stage=name,
+                wall_s=round(wall, 4),
+                cpu_s=round(cpu, 4),
+                peak_rss_mb=round(_peak_rss_mb(reset), 1),
+                read_bytes=None if read0 is None else read1 - read0,
+                written_bytes=None if written0 is None else written1 - written0,
+                ok=ok,
+            )
+        )
+
+
+def write_report(
+    path: Path, records: Iterable[dict], libraries: Iterable[str] = (), **meta
+) -> dict:
+    """
+    Write the JSON run report: run metadata (host, Python, versions of
+    `libraries`, any extra `meta`) and the stage records.
+    """
+    from .cache import library_versions
+
+    report = {
+        "version": REPORT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "host": socket.gethostname(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "libraries": library_versions(libraries),
+        "argv": sys.argv,
+        **meta,
+        "stages": sorted(records, key=lambda r: (r["grid"], r["stage"])),
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"Wrote profile report -> {path}")
+    return report
+
+
+def read_report(path: Path) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _stage_totals(report: dict) -> Dict[Tuple[str, str], dict]:
+    """Sum the records of each (grid, stage); a stage may run more than once."""
+    totals = {}
+    for record in report["stages"]:
+        key = (record["grid"], record["stage"])
+        total = totals.setdefault(key, {"wall_s": 0.0, "cpu_s": 0.0})
+        total["wall_s"] += record["wall_s"]
+        total["cpu_s"] += record["cpu_s"]
+    return totals
+
+
+def compare_reports(
+    old: dict,
+    new: dict,
+    threshold: float = 1.5,
+    min_seconds: float = DEFAULT_MIN_SECONDS,
+) -> List[str]:
+    """
+    Stages of `new` whose wall time is more than `threshold` times that of
+    `old`. Stages shorter than `min_seconds` in both reports are ignored.
+    Returns one description line per slowdown.
+    """
+    old_totals = _stage_totals(old)
+    slow = []
+    for key, total in sorted(_stage_totals(new).items()):
+        if key not in old_totals:
+            continue
+        before, after = old_totals[key]["wall_s"], total["wall_s"]
+        if max(before, after) < min_seconds:
+            continue
+        if after > threshold * max(before, 1e-9):
+            grid, name = key
+            slow.append(
+                f"{grid}/{name}: {before:.2f}s -> {after:.2f}s "
+                f"({after / max(before, 1e-9):.1f}x)"
+            )
+    return slow
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        description="Compare two profile reports and list stages that got slower."
+    )
+    p.add_argument("old_report", help="Reference profile report")
+    p.add_argument("new_report", help="Newly generated profile report")
+    p.add_argument(
+        "--threshold",
+        type=float,
+        default=1.5,
+        help="Flag stages whose wall time grew by more than this factor",
+    )
+    p.add_argument(
+        "--min-seconds",
+        type=float,
+        default=DEFAULT_MIN_SECONDS,
+        help="Ignore stages shorter than this in both reports",
+    )
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    slow = compare_reports(
+        read_report(args.old_report),
+        read_report(args.new_report),
+        threshold=args.threshold,
+        min_seconds=args.min_seconds,
+    )
+    for line in slow:
+        print(f"SLOWER {line}")
+    if not slow:
+        print("No stage slowed down beyond the threshold")
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Run one independent pipeline per grid, either in-process or in a process pool.
+
+`run_task_graph` runs pipelines built as task graphs (see
+baseline_tools.taskgraph): in-process all grids share one graph, so one
+grid's downloads overlap with another's regridding; with a process pool each
+worker runs the graph of one grid.
+"""
+
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+from . import profiling
+from .taskgraph import DEFAULT_IO_JOBS, TaskGraph
+
+
+def _run_one(func: Callable, name: str, kwargs: dict, profile: bool = False):
+    """
+    Run ``func(name, **kwargs)`` and return ``(name, traceback or None,
+    stage records)``. Records are only gathered if `profile` is set.
+    """
+    if profile:
+        profiling.start(name)
+    try:
+        func(name, **kwargs)
+    except Exception:
+        return name, traceback.format_exc(), profiling.drain()
+    return name, None, profiling.drain()
+
+
+def run_per_grid(
+    func: Callable,
+    names: List[str],
+    jobs: int = 1,
+    profile: Optional[list] = None,
+    **kwargs,
+) -> Dict[str, Optional[str]]:
+    """
+    Call ``func(name, **kwargs)`` for every grid name.
+
+    With ``jobs > 1`` each call runs as a separate task in a process pool, so a
+    slow grid (bathymetry, forcing) does not hold up the others. A failure in
+    one grid is reported and does not stop the remaining grids.
+
+    If `profile` is a list, the stages of every grid are profiled and their
+    records (see baseline_tools.profiling) are appended to it.
+
+    Returns a mapping of grid name to the formatted traceback of its failure,
+    or ``None`` if the grid succeeded.
+    """
+    results = {}
+    if jobs <= 1 or len(names) <= 1:
+        for name in names:
+            name, error, records = _run_one(func, name, kwargs, profile is not None)
+            _report(name, error)
+            if profile is not None:
+                profile.extend(records)
+            results[name] = error
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(names))) as pool:
+            futures = {
+                pool.submit(_run_one, func, name, kwargs, profile is not None): name
+                for name in names
+            }
+            for future in as_completed(futures):
+                try:
+                    name, error, records = future.result()
+                except Exception:
+                    # The worker process itself died (e.g. killed for memory)
+                    name, error, records = futures[future], traceback.format_exc(), []
+                _report(name, error)
+                if profile is not None:
+                    profile.extend(records)
+                results[name] = error
+    return {name: results[name] for name in names}
+
+
+def _grid_errors(graph: TaskGraph, results: Dict[str, Optional[str]], grid: str):
+    """Tracebacks of the failed tasks of `grid`, or None if all succeeded."""
+    errors = [
+        f"{name}: {results[name]}"
+        for name, task in graph.tasks.items()
+        if task.grid == grid and results[name] is not None
+    ]
+    return "".join(errors) or None
+
+
+def _run_grid_graph(
+    name: str, add_tasks: Callable, cpu_jobs: int, io_jobs: int, **kwargs
+):
+    """Build and run the task graph of grid `name`, raising if a task failed."""
+    graph = TaskGraph()
+    add_tasks(graph, name, **kwargs)
+    error = _grid_errors(graph, graph.run(cpu_jobs, io_jobs), name)
+    if error is not None:
+        raise RuntimeError(error)
+
+
+def run_task_graph(
+    add_tasks: Callable,
+    names: List[str],
+    jobs: int = 1,
+    io_jobs: int = DEFAULT_IO_JOBS,
+    profile: Optional[list] = None,
+    **kwargs,
+) -> Dict[str, Optional[str]]:
+    """
+    Run the pipelines that ``add_tasks(graph, name, **kwargs)`` adds to a
+    TaskGraph, one per grid name, with each task tagged with its grid.
+
+    With ``jobs <= 1`` every grid's tasks go into one graph run in this
+    process: CPU-bound tasks one at a time, I/O-bound ones on `io_jobs`
+    threads. Otherwise each grid's graph runs in its own worker process
+    through run_per_grid. Returns the same mapping as run_per_grid.
+    """
+    if jobs > 1 and len(names) > 1:
+        return run_per_grid(
+            _run_grid_graph,
+            names,
+            jobs=jobs,
+            profile=profile,
+            add_tasks=add_tasks,
+            cpu_jobs=1,
+            io_jobs=io_jobs,
+            **kwargs,
+        )
+    graph = TaskGraph()
+    setup_errors = {}
+    for name in names:
+        try:
+            add_tasks(graph, name, **kwargs)
+        except Exception:
+            setup_errors[name] = traceback.format_exc()
+    if profile is not None:
+        profiling.start("")
+    task_results = graph.run(cpu_jobs=1, io_jobs=io_jobs)
+    if profile is not None:
+        profile.extend(profiling.drain())
+    results = {}
+    for name in names:
+        results[name] = setup_errors.get(name) or _grid_errors(graph, task_results, name)
+        _report(name, results[name])
+    return results
+
+
+def _report(name: str, error: Optional[str]):
+    if error is None:
+        print(f"[{name}] finished")
+    else:
+        print(f"[{name}] FAILED\n{error}")
+
+
+def print_summary(results: Dict[str, Optional[str]]) -> bool:
+    """Print a per-grid success/failure summary. Returns True if all succeeded."""
+    print("\n-- Summary --")
+    for name, error in results.items():
+        status = "ok" if error is None else "FAILED"
+        print(f"  {name}: {status}")
+    return all(error is None for error in results.values())
@@ -0,0 +1,98 @@
+"""
+Place files without copying their bytes where the filesystem allows it.
+
+Cache entries, raw GLORYS files and forcing files are often several GB, and
+the same bytes used to be copied into and out of the cache a few times per
+run. `link_or_copy` instead tries a hard link, then a reflink (a
+copy-on-write clone, e.g. on XFS or Btrfs), and only copies as a last
+resort. `promote` moves a file with a rename when it can.
+
+Every function writes to a temporary name next to the destination and
+renames it into place, so a crash never leaves a partial file under the
+final name and rerunning is always safe.
+
+Hard links share their bytes with the source, so a file that may be linked
+must never be rewritten in place: writers call `prepare_output` first, which
+removes the old file (and with it the link) before the new one is written.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+# ioctl request cloning a whole file on Linux (FICLONE from linux/fs.h)
+_FICLONE = 0x40049409
+
+
+def _tmp_path(dest: Path) -> Path:
+    return dest.with_name(f".{dest.name}.tmp{os.getpid()}")
+
+
+def _reflink(src: Path, dest: Path):
+    if fcntl is None:
+        raise OSError("reflinks are not supported on this platform")
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+    shutil.copystat(src, dest)
+
+
+def link_or_copy(src: Path, dest: Path, hardlink: bool = True) -> str:
+    """
+    Make `dest` a file with the contents of `src`, replacing any existing
+    `dest`. Tries a hard link (unless `hardlink` is False, for sources that
+    may later be rewritten in place), then a reflink, then a copy. Returns
+    the method used: "link", "reflink" or "copy".
+    """
+    src, dest = Path(src), Path(dest)
+    tmp = _tmp_path(dest)
+    tmp.unlink(missing_ok=True)
+    method = None
+    if hardlink:
+        try:
+            os.link(src, tmp)
+            method = "link"
+        except OSError:
+            pass
+    if method is None:
+        try:
+            _reflink(src, tmp)
+            method = "reflink"
+        except OSError:
+            tmp.unlink(missing_ok=True)
+    if method is None:
+        shutil.copy2(src, tmp)
+        method = "copy"
+    os.replace(tmp, dest)
+    return method
+
+
+def promote(src: Path, dest: Path) -> str:
+    """
+    Move `src` to `dest`, e.g. from a scratch directory into the cache. A
+    rename on the same filesystem, else link_or_copy and remove `src`.
+    Returns the method used: "rename", "link", "reflink" or "copy".
+    """
+    src, dest = Path(src), Path(dest)
+    try:
+        os.replace(src, dest)
+        return "rename"
+    except OSError:
+        pass
+    method = link_or_copy(src, dest)
+    src.unlink()
+    return method
+
+
+def prepare_output(path: Path) -> Path:
+    """
+    Remove an existing file at `path` before it is rewritten, so the write
+    creates a new file instead of changing one that may be linked elsewhere.
+    """
+    path = Path(path)
+    path.unlink(missing_ok=True)
+    return path
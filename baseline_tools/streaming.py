@@ -0,0 +1,113 @@
+"""
+Process forcing files in time chunks, so memory does not grow with the date
+range.
+
+A raw boundary file is cut into chunks of consecutive time steps, sized so a
+chunk's working set stays under a memory ceiling. Each chunk is processed on
+its own and its records are appended to the output file along the unlimited
+time dimension. Output values are the same as processing the whole file as
+long as each step only depends on its own time step, which holds for the
+regional_mom6 boundary regridding when the source's land mask does not change
+in time (as for GLORYS).
+
+The netCDF library is not thread-safe, so the direct netCDF4 calls here hold
+xarray's HDF5 lock, as xarray's own reads and writes do.
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_MEMORY_MB = 2048
+# Working set of processing a chunk as a multiple of its raw size, for the
+# float64 copies, regridded fields and filled copies made along the way
+WORKING_SET_FACTOR = 8
+
+
+def time_length(path: Path, time_dim: str = "time") -> int:
+    """Number of time steps in the NetCDF file at `path`."""
+    import netCDF4
+    from xarray.backends.locks import HDF5_LOCK
+
+    with HDF5_LOCK, netCDF4.Dataset(path) as ds:
+        return len(ds.dimensions[time_dim])
+
+
+def time_chunk_length(
+    path: Path,
+    memory_mb: float = DEFAULT_MEMORY_MB,
+    time_dim: str = "time",
+    factor: float = WORKING_SET_FACTOR,
+) -> int:
+    """
+    Number of time steps of the NetCDF file at `path` that can be processed
+    at once within `memory_mb`, estimated as `factor` times the bytes per
+    time step of its time-dependent variables. At least 1.
+    """
+    import netCDF4
+    from xarray.backends.locks import HDF5_LOCK
+
+    with HDF5_LOCK, netCDF4.Dataset(path) as ds:
+        n_times = len(ds.dimensions[time_dim])
+        step_bytes = 0
+        for var in ds.variables.values():
+            if time_dim in var.dimensions:
+                step_bytes += var.dtype.itemsize * int(np.prod(var.shape)) // max(
+                    n_times, 1
+                )
+    limit = int(memory_mb * 2**20 // max(step_bytes * factor, 1))
+    return max(1, min(n_times, limit))
+
+
+def write_time_slice(
+    src: Path, dest: Path, start: int, stop: int, time_dim: str = "time"
+) -> Path:
+    """Write time steps [start, stop) of `src` to the new file `dest`, values as stored."""
+    import xarray as xr
+
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with xr.open_dataset(src, decode_cf=False, cache=False) as ds:
+        ds.isel({time_dim: slice(start, stop)}).to_netcdf(
+            dest, unlimited_dims=[time_dim]
+        )
+    return dest
+
+
+def append_time_chunk(
+    dest: Path, chunk: Path, time_offset: float = 0.0, time_dim: str = "time"
+):
+    """
+    Append the records of the NetCDF file `chunk` to `dest` along its
+    unlimited `time_dim`, adding `time_offset` to the time values. If `dest`
+    does not exist yet, `chunk` is moved there. `chunk` is consumed.
+    """
+    import netCDF4
+    from xarray.backends.locks import HDF5_LOCK
+
+    dest, chunk = Path(dest), Path(chunk)
+    if not dest.exists():
+        if time_offset:
+            with HDF5_LOCK, netCDF4.Dataset(chunk, "a") as src:
+                time = src.variables[time_dim]
+                time.set_auto_maskandscale(False)
+                time[:] = time[:] + time_offset
+        os.replace(chunk, dest)
+        return
+    with HDF5_LOCK, netCDF4.Dataset(chunk) as src, netCDF4.Dataset(dest, "a") as out:
+        start = len(out.dimensions[time_dim])
+        count = len(src.dimensions[time_dim])
+        for name, var in src.variables.items():
+            if time_dim not in var.dimensions:
+                continue
+            var.set_auto_maskandscale(False)
+            out_var = out.variables[name]
+            out_var.set_auto_maskandscale(False)
+            values = var[:]
+            if name == time_dim:
+                values = values + time_offset
+            index = [slice(None)] * var.ndim
+            index[var.dimensions.index(time_dim)] = slice(start, start + count)
+            out_var[tuple(index)] = values
+    chunk.unlink()
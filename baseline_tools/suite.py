@@ -0,0 +1,126 @@
+"""
+The suite of baseline cases, read from a TOML manifest shared by every
+backend (``baseline_cases.toml`` at the repository root).
+
+Loading the manifest only parses it: grids, experiments and their input
+directories are created by the generators for the selected cases alone.
+"""
+
+import fnmatch
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
+
+DEFAULT_MANIFEST = Path(__file__).resolve().parents[1] / "baseline_cases.toml"
+
+_CASE_KEYS = {"description", "resolution", "lon_extent", "lat_extent", "global", "backends"}
+# Backends a case's sub-tables and `backends` list may name, as in
+# baseline_tools.backends.BACKEND_SCRIPTS
+KNOWN_BACKENDS = ("CrocoDash", "regional_mom6")
+
+
+@dataclass(frozen=True)
+class BaselineCase:
+    name: str
+    resolution: float
+    lat_extent: Tuple[float, float]
+    # None for a global case, which spans every longitude
+    lon_extent: Optional[Tuple[float, float]] = None
+    is_global: bool = False
+    description: str = ""
+
+
+def _parse_case(name: str, table: dict, backend: Optional[str]) -> BaselineCase:
+    fields = {k: v for k, v in table.items() if not isinstance(v, dict)}
+    tables = {k for k, v in table.items() if isinstance(v, dict)}
+    listed = fields.get("backends", ())
+    for kind, names in (("backend tables", tables), ("backends", listed)):
+        unknown = set(names) - set(KNOWN_BACKENDS)
+        if unknown:
+            raise ValueError(
+                f"Case {name!r} has unknown {kind}: {sorted(unknown)}; "
+                f"known backends: {', '.join(KNOWN_BACKENDS)}"
+            )
+    if backend is not None:
+        fields.update(table.get(backend, {}))
+    unknown = set(fields) - _CASE_KEYS
+    if unknown:
+        raise ValueError(f"Case {name!r} has unknown keys: {sorted(unknown)}")
+    lon_extent = fields.get("lon_extent")
+    return BaselineCase(
+        name=name,
+        resolution=fields["resolution"],
+        lat_extent=tuple(fields["lat_extent"]),
+        lon_extent=tuple(lon_extent) if lon_extent is not None else None,
+        is_global=fields.get("global", False),
+        description=fields.get("description", ""),
+    )
+
+
+def load_cases(
+    backend: Optional[str] = None, path: Path = DEFAULT_MANIFEST
+) -> Dict[str, BaselineCase]:
+    """
+    Cases of the manifest at `path`, in file order. With `backend`, only the
+    cases available to that backend are returned, with its overrides applied.
+    """
+    with open(path, "rb") as f:
+        manifest = tomllib.load(f)
+    cases = {}
+    for name, table in manifest.get("cases", {}).items():
+        # Parsed even if skipped, so a typo fails for every backend
+        case = _parse_case(name, table, backend)
+        backends = table.get("backends")
+        if backend is not None and backends is not None and backend not in backends:
+            continue
+        cases[name] = case
+    return cases
+
+
+def select_cases(
+    cases: Dict[str, BaselineCase],
+    only: Optional[Sequence[str]] = None,
+    match: Optional[Sequence[str]] = None,
+    with_global: bool = False,
+) -> List[str]:
+    """
+    Names of the selected cases, in manifest order. `only` names cases
+    exactly, `match` selects by glob pattern, and with neither every case is
+    selected. Global cases are left out unless named in `only` or
+    `with_global` is set.
+    """
+    unknown = sorted(set(only or ()) - set(cases))
+    if unknown:
+        raise SystemExit(
+            f"Unknown case(s) {', '.join(unknown)}; available: {', '.join(cases)}"
+        )
+    names = []
+    for name, case in cases.items():
+        named = only is not None and name in only
+        matched = match is not None and any(fnmatch.fnmatch(name, p) for p in match)
+        if only is None and match is None:
+            matched = True
+        if named or (matched and (with_global or not case.is_global)):
+            names.append(name)
+    return names
+
+
+def add_selection_args(p):
+    """Add the --only / --match case selection options to an argparse parser."""
+    p.add_argument(
+        "--only",
+        action="append",
+        metavar="NAME",
+        help="Only build this case (repeatable).",
+    )
+    p.add_argument(
+        "--match",
+        action="append",
+        metavar="PATTERN",
+        help="Only build cases whose name matches this glob pattern (repeatable).",
+    )
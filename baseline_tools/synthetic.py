@@ -0,0 +1,259 @@
+"""
+Deterministic synthetic stand-ins for the GEBCO and GLORYS source datasets.
+
+The fields are smooth analytic functions of longitude and latitude (a basin
+with a continental shelf, a few seamounts and some land), so the same extent
+always produces the same file and the bathymetry and ocean state agree on
+where the land is. They are meant for timing and offline runs, not science.
+
+Files have the resolution of the real datasets (15 arc-second GEBCO, 1/12
+degree and 50 level GLORYS) so the pipeline does a realistic amount of work.
+Bathymetry is computed and written in row blocks, so even a global band only
+holds one block in memory.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .blocks import DEFAULT_BLOCK_BYTES, iter_blocks
+from .cache import spec_key, touch
+
+# Bump when the synthetic fields change, so cached artifacts built from them
+# are invalidated
+SYNTHETIC_VERSION = 1
+
+GEBCO_RESOLUTION = 1 / 240  # 15 arc-seconds, in degrees
+GLORYS_RESOLUTION = 1 / 12  # in degrees
+DEFAULT_PAD = 1.0  # degrees added on every side of the requested extent
+GLORYS_BUFFER = 0.24  # degrees, the padding regional_mom6 adds to GLORYS downloads
+BOUNDARIES = ("south", "north", "west", "east")
+
+
+def elevation(lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    """Synthetic elevation in meters (negative below sea level), broadcast over lon/lat."""
+    lon_r, lat_r = np.deg2rad(lon), np.deg2rad(lat)
+    basin = -4000.0 + 1500.0 * np.sin(3 * lon_r) * np.cos(2 * lat_r)
+    ridges = 800.0 * np.sin(37 * lon_r + 23 * lat_r) * np.cos(29 * lat_r)
+    # Islands and their shelves where this is close to 1
+    coast = np.sin(53 * lon_r + 19 * lat_r) * np.cos(41 * lat_r - 13 * lon_r)
+    shelf = 4600.0 * np.clip(coast - 0.4, 0.0, None) / 0.6
+    return basin + ridges + shelf
+
+
+def _axis(start: float, stop: float, resolution: float) -> np.ndarray:
+    """Cell centres covering [start, stop] at `resolution`."""
+    n = max(1, int(np.ceil((stop - start) / resolution - 1e-9)))
+    return start + (np.arange(n) + 0.5) * resolution
+
+
+def synthetic_bathymetry(
+    path: Path,
+    lon_extent: Sequence[float],
+    lat_extent: Sequence[float],
+    resolution: float = GEBCO_RESOLUTION,
+    pad: float = DEFAULT_PAD,
+    block_bytes: int = DEFAULT_BLOCK_BYTES,
+) -> Path:
+    """
+    Write a GEBCO-like file (lon, lat, int16 elevation) covering the padded
+    extent, computing at most `block_bytes` of elevation at a time.
+    """
+    import netCDF4
+    from xarray.backends.locks import HDF5_LOCK
+
+    lon = _axis(lon_extent[0] - pad, lon_extent[1] + pad, resolution)
+    lat = _axis(max(lat_extent[0] - pad, -90), min(lat_extent[1] + pad, 90), resolution)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    # The netCDF library is not thread-safe: hold xarray's lock, as xarray does
+    with HDF5_LOCK, netCDF4.Dataset(tmp, "w", format="NETCDF4") as ds:
+        ds.createDimension("lat", len(lat))
+        ds.createDimension("lon", len(lon))
+        ds.createVariable("lat", "f8", ("lat",))[:] = lat
+        ds["lat"].units = "degrees_north"
+        ds.createVariable("lon", "f8", ("lon",))[:] = lon
+        ds["lon"].units = "degrees_east"
+        var = ds.createVariable(
+            "elevation",
+            "i2",
+            ("lat", "lon"),
+            chunksizes=(min(len(lat), 1024), min(len(lon), 1024)),
+        )
+        var.setncatts({"units": "m", "long_name": "Elevation relative to sea level"})
+        for block in iter_blocks((len(lat), len(lon)), 8, block_bytes):
+            values = elevation(lon[np.newaxis, block[1]], lat[block[0], np.newaxis])
+            var[block] = np.round(values).astype(np.int16)
+    os.replace(tmp, path)
+    return path
+
+
+def _cached(cache_dir: Path, kind: str, *parts) -> Tuple[Path, bool]:
+    """Path of a cached synthetic file, and whether it already exists."""
+    key = spec_key(kind, SYNTHETIC_VERSION, *parts)
+    path = Path(cache_dir) / "synthetic" / f"{kind}_{key}.nc"
+    exists = path.exists()
+    if exists:
+        touch(path)
+    return path, exists
+
+
+def synthetic_bathymetry_window(
+    cache_dir: Path,
+    lon_extent: Sequence[float],
+    lat_extent: Sequence[float],
+    pad: float = DEFAULT_PAD,
+) -> Path:
+    """
+    Stand-in for baseline_tools.bathy.bathymetry_window: the path of a
+    synthetic GEBCO-like window around the extents, cached in
+    cache_dir/synthetic.
+    """
+    path, exists = _cached(cache_dir, "gebco", list(lon_extent), list(lat_extent), pad)
+    if exists:
+        print(f"  Using cached synthetic bathymetry {path}")
+        return path
+    print(f"  Writing synthetic bathymetry {path}")
+    return synthetic_bathymetry(path, lon_extent, lat_extent, pad=pad)
+
+
+def glorys_depths(n: int = 50) -> np.ndarray:
+    """Depth levels spaced like GLORYS's 50 levels, 0.5 m to 5728 m."""
+    return np.round(np.geomspace(0.494, 5727.917, n), 3)
+
+
+def synthetic_glorys(
+    path: Path,
+    lon_extent: Sequence[float],
+    lat_extent: Sequence[float],
+    date_range: Sequence[str],
+    resolution: float = GLORYS_RESOLUTION,
+    pad: float = GLORYS_BUFFER,
+    n_depths: int = 50,
+) -> Path:
+    """
+    Write a GLORYS-like daily ocean state (zos, uo, vo, so, thetao) covering
+    the padded extent and every day of date_range. Points below the synthetic
+    sea floor or on land are NaN, as in GLORYS.
+    """
+    import pandas as pd
+    import xarray as xr
+
+    lon = _axis(lon_extent[0] - pad, lon_extent[1] + pad, resolution)
+    lat = _axis(lat_extent[0] - pad, lat_extent[1] + pad, resolution)
+    depth = glorys_depths(n_depths)
+    time = pd.date_range(date_range[0], date_range[1], freq="D")
+
+    lon2, lat2 = np.meshgrid(lon, lat)
+    bottom = -elevation(lon2, lat2)
+    wet = depth[:, np.newaxis, np.newaxis] < bottom[np.newaxis]
+    day = np.arange(len(time), dtype=np.float32)[:, np.newaxis, np.newaxis, np.newaxis]
+    z = (depth / depth[-1]).astype(np.float32)[np.newaxis, :, np.newaxis, np.newaxis]
+    lat_r = np.deg2rad(lat2).astype(np.float32)[np.newaxis, np.newaxis]
+    lon_r = np.deg2rad(lon2).astype(np.float32)[np.newaxis, np.newaxis]
+
+    def masked(values):
+        return np.where(wet[np.newaxis], values, np.nan).astype(np.float32)
+
+    dims3 = ("time", "latitude", "longitude")
+    dims4 = ("time", "depth", "latitude", "longitude")
+    ds = xr.Dataset(
+        {
+            "thetao": (
+                dims4,
+                masked(2 + 24 * np.cos(lat_r) * np.exp(-4 * z) + 0.1 * day),
+                {"units": "degrees_C"},
+            ),
+            "so": (
+                dims4,
+                masked(34.5 + 0.8 * np.sin(3 * lon_r) * (1 - z) + 0.01 * day),
+                {"units": "1e-3"},
+            ),
+            "uo": (
+                dims4,
+                masked(0.3 * np.sin(8 * lat_r + 0.2 * day) * np.exp(-2 * z)),
+                {"units": "m s-1"},
+            ),
+            "vo": (
+                dims4,
+                masked(0.3 * np.cos(8 * lon_r + 0.2 * day) * np.exp(-2 * z)),
+                {"units": "m s-1"},
+            ),
+            "zos": (
+                dims3,
+                np.where(
+                    bottom > 0,
+                    0.5 * np.sin(4 * lon_r[0] + 3 * lat_r[0] + 0.1 * day[:, 0]),
+                    np.nan,
+                ).astype(np.float32),
+                {"units": "m"},
+            ),
+        },
+        coords={
+            "time": time,
+            "depth": ("depth", depth.astype(np.float32), {"units": "m", "positive": "down"}),
+            "latitude": ("latitude", lat.astype(np.float32), {"units": "degrees_north"}),
+            "longitude": ("longitude", lon.astype(np.float32), {"units": "degrees_east"}),
+        },
+    )
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    ds.to_netcdf(tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def segment_extents(
+    lon_extent: Sequence[float],
+    lat_extent: Sequence[float],
+    boundaries: Sequence[str] = BOUNDARIES,
+) -> Dict[str, tuple]:
+    """
+    (lon_extent, lat_extent) of the initial condition ("ic") and of each
+    boundary, which is the line along that edge of the domain, as
+    regional_mom6's get_glorys requests them.
+    """
+    west, east = lon_extent
+    south, north = lat_extent
+    edges = {
+        "south": ([west, east], [south, south]),
+        "north": ([west, east], [north, north]),
+        "west": ([west, west], [south, north]),
+        "east": ([east, east], [south, north]),
+    }
+    return {"ic": (list(lon_extent), list(lat_extent)), **{b: edges[b] for b in boundaries}}
+
+
+def synthetic_raw_forcing(
+    outdir: Path,
+    lon_extent: Sequence[float],
+    lat_extent: Sequence[float],
+    date_range: Sequence,
+    boundaries: Sequence[str] = BOUNDARIES,
+    filenames: Optional[Dict[str, str]] = None,
+) -> Dict[str, Path]:
+    """
+    Write GLORYS-like raw files for the initial condition and each boundary
+    into outdir, named ``{segment}_unprocessed.nc`` unless `filenames` maps a
+    segment to another name. The initial condition covers the first day of
+    date_range, the boundaries all of it. Existing files are kept, since the
+    output is deterministic. Returns the path of each segment.
+    """
+    import pandas as pd
+
+    start = pd.Timestamp(date_range[0])
+    end = pd.Timestamp(date_range[-1])
+    paths = {}
+    for segment, (lons, lats) in segment_extents(lon_extent, lat_extent, boundaries).items():
+        filename = (filenames or {}).get(segment, f"{segment}_unprocessed.nc")
+        path = Path(outdir) / filename
+        if not path.exists():
+            print(f"  Writing synthetic raw data {path}")
+            days = (start, start + pd.Timedelta(days=1)) if segment == "ic" else (start, end)
+            synthetic_glorys(path, lons, lats, days)
+        paths[segment] = path
+    return paths
@@ -0,0 +1,148 @@
+"""
+Run a pipeline as a graph of tasks, so only true dependencies serialize.
+
+A generator adds one task per step of each grid (hgrid, vgrid, bathy, raw
+data fetch, forcing, ...) with the tasks it depends on. Tasks communicate
+through the closures that build them, so they share the process and its
+objects (Grid, Topo, Case). Two thread pools run ready tasks: CPU-bound tasks
+on `cpu_jobs` threads and I/O-bound tasks (downloads) on `io_jobs` threads,
+so a raw data fetch proceeds while another grid's bathymetry is regridded.
+
+A failed task fails every task that depends on it; independent tasks keep
+running. Tasks added with `always` run once their deps are done, failed or
+not, e.g. to wait for a grid's background writes (baseline_tools.writer).
+An interrupt (Ctrl-C, SystemExit) is not a task failure: it stops the run.
+Graphs are run by baseline_tools.scheduler.run_task_graph.
+
+Several backends can add their cases to one graph through `scoped` views,
+which prefix task and grid names with the backend's name.
+"""
+
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from . import profiling
+
+DEFAULT_IO_JOBS = 4
+
+
+@dataclass
+class Task:
+    name: str
+    func: Callable[[], None]
+    deps: Tuple[str, ...] = ()
+    # Run on the I/O pool instead of the CPU pool
+    io: bool = False
+    # Grid the task belongs to, for profiling and per-grid results
+    grid: str = ""
+    # Run even if a dependency failed
+    always: bool = False
+
+
+class TaskGraph:
+    def __init__(self):
+        self.tasks: Dict[str, Task] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[], None],
+        deps: Iterable[Optional[str]] = (),
+        io: bool = False,
+        grid: str = "",
+        always: bool = False,
+    ) -> str:
+        """
+        Add a task running `func()` once every task named in `deps` has
+        succeeded, or with `always` once they have all finished. None entries
+        of `deps` are ignored, so optional steps can be passed as is. Returns
+        `name`, for use in later tasks' deps.
+        """
+        if name in self.tasks:
+            raise ValueError(f"Duplicate task {name}")
+        deps = tuple(dep for dep in deps if dep is not None)
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"Task {name} depends on unknown task {dep}")
+        self.tasks[name] = Task(name, func, deps, io, grid, always)
+        return name
+
+    def scoped(self, scope: str) -> "ScopedGraph":
+        """View of this graph adding tasks under ``scope/``, see ScopedGraph."""
+        return ScopedGraph(self, scope)
+
+    def _run_task(self, task: Task) -> Optional[str]:
+        try:
+            with profiling.grid(task.grid):
+                task.func()
+        except Exception:
+            return traceback.format_exc()
+        return None
+
+    def run(
+        self, cpu_jobs: int = 1, io_jobs: int = DEFAULT_IO_JOBS
+    ) -> Dict[str, Optional[str]]:
+        """
+        Run every task. Returns a mapping of task name to the formatted
+        traceback of its failure (or a note naming the failed dependency), or
+        None if it succeeded. Tasks are added in dependency order, so the
+        graph is acyclic by construction.
+        """
+        results: Dict[str, Optional[str]] = {}
+        pending = dict(self.tasks)
+        running = {}
+        with ThreadPoolExecutor(max(1, cpu_jobs)) as cpu_pool, ThreadPoolExecutor(
+            max(1, io_jobs)
+        ) as io_pool:
+            while pending or running:
+                for name, task in list(pending.items()):
+                    failed = [dep for dep in task.deps if results.get(dep) is not None]
+                    if failed and not task.always:
+                        results[name] = f"Skipped because {failed[0]} failed\n"
+                        del pending[name]
+                    elif all(dep in results for dep in task.deps):
+                        pool = io_pool if task.io else cpu_pool
+                        running[pool.submit(self._run_task, task)] = name
+                        del pending[name]
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        return {name: results[name] for name in self.tasks}
+
+
+class ScopedGraph:
+    """
+    View of a TaskGraph whose task names, deps and grids are all prefixed
+    with ``scope/``. Names returned by `add` are the unprefixed ones, so
+    pipelines written for a plain TaskGraph work unchanged.
+    """
+
+    def __init__(self, graph: TaskGraph, scope: str):
+        self.graph = graph
+        self.scope = scope
+
+    def _scoped(self, name: str) -> str:
+        return f"{self.scope}/{name}"
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[], None],
+        deps: Iterable[Optional[str]] = (),
+        io: bool = False,
+        grid: str = "",
+        always: bool = False,
+    ) -> str:
+        self.graph.add(
+            self._scoped(name),
+            func,
+            [self._scoped(dep) for dep in deps if dep is not None],
+            io,
+            self._scoped(grid) if grid else grid,
+            always,
+        )
+        return name
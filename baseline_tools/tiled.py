@@ -0,0 +1,171 @@
+"""
+Build very large grids (and their topography) in latitude bands.
+
+A global 0.05 degree supergrid does not fit comfortably in memory, and
+building it in one go hangs in dask. An even-spacing lat/lon grid is
+separable in latitude, so it can instead be built band by band with the
+backend's own constructors. Each band's file is appended to a single NetCDF
+store, and memory use is bounded by one band.
+
+Band files are merged along their latitude dimensions, named by the caller
+(e.g. nyp and ny for a MOM6 supergrid), which must be the leading axis of
+every variable using them. Node dimensions (size rows + 1) share their edge
+row with the previous band, so that row is only written once.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, List, Tuple
+
+import numpy as np
+
+from .blocks import DEFAULT_BLOCK_BYTES, iter_blocks
+
+if TYPE_CHECKING:
+    import xarray as xr
+
+DEFAULT_BAND_HEIGHT = 10.0  # degrees of latitude per band
+
+
+def latitude_bands(
+    ystart: float, leny: float, resolution: float, band_height: float = DEFAULT_BAND_HEIGHT
+) -> List[Tuple[float, float, int]]:
+    """
+    Split [ystart, ystart + leny] into bands that are whole multiples of
+    `resolution`. Returns (band ystart, band leny, band cell rows) tuples.
+    """
+    total = int(round(leny / resolution))
+    per_band = max(1, int(round(band_height / resolution)))
+    bands = []
+    for first in range(0, total, per_band):
+        rows = min(per_band, total - first)
+        bands.append(
+            (round(ystart + first * resolution, 10), round(rows * resolution, 10), rows)
+        )
+    return bands
+
+
+class BandedNetCDFWriter:
+    """
+    Append band files to one NetCDF file along their latitude dimensions
+    `stacked_dims`. Variables without them are written from the first band.
+
+    Use as a context manager; the output is written to a temporary file and
+    renamed into place only when every band has been appended. Every call to
+    the output file holds xarray's HDF5 lock, as xarray's own reads and
+    writes do, since the netCDF library is not thread-safe.
+    """
+
+    def __init__(self, path: Path, stacked_dims: Iterable[str]):
+        self.path = Path(path)
+        self.stacked_dims = set(stacked_dims)
+        self.node_dims = set()
+        self.offsets = {}
+        self._tmp = self.path.with_name(f"{self.path.name}.tmp{os.getpid()}")
+        self._out = None
+
+    def __enter__(self):
+        import netCDF4
+        from xarray.backends.locks import HDF5_LOCK
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with HDF5_LOCK:
+            self._out = netCDF4.Dataset(self._tmp, "w", format="NETCDF4")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        from xarray.backends.locks import HDF5_LOCK
+
+        with HDF5_LOCK:
+            self._out.close()
+        if exc_type is None:
+            os.replace(self._tmp, self.path)
+        else:
+            self._tmp.unlink(missing_ok=True)
+        return False
+
+    def _create(self, band: "xr.Dataset", rows: int):
+        missing = self.stacked_dims - set(band.sizes)
+        if missing:
+            raise ValueError(f"Band has no latitude dimension(s) {sorted(missing)}")
+        for name, var in band.variables.items():
+            if any(dim in self.stacked_dims for dim in var.dims[1:]):
+                raise ValueError(
+                    f"Variable {name} {var.dims}: latitude dimensions "
+                    f"{sorted(self.stacked_dims)} must be its leading axis"
+                )
+        self.node_dims = {d for d in self.stacked_dims if band.sizes[d] == rows + 1}
+        for dim, size in band.sizes.items():
+            self._out.createDimension(dim, None if dim in self.stacked_dims else size)
+            self.offsets[dim] = 0
+        for name, var in band.variables.items():
+            attrs = dict(var.attrs)
+            fill_value = attrs.pop("_FillValue", None)
+            chunks = None
+            if var.ndim:
+                chunks = [min(n, 1024) for n in var.shape]
+            created = self._out.createVariable(
+                name, var.dtype, var.dims, fill_value=fill_value, chunksizes=chunks
+            )
+            created.setncatts(attrs)
+        self._out.setncatts(dict(band.attrs))
+
+    def append(self, band_path: Path, rows: int):
+        """Append one band file. `rows` is the band's cell count in latitude."""
+        import xarray as xr
+        from xarray.backends.locks import HDF5_LOCK
+
+        with xr.open_dataset(band_path, decode_cf=False, cache=False) as band:
+            with HDF5_LOCK:
+                first = self._out is not None and not self._out.dimensions
+                if first:
+                    self._create(band, rows)
+            for name, var in band.variables.items():
+                if not var.ndim or var.dims[0] not in self.stacked_dims:
+                    if first:
+                        values = var.values
+                        with HDF5_LOCK:
+                            self._out[name][...] = values
+                    continue
+                dim = var.dims[0]
+                skip = 1 if (dim in self.node_dims and not first) else 0
+                offset = self.offsets[dim]
+                itemsize = max(var.dtype.itemsize, 1)
+                for block in iter_blocks(var.shape, itemsize, DEFAULT_BLOCK_BYTES):
+                    start = max(block[0].start, skip)
+                    stop = block[0].stop
+                    if stop <= start:
+                        continue
+                    dest = (slice(offset + start - skip, offset + stop - skip),) + block[1:]
+                    source = (slice(start, stop),) + block[1:]
+                    # Read through xarray, which takes the lock itself
+                    values = np.asarray(var[source].values)
+                    with HDF5_LOCK:
+                        self._out[name][dest] = values
+            for dim in self.stacked_dims:
+                skip = 1 if (dim in self.node_dims and not first) else 0
+                self.offsets[dim] += band.sizes[dim] - skip
+
+
+def build_banded(
+    path: Path,
+    bands: List[Tuple[float, float, int]],
+    write_band: Callable[[float, float, Path], None],
+    stacked_dims: Iterable[str],
+    rows_per_cell: int = 1,
+):
+    """
+    Build the file at `path` band by band. `write_band(ystart, leny, band_path)`
+    writes one band to band_path, to be appended along its latitude dimensions
+    `stacked_dims`; `rows_per_cell` is the number of file rows per grid cell
+    (2 for a supergrid, 1 for a topo).
+    """
+    with tempfile.TemporaryDirectory(dir=Path(path).parent) as tmp:
+        with BandedNetCDFWriter(path, stacked_dims) as writer:
+            for i, (ystart, leny, rows) in enumerate(bands):
+                band_path = Path(tmp) / f"band_{i}.nc"
+                print(f"  Band {i + 1}/{len(bands)}: lat {ystart} to {ystart + leny}")
+                write_band(ystart, leny, band_path)
+                writer.append(band_path, rows * rows_per_cell)
+                band_path.unlink()
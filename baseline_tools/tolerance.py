@@ -0,0 +1,91 @@
+"""
+Per-variable tolerance rules for comparing baselines.
+
+A rule gives any of a relative tolerance, an absolute tolerance, a maximum
+distance in units in the last place (ULP) and a period for cyclic variables
+such as longitudes, which are compared modulo the period so 0 and 360 match.
+A value matches if it is within ``atol + rtol * |new|`` of the reference or,
+if `max_ulp` is set, within `max_ulp` ULPs of it. For a cyclic variable the
+ULPs are counted once the value is moved by whole periods next to the
+reference, so 360.0 is 0 ULPs from 0.0. NaNs and infinities are outside any
+tolerance: they only match an equal value (a NaN matches a NaN).
+
+Rules are keyed by variable name glob; the first matching rule wins and its
+unset fields fall back to the command line defaults. Extra rules are read
+from a TOML file with one table per glob:
+
+    ["angle_*"]
+    atol = 1e-12
+
+    [x]
+    period = 360.0
+    max_ulp = 4
+"""
+
+import fnmatch
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
+
+
+@dataclass(frozen=True)
+class Tolerance:
+    rtol: Optional[float] = None
+    atol: Optional[float] = None
+    max_ulp: Optional[int] = None
+    # Period of a cyclic variable, whose values are compared modulo it
+    period: Optional[float] = None
+
+
+DEFAULT_TOLERANCE = Tolerance(rtol=1e-12, atol=0.0)
+
+# Rules applied unless overridden
+DEFAULT_RULES: Dict[str, Tolerance] = {
+    # Supergrid and source longitudes, which may wrap at the 0/360 seam
+    "x": Tolerance(period=360.0),
+    "lon": Tolerance(period=360.0),
+    "longitude": Tolerance(period=360.0),
+    "geolon*": Tolerance(period=360.0),
+    # Rotation angles are near 0 on most grids, where rtol alone is meaningless
+    "angle_dx": Tolerance(atol=1e-12),
+    # Masks must match exactly
+    "mask": Tolerance(rtol=0.0, atol=0.0),
+}
+
+
+def load_rules(path: Path) -> Dict[str, Tolerance]:
+    """Read tolerance rules from a TOML file, see the module docstring."""
+    with open(path, "rb") as f:
+        tables = tomllib.load(f)
+    known = {f.name for f in fields(Tolerance)}
+    rules = {}
+    for pattern, table in tables.items():
+        unknown = set(table) - known
+        if unknown:
+            raise ValueError(
+                f"Unknown tolerance fields for {pattern!r} in {path}: {sorted(unknown)}"
+            )
+        rules[pattern] = Tolerance(**table)
+    return rules
+
+
+def tolerance_for(
+    name: str,
+    rules: Optional[Dict[str, Tolerance]] = None,
+    default: Tolerance = DEFAULT_TOLERANCE,
+) -> Tolerance:
+    """Tolerance of variable `name`: the first rule matching it, completed by `default`."""
+    for pattern, rule in (DEFAULT_RULES if rules is None else rules).items():
+        if fnmatch.fnmatchcase(name, pattern):
+            overrides = {
+                f.name: getattr(rule, f.name)
+                for f in fields(Tolerance)
+                if getattr(rule, f.name) is not None
+            }
+            return replace(default, **overrides)
+    return default
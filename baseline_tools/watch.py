@@ -0,0 +1,90 @@
+"""
+Change detection for the driver's --watch mode (see baseline_tools.driver).
+
+A FileWatcher polls the modification time and size of a set of files, and
+of the Python files under a set of directories. Polling needs no extra
+dependency and works on network file systems, where inotify events are
+not delivered for changes made from other hosts.
+
+`reload_modules` reloads the already imported library modules loaded from
+changed files, so a long-running process picks up an edit to, say, the
+grid code of mom6_bathy without re-importing everything else.
+"""
+
+import importlib
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from .lazy import LazyNames
+
+DEFAULT_INTERVAL = 1.0  # seconds between polls
+
+
+class FileWatcher:
+    def __init__(self, paths: Iterable[Path], pattern: str = "*.py"):
+        self.paths = [Path(p).resolve() for p in paths]
+        self.pattern = pattern
+        self._state = self._snapshot()
+
+    def _snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        files = []
+        for path in self.paths:
+            files += sorted(path.rglob(self.pattern)) if path.is_dir() else [path]
+        state = {}
+        for file in files:
+            try:
+                st = file.stat()
+            except OSError:
+                continue
+            state[file] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def changes(self) -> List[Path]:
+        """Files changed, created or removed since the previous call."""
+        state = self._snapshot()
+        changed = sorted(
+            path
+            for path in set(state) | set(self._state)
+            if state.get(path) != self._state.get(path)
+        )
+        self._state = state
+        return changed
+
+    def wait(self, interval: float = DEFAULT_INTERVAL) -> List[Path]:
+        """
+        Block until files change, then until they stop changing for one
+        `interval` (editors often write a file in several steps), and return
+        every file changed meanwhile.
+        """
+        changed = set()
+        while True:
+            time.sleep(interval)
+            new = self.changes()
+            if not new and changed:
+                return sorted(changed)
+            changed.update(new)
+
+
+def reload_modules(paths: Iterable[Path], keep: Iterable[Path] = ()) -> List[str]:
+    """
+    Reload every imported module loaded from one of `paths`, except those
+    under a directory of `keep`, and make LazyNames look their names up
+    again. Modules that imported names from a reloaded module keep the old
+    objects. Returns the names of the reloaded modules.
+    """
+    paths = {Path(p).resolve() for p in paths}
+    keep = [Path(p).resolve() for p in keep]
+    names = []
+    for name, module in sorted(sys.modules.items()):
+        file = getattr(module, "__file__", None)
+        if file is None:
+            continue
+        file = Path(file).resolve()
+        if file not in paths or any(file.is_relative_to(k) for k in keep):
+            continue
+        importlib.reload(module)
+        names.append(name)
+    LazyNames.reset_all()
+    return names
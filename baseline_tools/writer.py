@@ -0,0 +1,155 @@
+"""
+Write baseline artifacts in the background while the next ones are computed.
+
+A stage builds its objects (Grid, Topo, ...) in its task, then hands the
+function saving them (typically a cache.run_stage call) to a WriteGroup. An
+ArtifactWriter runs the saves on its own threads, so the CPU-bound tasks of
+the task graph go on with the next grid instead of waiting for the file
+system. At most `max_pending` saves are queued or running: `submit` blocks
+once the queue is full, which bounds the memory held by finished artifacts
+waiting to be written.
+
+Every pipeline's writes go through one WriteGroup per grid, flushed by a
+final task of the grid (see TaskGraph.add's `always`). `flush` waits for the
+group's writes and raises a WriteError listing every failure in submission
+order, so a failed write fails its grid, whatever the thread timing.
+
+Saves run under the profiling grid of the task that submitted them. The
+netCDF library is not thread-safe, so a save may only overlap with the next
+grid's stages because every NetCDF read and write holds xarray's HDF5 lock:
+xarray takes it itself, and the direct netCDF4 calls of baseline_tools
+(streaming, synthetic, tiled) take it explicitly. New code opening files
+with netCDF4 directly must do the same.
+"""
+
+import os
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional, Tuple
+
+from . import profiling
+
+DEFAULT_WRITE_JOBS = 2
+# Saves queued or running at once, per writer
+DEFAULT_MAX_PENDING = 4
+
+
+class WriteError(RuntimeError):
+    pass
+
+
+class ArtifactWriter:
+    """
+    Thread pool saving artifacts in the background. With `jobs` < 1 every
+    save runs at once in the submitting thread, as before there was a writer.
+    """
+
+    def __init__(
+        self, jobs: int = DEFAULT_WRITE_JOBS, max_pending: int = DEFAULT_MAX_PENDING
+    ):
+        self.jobs = jobs
+        self._pool = ThreadPoolExecutor(jobs, "writer") if jobs >= 1 else None
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+
+    def _run(self, grid: str, func: Callable, args, kwargs):
+        try:
+            with profiling.grid(grid):
+                func(*args, **kwargs)
+        finally:
+            self._slots.release()
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Run ``func(*args, **kwargs)`` in the background, blocking while the queue is full."""
+        if self._pool is None:
+            future = Future()
+            try:
+                func(*args, **kwargs)
+                future.set_result(None)
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self._slots.acquire()
+        try:
+            return self._pool.submit(
+                self._run, profiling.current_grid(), func, args, kwargs
+            )
+        except Exception:
+            self._slots.release()
+            raise
+
+    def group(self, label: str) -> "WriteGroup":
+        """A new WriteGroup for the writes of `label` (e.g. a grid)."""
+        return WriteGroup(self, label)
+
+    def shutdown(self):
+        """Wait for every submitted save and stop the threads."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+
+class WriteGroup:
+    """The writes of one pipeline, flushed together."""
+
+    def __init__(self, writer: ArtifactWriter, label: str):
+        self.writer = writer
+        self.label = label
+        self._futures: List[Tuple[str, Future]] = []
+        self._lock = threading.Lock()
+
+    def submit(self, what: str, func: Callable, *args, **kwargs) -> Future:
+        """Save `what` with ``func(*args, **kwargs)`` in the background."""
+        future = self.writer.submit(func, *args, **kwargs)
+        with self._lock:
+            self._futures.append((what, future))
+        return future
+
+    def flush(self):
+        """Wait for every write submitted so far, raising a WriteError if any failed."""
+        with self._lock:
+            futures, self._futures = self._futures, []
+        wait([future for _, future in futures])
+        errors = [
+            f"Writing {what} failed:\n"
+            + "".join(traceback.format_exception(future.exception()))
+            for what, future in futures
+            if future.exception() is not None
+        ]
+        if errors:
+            raise WriteError(
+                f"{len(errors)} write(s) of {self.label} failed\n" + "".join(errors)
+            )
+
+
+_shared: Optional[ArtifactWriter] = None
+_shared_pid: Optional[int] = None
+_shared_lock = threading.Lock()
+
+
+def shared_writer(jobs: int = DEFAULT_WRITE_JOBS) -> ArtifactWriter:
+    """
+    The writer shared by every pipeline of this process, created with `jobs`
+    threads on first use. Raises ValueError if it exists with another number
+    of threads, until close_shared_writer. A forked pool worker gets a
+    writer of its own, since threads do not survive the fork.
+    """
+    global _shared, _shared_pid
+    with _shared_lock:
+        if _shared is None or _shared_pid != os.getpid():
+            _shared = ArtifactWriter(jobs)
+            _shared_pid = os.getpid()
+        elif _shared.jobs != jobs:
+            raise ValueError(
+                f"The shared writer has {_shared.jobs} thread(s), not {jobs}; "
+                "close it first"
+            )
+        return _shared
+
+
+def close_shared_writer():
+    """Wait for the shared writer's saves, if it was used, and stop its threads."""
+    global _shared
+    with _shared_lock:
+        if _shared is not None and _shared_pid == os.getpid():
+            _shared.shutdown()
+        _shared = None
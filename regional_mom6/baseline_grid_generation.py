@@ -1,83 +1,192 @@
-# ...existing code...
-from regional_mom6 import *
-import argparse
-from pathlib import Path
-from typing import List
-import xarray as xr
-import subprocess
+import re
 import shutil
-import pandas as pd
-
-def generate_expts() -> List:
-    """Generate a list of experiment configurations for baseline grids."""
-    # Northern Hemisphere Basic
-    north_hem_basic = experiment.create_empty()
-    north_hem_basic.hgrid_type == "even_spacing"
-    north_hem_basic.resolution = 0.05
-    north_hem_basic.mom_input_dir = Path("north_hem_basic_input")
-    north_hem_basic.mom_input_dir.mkdir(exist_ok=True)
-    north_hem_basic.latitude_extent = [38, 41]
-    north_hem_basic.longitude_extent = [304, 307]
-    north_hem_basic.date_range = tuple(pd.date_range("2020-01-01", "2020-01-05"))
-    north_hem_basic.number_vertical_layers = 10
-    north_hem_basic.layer_thickness_ratio = 10
-    north_hem_basic.depth = 2000
-    north_hem_basic.expt_name = "north_hem_basic"
-    # South Long Seam
-    south_long_seam = experiment.create_empty()
-    south_long_seam.hgrid_type == "even_spacing"
-    south_long_seam.resolution = 0.05
-    south_long_seam.mom_input_dir = Path("south_long_seam_input")
-    south_long_seam.mom_input_dir.mkdir(exist_ok=True)
-    south_long_seam.latitude_extent = [-25, -23]
-    south_long_seam.longitude_extent = [175, 181]
-    south_long_seam.date_range = tuple(pd.date_range("2020-01-01", "2020-01-05"))
-    south_long_seam.number_vertical_layers = 10
-    south_long_seam.layer_thickness_ratio = 10
-    south_long_seam.depth = 2000
-    south_long_seam.expt_name = "south_long_seam"
-
-    # South Prime Seam
-    south_prime_seam = experiment.create_empty()
-    south_prime_seam.hgrid_type == "even_spacing"
-    south_prime_seam.resolution = 0.05
-    south_prime_seam.mom_input_dir = Path("south_prime_seam_input")
-    south_prime_seam.mom_input_dir.mkdir(exist_ok=True)
-    south_prime_seam.latitude_extent = [-18, -16]
-    south_prime_seam.longitude_extent = [-3, 1]
-    south_prime_seam.date_range = tuple(pd.date_range("2020-01-01", "2020-01-05"))
-    south_prime_seam.number_vertical_layers = 10
-    south_prime_seam.layer_thickness_ratio = 10
-    south_prime_seam.depth = 2000
-    south_prime_seam.expt_name = "south_prime_seam"
-
-    return [north_hem_basic, south_long_seam, south_prime_seam]
+import sys
+import threading
+from pathlib import Path
+from typing import List, Optional
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from baseline_tools import profiling
+from baseline_tools.backends import (
+    Backend,
+    baseline_filename,
+    register,
+    save_baseline_file,
+)
+from baseline_tools.bathy import bathymetry_window
+from baseline_tools.cache import (
+    ArtifactCache,
+    file_fingerprint,
+    library_versions,
+    run_stage,
+    spec_key,
+)
+from baseline_tools.driver import main
+from baseline_tools.fetch import (
+    DEFAULT_JOBS as DEFAULT_FETCH_JOBS,
+    FetchTask,
+    command_fetcher,
+    fetch_missing,
+    raw_piece_name,
+    source_fetcher,
+)
+from baseline_tools.formats import DEFAULT_FORMAT, recompress
+from baseline_tools.lazy import LazyNames
+from baseline_tools.manifest import write_manifest
+from baseline_tools.storage import link_or_copy, prepare_output
+from baseline_tools.streaming import (
+    append_time_chunk,
+    time_chunk_length,
+    time_length,
+    write_time_slice,
+)
+from baseline_tools.suite import load_cases
+from baseline_tools.synthetic import (
+    BOUNDARIES,
+    SYNTHETIC_VERSION,
+    synthetic_bathymetry_window,
+    synthetic_raw_forcing,
+)
+from baseline_tools.taskgraph import TaskGraph
+from baseline_tools.writer import DEFAULT_WRITE_JOBS, shared_writer
 
-def generate_grids(expts) -> List:
+# regional_mom6 loads its whole regridding stack on import, so it is only
+# imported once the first experiment is created, not for --help
+lib = LazyNames(experiment=["regional_mom6"])
+
+CASES = {}
+
+# Experiment definitions from baseline_cases.toml, keyed by experiment name
+EXPT_SPECS = {}
+
+
+def reload_cases():
+    """(Re)read the cases from baseline_cases.toml, updating the dicts above in place."""
+    cases = load_cases("regional_mom6")
+    EXPT_SPECS.clear()
+    EXPT_SPECS.update(
+        (
+            name,
+            dict(
+                resolution=case.resolution,
+                latitude_extent=list(case.lat_extent),
+                longitude_extent=list(case.lon_extent),
+            ),
+        )
+        for name, case in cases.items()
+    )
+    CASES.clear()
+    CASES.update(cases)
+
+
+reload_cases()
+
+# Settings shared by every experiment
+EXPT_DEFAULTS = dict(
+    date_range=("2020-01-01", "2020-01-05"),
+    number_vertical_layers=10,
+    layer_thickness_ratio=10,
+    depth=2000,
+)
+
+BATHYMETRY_PATH = Path(
+    "/glade/campaign/cgd/oce/projects/CROCODILE/workshops/2025/CrocoDash/data/gebco/GEBCO_2024.nc"
+)
+
+# Mapping from the GLORYS variables and dimensions to the MOM6 ones
+OCEAN_VARNAMES = {
+    "time": "time",
+    "yh": "latitude",
+    "xh": "longitude",
+    "zl": "depth",
+    "eta": "zos",
+    "u": "uo",
+    "v": "vo",
+    "tracers": {"salt": "so", "temp": "thetao"},
+}
 
+# Libraries whose version is part of every cache key
+CACHE_LIBRARIES = ["regional_mom6", "numpy", "xarray", "xesmf"]
+
+
+def generate_expts(names: Optional[List[str]] = None, synthetic: bool = False) -> List:
+    """
+    Generate a list of experiment configurations for baseline grids.
+    If `names` is given, only those experiments are created. With `synthetic`,
+    each experiment gets its own input directory, so synthetic raw data never
+    mixes with downloaded data.
+    """
+    import pandas as pd
+
+    if names is None:
+        names = list(EXPT_SPECS)
+    expts = []
+    for name in names:
+        spec = {**EXPT_DEFAULTS, **EXPT_SPECS[name]}
+        expt = lib.experiment.create_empty()
+        expt.hgrid_type = "even_spacing"
+        expt.resolution = spec["resolution"]
+        expt.mom_input_dir = Path(
+            f"{name}_synthetic_input" if synthetic else f"{name}_input"
+        )
+        expt.mom_input_dir.mkdir(exist_ok=True)
+        expt.latitude_extent = spec["latitude_extent"]
+        expt.longitude_extent = spec["longitude_extent"]
+        expt.date_range = tuple(pd.date_range(*spec["date_range"]))
+        expt.number_vertical_layers = spec["number_vertical_layers"]
+        expt.layer_thickness_ratio = spec["layer_thickness_ratio"]
+        expt.depth = spec["depth"]
+        expt.expt_name = name
+        expts.append(expt)
+    return expts
+
+
+@profiling.stage("hgrid")
+def generate_grids(expts) -> List:
     grids = []
     for expt in expts:
         expt.hgrid = expt._make_hgrid()
         grids.append(expt.hgrid)
 
     return grids
-def generate_vgrids(expts)-> List:
+
+
+@profiling.stage("vgrid")
+def generate_vgrids(expts) -> List:
     grids = []
     for expt in expts:
         expt.vgrid = expt._make_vgrid()
         grids.append(expt.vgrid)
+    return grids
+
 
-def generate_bathys(expts) -> List:
+@profiling.stage("bathy")
+def generate_bathys(
+    expts, cache_dir: Optional[Path] = None, synthetic: bool = False
+) -> List:
     """
-    Generate bathymetry objects for each grid.
+    Generate bathymetry objects for each grid. If cache_dir is given, each
+    experiment reads a padded window of GEBCO cached in
+    cache_dir/bathy_windows instead of the whole global file. With
+    `synthetic`, the window is a synthetic GEBCO-like stand-in cached in
+    cache_dir/synthetic (or the experiment's input directory).
     """
-    bathymetry_path = Path(
-        "/glade/campaign/cgd/oce/projects/CROCODILE/workshops/2025/CrocoDash/data/gebco/GEBCO_2024.nc"
-    )
-
     topos = []
     for expt in expts:
+        bathymetry_path = BATHYMETRY_PATH
+        if synthetic:
+            bathymetry_path = synthetic_bathymetry_window(
+                cache_dir if cache_dir is not None else expt.mom_input_dir,
+                expt.longitude_extent,
+                expt.latitude_extent,
+            )
+        elif cache_dir is not None:
+            bathymetry_path = bathymetry_window(
+                BATHYMETRY_PATH,
+                lon_extent=expt.longitude_extent,
+                lat_extent=expt.latitude_extent,
+                cache_dir=cache_dir,
+            )
         bathymetry = expt.setup_bathymetry(
             bathymetry_path=bathymetry_path,
             longitude_coordinate_name="lon",
@@ -87,144 +196,509 @@ def generate_bathys(expts) -> List:
         topos.append(bathymetry)
     return topos
 
-def generate_raw_data(expts):
+
+def glorys_fetch_tasks(expt, segments: List[str]) -> List[FetchTask]:
+    """
+    One task per segment ("ic" or a boundary) in `segments`, each running
+    its own line of the download script written by get_glorys.
+    """
+    expt.get_glorys(raw_boundaries_path=expt.mom_input_dir)
+    scripts = [
+        expt.mom_input_dir / "get_glorys_data.sh",
+        expt.mom_input_dir / "get_glorys_data.pbs",
+    ]
+    script_path = next((path for path in scripts if path.exists()), None)
+    if script_path is None:
+        raise FileNotFoundError(
+            f"get_glorys wrote no download script: none of "
+            f"{', '.join(str(path) for path in scripts)} exists"
+        )
+    tasks = []
+    for line in script_path.read_text().splitlines():
+        match = re.search(r"-o (\S+) -f (\w+)_unprocessed\.nc", line)
+        if match is None or match.group(2) not in segments:
+            continue
+        download_dir, segment = Path(match.group(1)), match.group(2)
+        # Download under a temporary name, renamed once complete
+        command = line.replace(
+            f"-f {segment}_unprocessed.nc", f"-f {segment}_unprocessed.part.nc"
+        )
+        tasks.append(
+            FetchTask(
+                f"{expt.expt_name}/{segment}",
+                expt.mom_input_dir / f"{segment}_unprocessed.nc",
+                command_fetcher(
+                    command, download_dir / f"{segment}_unprocessed.part.nc"
+                ),
+            )
+        )
+    return tasks
+
+
+@profiling.stage("raw_data")
+def generate_raw_data(
+    expts,
+    synthetic: bool = False,
+    raw_data_source: Optional[str] = None,
+    fetch_jobs: int = DEFAULT_FETCH_JOBS,
+):
+    """
+    Make sure the initial condition and every boundary of each experiment
+    has its raw GLORYS file in mom_input_dir. Only missing files are fetched,
+    concurrently: from `raw_data_source` (a URL or directory) if given, else
+    by running their lines of get_glorys's download script.
+    """
     for expt in expts:
-        if not (expt.mom_input_dir/"ic_unprocessed.nc").exists():
-            print("Can't find raw data, so downloading it")
-            expt.get_glorys(
-                raw_boundaries_path=expt.mom_input_dir
+        boundaries = getattr(expt, "boundaries", None) or BOUNDARIES
+        if synthetic:
+            synthetic_raw_forcing(
+                expt.mom_input_dir,
+                expt.longitude_extent,
+                expt.latitude_extent,
+                date_range=expt.date_range,
+                boundaries=boundaries,
             )
-            script_path = Path(expt.mom_input_dir) / "get_glorys_data.sh"
-            script_path.chmod(script_path.stat().st_mode | 0o111)  # adds execute permission
-            result = subprocess.run(
-                [str(script_path)],  # directly execute
-                capture_output=True, # optional
-                text=True
+            continue
+        missing = [
+            segment
+            for segment in ["ic", *boundaries]
+            if not (expt.mom_input_dir / f"{segment}_unprocessed.nc").exists()
+        ]
+        if not missing:
+            continue
+        print(f"Can't find raw data for {', '.join(missing)}, so downloading it")
+        if raw_data_source is not None:
+            start, end = expt.date_range[0], expt.date_range[-1]
+            tasks = [
+                FetchTask(
+                    f"{expt.expt_name}/{segment}",
+                    expt.mom_input_dir / f"{segment}_unprocessed.nc",
+                    source_fetcher(
+                        raw_data_source,
+                        raw_piece_name(expt.expt_name, segment, start, end),
+                    ),
+                )
+                for segment in missing
+            ]
+        else:
+            tasks = glorys_fetch_tasks(expt, missing)
+        fetch_missing(tasks, jobs=fetch_jobs)
+
+
+def stream_ocean_state_boundaries(expt, memory_mb: float):
+    """
+    Same output as expt.setup_ocean_state_boundaries, with bounded memory:
+    boundaries are processed one at a time, each in chunks of time steps
+    sized to `memory_mb`, and every chunk's records are appended to the
+    boundary's forcing file. The regridders of a boundary are built for its
+    first chunk and reused for the rest.
+    """
+    scratch = expt.mom_input_dir / "forcing_chunks"
+    for orientation in getattr(expt, "boundaries", None) or BOUNDARIES:
+        raw_path = expt.mom_input_dir / f"{orientation}_unprocessed.nc"
+        segment = expt._get_segment(orientation, bathymetry_path=expt.bathymetry_path)
+        outpath = prepare_output(
+            expt.mom_input_dir / f"forcing_obc_{segment.segment_name}.nc"
+        )
+        n_times = time_length(raw_path)
+        step = time_chunk_length(raw_path, memory_mb)
+        print(
+            f"Processing {orientation} boundary in chunks of {step} of "
+            f"{n_times} time steps"
+        )
+        regridders = None
+        for start in range(0, n_times, step):
+            chunk = write_time_slice(
+                raw_path,
+                scratch / f"{orientation}_{start}_unprocessed.nc",
+                start,
+                start + step,
             )
-            print(result.stdout)
-
-
-def generate_forcings(expts):
-    # Define a mapping from the GLORYS variables and dimensions to the MOM6 ones
-    generate_raw_data(expts)
-    ocean_varnames = {"time": "time",
-                    "yh": "latitude",
-                    "xh": "longitude",
-                    "zl": "depth",
-                    "eta": "zos",
-                    "u": "uo",
-                    "v": "vo",
-                    "tracers": {"salt": "so", "temp": "thetao"}
-                    }
-    for expt in expts:
+            segment.regrid_velocity_tracers(
+                infile=chunk,
+                varnames=OCEAN_VARNAMES,
+                outfolder=scratch,
+                startdate=expt.date_range[0],
+                arakawa_grid="A",
+                regridding_method=expt.regridding_method,
+                fill_method=expt.fill_method,
+                regridders=regridders,
+                repeat_year_forcing=expt.repeat_year_forcing,
+            )
+            regridders = segment._regridders
+            chunk.unlink()
+            # Times count steps from the start of the chunk, shift them to
+            # count from the start of the experiment
+            append_time_chunk(outpath, scratch / outpath.name, time_offset=start)
+    shutil.rmtree(scratch, ignore_errors=True)
 
-        # Set up the initial condition
-        expt.setup_initial_condition(
-            expt.mom_input_dir / "ic_unprocessed.nc", # directory where the unprocessed initial condition is stored, as defined earlier
-            ocean_varnames,
-            arakawa_grid="A"
+
+def generate_forcings(
+    expts,
+    synthetic: bool = False,
+    raw_data_source: Optional[str] = None,
+    fetch_jobs: int = DEFAULT_FETCH_JOBS,
+    fetch_raw: bool = True,
+    memory_mb: Optional[float] = None,
+):
+    """
+    Set up the initial condition and boundary conditions of each experiment.
+    Without `fetch_raw` the raw data must already be in mom_input_dir, e.g.
+    from an earlier generate_raw_data task. With `memory_mb`, boundaries are
+    streamed in time chunks (see stream_ocean_state_boundaries); the initial
+    condition is a single time step and is always processed whole.
+    """
+    if fetch_raw:
+        generate_raw_data(expts, synthetic, raw_data_source, fetch_jobs)
+    with profiling.stage("forcing"):
+        for expt in expts:
+            # Set up the initial condition from the unprocessed file fetched
+            # into mom_input_dir
+            expt.setup_initial_condition(
+                expt.mom_input_dir / "ic_unprocessed.nc",
+                OCEAN_VARNAMES,
+                arakawa_grid="A",
             )
 
-        # Set up the four boundary conditions. Remember that in the glorys_path, we have four boundary files names north_unprocessed.nc etc.
-        expt.setup_ocean_state_boundaries(
+            if memory_mb is not None:
+                stream_ocean_state_boundaries(expt, memory_mb)
+                continue
+
+            # Set up the four boundary conditions, from the unprocessed
+            # north_unprocessed.nc etc. in mom_input_dir
+            expt.setup_ocean_state_boundaries(
                 expt.mom_input_dir,
-                ocean_varnames,
-                arakawa_grid = "A",
-                bathymetry_path = expt.bathymetry_path
-                )
+                OCEAN_VARNAMES,
+                arakawa_grid="A",
+                bathymetry_path=expt.bathymetry_path,
+            )
+
 
-def save_grids_to_baseline(expts: List, outdir: Path, prefix: str = ""):
+@profiling.stage("save_hgrid")
+def save_grids_to_baseline(
+    expts: List, outdir: Path, prefix: str = "", output_format: str = DEFAULT_FORMAT
+):
     """Save generated grids to the specified baseline directory."""
     outdir.mkdir(parents=True, exist_ok=True)
     if not expts:
         print("No grids to save (generate_grids returned empty list).")
         return
     for i, expt in enumerate(expts):
-        name = ("grid_"+getattr(expt, "expt_name", None)) or f"grid_{i}"
-        filename = f"{prefix + '_' if prefix else ''}{name}.nc"
-        outpath = outdir / filename
+        name = getattr(expt, "expt_name", None) or f"grid_{i}"
+        outpath = outdir / baseline_filename(name, "hgrid", prefix)
         print(f"Writing grid '{name}' -> {outpath}")
-        expt.hgrid.to_netcdf(outpath)
+        save_baseline_file(outpath, expt.hgrid.to_netcdf, output_format)
 
-def save_vgrids_to_baseline(expts: List, outdir: Path, prefix: str = ""):
+
+@profiling.stage("save_vgrid")
+def save_vgrids_to_baseline(
+    expts: List, outdir: Path, prefix: str = "", output_format: str = DEFAULT_FORMAT
+):
     """Save generated grids to the specified baseline directory."""
     outdir.mkdir(parents=True, exist_ok=True)
     if not expts:
         print("No grids to save (generate_grids returned empty list).")
         return
     for i, expt in enumerate(expts):
-        name = ("vgrid_"+getattr(expt, "expt_name", None)) or f"vgrid_{i}"
-        filename = f"{prefix + '_' if prefix else ''}{name}.nc"
-        outpath = outdir / filename
+        name = getattr(expt, "expt_name", None) or f"vgrid_{i}"
+        outpath = outdir / baseline_filename(name, "vgrid", prefix)
         print(f"Writing vgrid '{name}' -> {outpath}")
-        expt.vgrid.to_netcdf(outpath)
+        save_baseline_file(outpath, expt.vgrid.to_netcdf, output_format)
 
 
-def save_bathys_to_baseline(expts: List, outdir: Path, prefix: str = ""):
+@profiling.stage("save_bathy")
+def save_bathys_to_baseline(
+    expts: List, outdir: Path, prefix: str = "", output_format: str = DEFAULT_FORMAT
+):
     outdir.mkdir(parents=True, exist_ok=True)
     for i, expt in enumerate(expts):
-        name = f"bathy_{expt.expt_name}"
-        filename = f"{prefix + '_' if prefix else ''}{name}.nc"
-        outpath = outdir / filename
+        name = expt.expt_name
+        outpath = outdir / baseline_filename(name, "bathy", prefix)
         print(f"Writing bathymetry '{name}' -> {outpath}")
-        expt.bathymetry.to_netcdf(outpath)  # assuming Topo implements `write()`
-def save_forcings_to_baseline(expts: List, outdir: Path, prefix: str = ""):
+        save_baseline_file(outpath, expt.bathymetry.to_netcdf, output_format)
+
+
+@profiling.stage("save_forcing")
+def save_forcings_to_baseline(
+    expts: List, outdir: Path, prefix: str = "", output_format: str = DEFAULT_FORMAT
+):
     outdir.mkdir(parents=True, exist_ok=True)
     for i, expt in enumerate(expts):
-        # Copy files that end with _ic or start with forcing_ to the outdir from expt.mom_input_dir
-        # Iterate and copy
+        # Copy the files of mom_input_dir that end with _ic or start with
+        # forcing_ to outdir
         for file in expt.mom_input_dir.iterdir():
-            if file.is_file() and (file.name.endswith("_ic") or file.name.startswith("forcing_")):
+            if file.is_file() and (
+                file.name.endswith("_ic") or file.name.startswith("forcing_")
+            ):
                 dest = Path(outdir) / f"{expt.expt_name}_{file.name}"
-                shutil.copy2(file, dest)  # copy2 preserves metadata
+                # mom_input_dir is reused by later runs, which rewrite these
+                # files in place, so never hard link them
+                link_or_copy(file, dest, hardlink=False)
+                recompress(dest, output_format)
+                write_manifest(dest)
                 print(f"Copied: {file.name} to {dest.name}")
 
-def parse_args():
-    p = argparse.ArgumentParser(
-        description="Generate baseline supergrids and save to a directory."
-    )
+
+def add_arguments(p):
+    """Add regional_mom6's own options to the driver's parser."""
     p.add_argument(
-        "baseline_dir",
-        nargs="?",
-        default="baselines",
-        help="Output baselines directory",
+        "--forcing-memory-mb",
+        type=float,
+        help="Stream the regional_mom6 boundary forcing in time chunks sized to "
+        "stay under roughly this much memory, instead of processing whole "
+        "files. Use for long date ranges or large domains.",
     )
-    p.add_argument(
-        "--prefix", "-p", default="", help="Optional filename prefix for saved grids"
+
+
+def backend_options(args) -> dict:
+    return dict(forcing_memory_mb=args.forcing_memory_mb)
+
+
+def stage_keys(
+    name: str, synthetic: bool = False, output_format: str = DEFAULT_FORMAT
+) -> dict:
+    """
+    Cache keys for every artifact of experiment `name`. Each key includes the
+    keys of the artifacts it is built from, so a change invalidates everything
+    downstream of it, and the name of the file it is saved as, since cache
+    entries hold the files themselves.
+    """
+    spec = {**EXPT_DEFAULTS, **EXPT_SPECS[name]}
+    versions = library_versions(CACHE_LIBRARIES)
+    keys = {}
+    keys["hgrid"] = spec_key(
+        "hgrid",
+        baseline_filename(name, "hgrid"),
+        spec["resolution"],
+        spec["latitude_extent"],
+        spec["longitude_extent"],
+        output_format,
+        versions,
     )
-    p.add_argument(
-        "--with-bathy",
-        action="store_true",
-        help="If set, generate and save bathymetry files for each grid.",
+    keys["vgrid"] = spec_key(
+        "vgrid",
+        baseline_filename(name, "vgrid"),
+        spec["number_vertical_layers"],
+        spec["layer_thickness_ratio"],
+        spec["depth"],
+        output_format,
+        versions,
     )
-    p.add_argument(
-        "--with-forcings",
-        action="store_true",
-        help="If set, generate and save forcing files for each grid.",
+    if synthetic:
+        source = {"synthetic": SYNTHETIC_VERSION}
+    else:
+        source = file_fingerprint(BATHYMETRY_PATH)
+    keys["bathy"] = spec_key(
+        "bathy", baseline_filename(name, "bathy"), keys["hgrid"], source, versions
+    )
+    keys["forcing"] = spec_key(
+        "forcing", keys["bathy"], keys["vgrid"], spec["date_range"], versions
     )
-    return p.parse_args()
+    return keys
 
 
-if __name__ == "__main__":
-    args = parse_args()
-    outdir = Path(args.baseline_dir)
-    expts = generate_expts()
-    grids = generate_grids(expts)  # replace with real implementation
-    vgrids = generate_vgrids(expts)
-    save_grids_to_baseline(expts, outdir, prefix=args.prefix)
-    save_vgrids_to_baseline(expts, outdir, prefix=args.prefix)
-
-    if args.with_bathy:
-        print("\n-- Generating bathymetry because --with-bathy was specified --")
-        topos = generate_bathys(expts)
-        save_bathys_to_baseline(topos, outdir, prefix=args.prefix)
-    else:
-        print("\n-- Skipping bathymetry generation (use --with-bathy to enable) --")
+def add_expt_tasks(
+    graph: TaskGraph,
+    name: str,
+    outdir: Path,
+    prefix: str,
+    cache_dir: Path,
+    with_bathy: bool,
+    with_forcings: bool,
+    use_cache: bool = True,
+    synthetic: bool = False,
+    raw_data_source: Optional[str] = None,
+    fetch_jobs: int = DEFAULT_FETCH_JOBS,
+    output_format: str = DEFAULT_FORMAT,
+    source_cache_dir: Optional[Path] = None,
+    write_jobs: int = DEFAULT_WRITE_JOBS,
+    forcing_memory_mb: Optional[float] = None,
+):
+    """
+    Add the pipeline of a single experiment to `graph`, saving every artifact
+    to the baseline directory as soon as it is built:
+
+        vgrid ---------------------------+
+        hgrid -+-> bathy ----------------+-> forcing -> flush
+               +-> raw data fetch -------+
+
+    Artifacts are saved by the process's background writer (see
+    baseline_tools.writer, `write_jobs` threads) while the next stage runs.
+    The final flush task waits for the experiment's writes and fails it if
+    one of them failed.
+
+    Artifacts whose cache key is unchanged are restored from
+    cache_dir/artifacts instead of being rebuilt, unless `use_cache` is off.
+    The experiment is only created by the first task that needs it, and a
+    cached hgrid, vgrid or bathymetry is only loaded when a later stage
+    misses the cache: it is copied into the experiment's mom_input_dir, from
+    which regional_mom6 reads it on first use. With
+    `synthetic`, bathymetry and raw forcing data come from
+    baseline_tools.synthetic. Bathymetry windows are cached in
+    `source_cache_dir` (default cache_dir).
+
+    The raw data fetch is an I/O task, overlapping with the bathymetry. It
+    only waits for the hgrid when get_glorys has to write the download script.
+    """
+    source_cache_dir = source_cache_dir or cache_dir
+    cache = ArtifactCache(cache_dir / "artifacts") if use_cache else None
+    keys = stage_keys(name, synthetic, output_format)
+    writes = shared_writer(write_jobs).group(name)
+    expts = None
+    expts_lock = threading.Lock()
+    grid_locks = {"hgrid": threading.Lock(), "vgrid": threading.Lock()}
+    grids_ready = set()
+    bathy_built = False
+    # get_glorys reads the hgrid to write the download script
+    fetch_needs_hgrid = not synthetic and raw_data_source is None
+
+    def get_expts() -> List:
+        # hgrid, vgrid and fetch_raw may ask for it at the same time
+        nonlocal expts
+        with expts_lock:
+            if expts is None:
+                expts = generate_expts([name], synthetic)
+        return expts
+
+    def stage_cached(stage: str) -> bool:
+        return cache is not None and cache.has(stage, keys[stage])
+
+    def forcing_cached() -> bool:
+        return stage_cached("forcing")
+
+    def save_stage(stage: str, save, pre: str = prefix):
+        """run_stage `stage` with `save` as its writer, in the background."""
+        writes.submit(stage, run_stage, cache, stage, keys[stage], outdir, save, pre)
+
+    def cached(stage: str, filename: str) -> Optional[Path]:
+        """Path of `filename` in the cache entry of `stage`, if there is one."""
+        if cache is None or not cache.has(stage, keys[stage]):
+            return None
+        return cache.entry(stage, keys[stage]) / filename
+
+    def restore_input(stage: str, filename: str) -> bool:
+        """Copy the cached `stage` file to mom_input_dir/filename, if cached."""
+        path = cached(stage, baseline_filename(name, stage))
+        if path is None:
+            return False
+        # regional_mom6 rewrites its input files in place (vgrid.nc on every
+        # access), so never hard link the cache entry
+        link_or_copy(path, get_expts()[0].mom_input_dir / filename, hardlink=False)
+        return True
 
-    if args.with_forcings:
-        print("\n-- Generating forcings because --with-forcings was specified --")
-        names = []
+    def expts_with(grid: str) -> List:
+        """The experiment with its `grid` ("hgrid" or "vgrid") built or restored."""
+        with grid_locks[grid]:
+            if grid not in grids_ready:
+                if not restore_input(grid, f"{grid}.nc"):
+                    build = generate_grids if grid == "hgrid" else generate_vgrids
+                    build(get_expts())
+                grids_ready.add(grid)
+        return get_expts()
 
-        generate_forcings(expts)
-        save_forcings_to_baseline(expts, outdir, prefix=args.prefix)
-# ...existing code...
+    def hgrid():
+        if not stage_cached("hgrid"):
+            expts_with("hgrid")
+        save_stage(
+            "hgrid",
+            lambda dest, pre: save_grids_to_baseline(
+                get_expts(), dest, prefix=pre, output_format=output_format
+            ),
+        )
+
+    def vgrid():
+        if not stage_cached("vgrid"):
+            expts_with("vgrid")
+        save_stage(
+            "vgrid",
+            lambda dest, pre: save_vgrids_to_baseline(
+                get_expts(), dest, prefix=pre, output_format=output_format
+            ),
+        )
+
+    def bathy():
+        nonlocal bathy_built
+        if not stage_cached("bathy"):
+            generate_bathys(expts_with("hgrid"), source_cache_dir, synthetic)
+            bathy_built = True
+        save_stage(
+            "bathy",
+            lambda dest, pre: save_bathys_to_baseline(
+                get_expts(), dest, prefix=pre, output_format=output_format
+            ),
+        )
+
+    def fetch_raw():
+        if not forcing_cached():
+            generate_raw_data(
+                expts_with("hgrid") if fetch_needs_hgrid else get_expts(),
+                synthetic,
+                raw_data_source,
+                fetch_jobs,
+            )
+
+    def forcing():
+        if not forcing_cached():
+            expts_with("vgrid")
+            if with_bathy and not bathy_built:
+                # Boundaries read the bathymetry from mom_input_dir, which a
+                # bathymetry cache hit does not create
+                restore_input("bathy", "bathymetry.nc")
+            generate_forcings(
+                expts_with("hgrid"), fetch_raw=False, memory_mb=forcing_memory_mb
+            )
+        # Forcing files have never carried the prefix
+        save_stage(
+            "forcing",
+            lambda dest, pre: save_forcings_to_baseline(
+                get_expts(), dest, prefix=pre, output_format=output_format
+            ),
+            pre="",
+        )
+
+    hgrid_task = graph.add(f"{name}/hgrid", hgrid, grid=name)
+    vgrid_task = graph.add(f"{name}/vgrid", vgrid, grid=name)
+    bathy_task = forcing_task = None
+    if with_bathy:
+        bathy_task = graph.add(f"{name}/bathy", bathy, [hgrid_task], grid=name)
+    if with_forcings:
+        fetch_task = graph.add(
+            f"{name}/fetch_raw",
+            fetch_raw,
+            [hgrid_task] if fetch_needs_hgrid else [],
+            io=True,
+            grid=name,
+        )
+        forcing_task = graph.add(
+            f"{name}/forcing",
+            forcing,
+            [hgrid_task, vgrid_task, bathy_task, fetch_task],
+            grid=name,
+        )
+    # Waits on the I/O pool, so the CPU-bound tasks of other experiments go on
+    graph.add(
+        f"{name}/flush",
+        writes.flush,
+        [hgrid_task, vgrid_task, bathy_task, forcing_task],
+        io=True,
+        grid=name,
+        always=True,
+    )
+
+
+BACKEND = register(
+    Backend(
+        name="regional_mom6",
+        cases=CASES,
+        add_tasks=add_expt_tasks,
+        cache_dir=Path(__file__).resolve().parent / "cache",
+        cache_libraries=CACHE_LIBRARIES,
+        add_arguments=add_arguments,
+        options=backend_options,
+        reload_cases=reload_cases,
+    )
+)
+
+
+if __name__ == "__main__":
+    sys.exit(main(backend=BACKEND))
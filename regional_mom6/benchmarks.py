@@ -0,0 +1,104 @@
+"""
+Timing baselines for the regional_mom6 calls used by
+baseline_grid_generation.py, on the same reference experiments.
+
+Bathymetry and the initial condition are read from small synthetic GEBCO-
+and GLORYS-like files, so nothing here needs /glade or the network. The
+generator's start-up is timed too: --help, and loading the script and
+regional_mom6 as the first stage of any run does.
+
+Usage:
+    python regional_mom6/benchmarks.py [BASELINE_DIR] [--update] [--threshold 2]
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+import baseline_grid_generation as gen
+from baseline_tools import bench
+from baseline_tools.synthetic import synthetic_bathymetry, synthetic_glorys
+
+GENERATOR = Path(gen.__file__).resolve()
+
+STARTUP = {
+    "--help": [sys.executable, str(GENERATOR), "--help"],
+    "import_hgrid": [
+        sys.executable,
+        "-c",
+        f"import runpy; runpy.run_path({str(GENERATOR)!r})['lib'].experiment",
+    ],
+}
+
+
+def make_expt(name: str, workdir: Path, bathymetry: bool = False):
+    """An experiment with its hgrid and vgrid, and optionally its bathymetry."""
+    expt = gen.generate_expts([name])[0]
+    expt.hgrid = expt._make_hgrid()
+    expt.vgrid = expt._make_vgrid()
+    if bathymetry:
+        expt.setup_bathymetry(
+            bathymetry_path=synthetic_bathymetry(
+                workdir / "gebco.nc", expt.longitude_extent, expt.latitude_extent
+            ),
+            longitude_coordinate_name="lon",
+            latitude_coordinate_name="lat",
+            vertical_coordinate_name="elevation",
+        )
+    return expt
+
+
+def bench_hgrid(name: str, workdir: Path):
+    expt = gen.generate_expts([name])[0]
+    return expt._make_hgrid
+
+
+def bench_vgrid(name: str, workdir: Path):
+    expt = gen.generate_expts([name])[0]
+    return expt._make_vgrid
+
+
+def bench_bathymetry(name: str, workdir: Path):
+    expt = make_expt(name, workdir)
+    bathymetry_path = synthetic_bathymetry(
+        workdir / "gebco.nc", expt.longitude_extent, expt.latitude_extent
+    )
+    return lambda: expt.setup_bathymetry(
+        bathymetry_path=bathymetry_path,
+        longitude_coordinate_name="lon",
+        latitude_coordinate_name="lat",
+        vertical_coordinate_name="elevation",
+    )
+
+
+def bench_initial_condition(name: str, workdir: Path):
+    expt = make_expt(name, workdir, bathymetry=True)
+    ic_path = synthetic_glorys(
+        expt.mom_input_dir / "ic_unprocessed.nc",
+        expt.longitude_extent,
+        expt.latitude_extent,
+        date_range=[str(expt.date_range[0]), str(expt.date_range[0])],
+    )
+    return lambda: expt.setup_initial_condition(
+        ic_path, gen.OCEAN_VARNAMES, arakawa_grid="A"
+    )
+
+
+BENCHMARKS = {
+    "_make_hgrid": bench_hgrid,
+    "_make_vgrid": bench_vgrid,
+    "setup_bathymetry": bench_bathymetry,
+    "setup_initial_condition": bench_initial_condition,
+}
+
+
+if __name__ == "__main__":
+    sys.exit(
+        bench.main(
+            BENCHMARKS,
+            gen.CASES,
+            gen.CACHE_LIBRARIES,
+            generator="regional_mom6",
+            startup=STARTUP,
+        )
+    )
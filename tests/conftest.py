@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# The repository is not an installed package: import baseline_tools and the
+# generator scripts from the checkout
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from baseline_tools.bathy import bathymetry_window, subset_window
+
+
+def source(lon):
+    lat = np.arange(-89.5, 90.0, 1.0)
+    lon = np.asarray(lon, dtype=np.float64)
+    elevation = lon[None, :] + 1000.0 * lat[:, None]
+    return xr.Dataset(
+        {"elevation": (("lat", "lon"), elevation)}, coords={"lat": lat, "lon": lon}
+    )
+
+
+@pytest.mark.parametrize(
+    "lon", [np.arange(0.5, 360.0, 1.0), np.arange(-179.5, 180.0, 1.0)]
+)
+def test_window_across_the_seam(lon):
+    # The grid crosses 0 in one source convention and 180 in the other
+    for lon_extent in ([-3.0, 2.0], [357.0, 362.0], [178.0, 183.0]):
+        window = subset_window(source(lon), lon_extent, [10.0, 12.0], pad=1.0)
+        west = lon_extent[0] - 1.0
+        expected = np.arange(west + 0.5, lon_extent[1] + 1.0, 1.0)
+        np.testing.assert_array_equal(window.lon.values, expected)
+        np.testing.assert_array_equal(window.lat.values, np.arange(9.5, 13.0, 1.0))
+        # Values follow their longitudes through the relabelling
+        np.testing.assert_array_equal(
+            np.mod(window.elevation.values[0] - 9500.0, 360.0),
+            np.mod(expected, 360.0),
+        )
+
+
+def test_window_is_cached(tmp_path):
+    path = tmp_path / "gebco.nc"
+    source(np.arange(0.5, 360.0, 1.0)).to_netcdf(path)
+    first = bathymetry_window(path, [10.0, 12.0], [0.0, 2.0], tmp_path / "cache")
+    inode = first.stat().st_ino
+    again = bathymetry_window(path, [10.0, 12.0], [0.0, 2.0], tmp_path / "cache")
+    # Not rewritten, which would replace the file
+    assert again == first and again.stat().st_ino == inode
+    other = bathymetry_window(path, [10.0, 13.0], [0.0, 2.0], tmp_path / "cache")
+    assert other != first
+    with xr.open_dataset(first) as window:
+        assert window.lon.values.tolist() == [9.5, 10.5, 11.5, 12.5]
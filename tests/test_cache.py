@@ -0,0 +1,43 @@
+import os
+
+from baseline_tools.cache import entry_size, prune_lru, spec_key
+
+
+def test_spec_key_is_stable():
+    assert spec_key("hgrid", {"a": 1, "b": 2}) == spec_key("hgrid", {"b": 2, "a": 1})
+    assert len(spec_key("hgrid")) == 24
+    assert spec_key("hgrid", "one") != spec_key("hgrid", "two")
+    assert spec_key("hgrid", ("a",)) == spec_key("hgrid", ["a"])
+
+
+def make_entries(root, sizes):
+    paths = []
+    for used, size in enumerate(sizes):
+        path = root / f"entry{used}"
+        path.mkdir()
+        (path / "data.nc").write_bytes(b"x" * size)
+        os.utime(path, (1000 + used, 1000 + used))
+        paths.append(path)
+    return paths
+
+
+def test_prune_lru_evicts_least_recently_used(tmp_path):
+    paths = make_entries(tmp_path, [100, 100, 100])
+    assert prune_lru(paths, 200) == [paths[0]]
+    assert not paths[0].exists()
+    assert paths[1].exists() and paths[2].exists()
+
+
+def test_prune_lru_keeps_entries_of_the_current_run(tmp_path):
+    paths = make_entries(tmp_path, [100, 100, 100])
+    assert prune_lru(paths, 0, keep_since=1001) == [paths[0]]
+
+
+def test_prune_lru_skips_linked_files(tmp_path):
+    paths = make_entries(tmp_path, [100, 100, 100])
+    # Restored into a baseline directory: deleting it frees nothing
+    os.link(paths[0] / "data.nc", tmp_path / "baseline.nc")
+    assert entry_size(paths[0]) == 0
+    assert entry_size(paths[1]) == 100
+    assert prune_lru(paths, 100) == [paths[1]]
+    assert paths[0].exists()
@@ -0,0 +1,113 @@
+import json
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from baseline_tools.compare import compare_dirs, compare_files, main
+
+
+def write(path, area=None, **extra):
+    if area is None:
+        area = np.arange(20.0).reshape(4, 5)
+    xr.Dataset(
+        {"area": (("ny", "nx"), area), **extra},
+        coords={"x": ("nx", np.linspace(0.0, 360.0, 5))},
+    ).to_netcdf(path)
+    return path
+
+
+def test_identical_files(tmp_path):
+    old = write(tmp_path / "old.nc")
+    new = write(tmp_path / "new.nc")
+    result = compare_files(old, new, fast_path=False)
+    assert result.ok
+    assert set(result.variables) == {"area", "x"}
+
+
+def test_mismatch_count_errors_and_region(tmp_path):
+    area = np.arange(20.0).reshape(4, 5)
+    old = write(tmp_path / "old.nc", area)
+    area = area.copy()
+    area[1, 2] += 0.5
+    area[2, 4] = np.inf
+    new = write(tmp_path / "new.nc", area)
+    result = compare_files(old, new, fast_path=False, block_bytes=16)
+    assert result.status == "differ"
+    var = result.variables["area"]
+    assert (var.status, var.mismatches) == ("differ", 2)
+    assert var.max_abs_err == 0.5
+    assert var.bbox == [(1, 3), (2, 5)]
+    assert result.variables["x"].ok
+
+
+def test_within_tolerance(tmp_path):
+    area = np.arange(1.0, 21.0).reshape(4, 5)
+    old = write(tmp_path / "old.nc", area)
+    new = write(tmp_path / "new.nc", area * (1 + 1e-14))
+    assert compare_files(old, new, fast_path=False).ok
+    assert not compare_files(old, new, fast_path=False, rtol=0.0, rules={}).ok
+
+
+def test_missing_and_reshaped_variables(tmp_path):
+    old = write(tmp_path / "old.nc", depth=("nx", np.ones(5)))
+    new = write(tmp_path / "new.nc", area=np.zeros((5, 5)))
+    result = compare_files(old, new, fast_path=False)
+    assert result.variables["depth"].status == "missing_new"
+    assert result.variables["area"].status == "shape_mismatch"
+    only = compare_files(old, new, variables=["x"], fast_path=False)
+    assert list(only.variables) == ["x"] and only.ok
+
+
+def test_cli_exit_code_and_json(tmp_path):
+    (tmp_path / "old").mkdir()
+    (tmp_path / "new").mkdir()
+    write(tmp_path / "old" / "grid.nc")
+    write(tmp_path / "new" / "grid.nc", np.zeros((4, 5)))
+    report = tmp_path / "report.json"
+    argv = [str(tmp_path / "old"), str(tmp_path / "new"), "-j", "1"]
+    assert main(argv + ["--json", str(report)]) == 1
+    assert json.loads(report.read_text())["files"]["grid.nc"]["status"] == "differ"
+    assert main(argv + ["--var", "x"]) == 0
+
+
+def test_compare_dirs_pairs_prefixed_and_legacy_names(tmp_path):
+    old, new = tmp_path / "old", tmp_path / "new"
+    old.mkdir()
+    new.mkdir()
+    write(old / "ref_north.nc")
+    write(old / "grid_south.nc")  # legacy regional_mom6 name of south.nc
+    write(old / "forcing_obc_segment_001.nc")
+    write(old / "only_old.nc")
+    write(new / "run_north.nc", np.zeros((4, 5)))
+    write(new / "run_south.nc")
+    write(new / "forcing_obc_segment_001.nc")
+    write(new / "run_only_new.nc")
+    results = compare_dirs(old, new, old_prefix="ref", new_prefix="run")
+    statuses = {name: result.status for name, result in results.items()}
+    assert statuses == {
+        "forcing_obc_segment_001.nc": "ok",
+        "north.nc": "differ",
+        "south.nc": "ok",
+        "only_old.nc": "missing_new",
+        "only_new.nc": "missing_old",
+    }
+    selected = compare_dirs(
+        old, new, old_prefix="ref", new_prefix="run", select=lambda n: "th" in n
+    )
+    assert list(selected) == ["north.nc", "south.nc"]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_compare_dirs_reports_broken_files(tmp_path, jobs):
+    old, new = tmp_path / "old", tmp_path / "new"
+    old.mkdir()
+    new.mkdir()
+    for name in ("a.nc", "b.nc"):
+        write(old / name)
+        write(new / name)
+    (new / "b.nc").write_bytes(b"not a netcdf file")
+    results = compare_dirs(old, new, jobs=jobs, fast_path=False)
+    assert results["a.nc"].ok
+    assert results["b.nc"].status == "error"
+    assert main([str(old), str(new), "-j", str(jobs)]) == 1
@@ -0,0 +1,117 @@
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from baseline_tools.fetch import (
+    FetchTask,
+    fetch_missing,
+    http_fetcher,
+    part_path,
+    raw_piece_name,
+    source_fetcher,
+)
+
+PAYLOAD = bytes(range(256)) * 64
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD, honouring ``Range: bytes=N-`` and counting requests."""
+
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.headers.get("Range"))
+        start = 0
+        if self.headers.get("Range"):
+            start = int(self.headers["Range"].removeprefix("bytes=").rstrip("-"))
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        body = PAYLOAD[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    RangeHandler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_raw_piece_name():
+    name = raw_piece_name("north", "east", date(2020, 1, 1), date(2020, 1, 9))
+    assert name == "north_east_20200101-20200109_raw.nc"
+
+
+def test_http_download_resumes_part_file(tmp_path, server):
+    dest = tmp_path / "piece.nc"
+    part_path(dest).write_bytes(PAYLOAD[:1000])
+    assert fetch_missing([FetchTask("piece", dest, http_fetcher(f"{server}/p"))])
+    assert dest.read_bytes() == PAYLOAD
+    assert RangeHandler.requests == ["bytes=1000-"]
+    assert not part_path(dest).exists()
+
+
+def test_complete_part_file_is_kept(tmp_path, server):
+    dest = tmp_path / "piece.nc"
+    part_path(dest).write_bytes(PAYLOAD)
+    fetch_missing([FetchTask("piece", dest, source_fetcher(server, "p"))])
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_existing_pieces_are_skipped(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    (source / "a.nc").write_bytes(b"a")
+    (source / "b.nc").write_bytes(b"b")
+    dest = tmp_path / "raw"
+    dest.mkdir()
+    (dest / "a.nc").write_bytes(b"old")
+    tasks = [
+        FetchTask(name, dest / name, source_fetcher(f"file://{source}", name))
+        for name in ("a.nc", "b.nc")
+    ]
+    assert fetch_missing(tasks) == ["b.nc"]
+    assert (dest / "a.nc").read_bytes() == b"old"
+    assert (dest / "b.nc").read_bytes() == b"b"
+
+
+def test_retries_then_reports_every_failure(tmp_path):
+    attempts = {"flaky": 0, "broken": 0}
+
+    def flaky(part):
+        attempts["flaky"] += 1
+        if attempts["flaky"] == 1:
+            part.write_bytes(b"trunc")
+            raise OSError("connection reset")
+        part.write_bytes(b"whole")
+
+    def broken(part):
+        attempts["broken"] += 1
+        raise OSError("not found")
+
+    tasks = [
+        FetchTask("flaky", tmp_path / "flaky.nc", flaky),
+        FetchTask("broken", tmp_path / "broken.nc", broken),
+    ]
+    with pytest.raises(RuntimeError, match=r"broken \(not found\)") as error:
+        fetch_missing(tasks, retries=2)
+    assert "flaky" not in str(error.value)
+    assert attempts == {"flaky": 2, "broken": 3}
+    assert (tmp_path / "flaky.nc").read_bytes() == b"whole"
+    assert not (tmp_path / "broken.nc").exists()
@@ -0,0 +1,61 @@
+import netCDF4
+import numpy as np
+import pytest
+import xarray as xr
+
+from baseline_tools import formats
+from baseline_tools.formats import TILE_SHAPE, recompress
+from baseline_tools.manifest import build_manifest
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "grid.nc"
+    depth = np.arange(300 * 400, dtype=np.float64).reshape(300, 400)
+    depth[0, 0] = np.nan
+    xr.Dataset(
+        {
+            "depth": (("ny", "nx"), depth, {"units": "m"}),
+            "name": ((), "north"),
+            "time": ("time", np.arange(3.0)),
+        }
+    ).to_netcdf(path, unlimited_dims=["time"])
+    return path
+
+
+@pytest.mark.parametrize("fmt", ["netcdf-zlib", "netcdf-zstd"])
+def test_recompress_is_lossless(path, fmt):
+    before = build_manifest(path)["variables"]
+    recompress(path, fmt)
+    assert build_manifest(path)["variables"] == before
+    with netCDF4.Dataset(path) as ds:
+        depth = ds["depth"]
+        assert depth.filters()["zlib" if fmt == "netcdf-zlib" else "zstd"]
+        assert depth.chunking() == list(TILE_SHAPE)
+        assert ds.dimensions["time"].isunlimited()
+    assert [p.name for p in path.parent.iterdir()] == ["grid.nc"]
+
+
+def test_plain_netcdf_is_left_alone(path):
+    mtime = path.stat().st_mtime_ns
+    recompress(path, "netcdf")
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_checksum_mismatch_leaves_file_untouched(path, monkeypatch):
+    original = path.read_bytes()
+    checksum = formats.variable_checksum
+    calls = []
+
+    def corrupting_checksum(var):
+        # The depth checksum of the rewritten file (after the three variables
+        # of the original) comes out different
+        calls.append(var)
+        value = checksum(var)
+        return value + "x" if len(calls) > 3 and var.ndim == 2 else value
+
+    monkeypatch.setattr(formats, "variable_checksum", corrupting_checksum)
+    with pytest.raises(ValueError, match="would change depth"):
+        recompress(path, "netcdf-zlib")
+    assert path.read_bytes() == original
+    assert [p.name for p in path.parent.iterdir()] == ["grid.nc"]
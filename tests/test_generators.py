@@ -0,0 +1,16 @@
+import sys
+
+import pytest
+
+from baseline_tools.backends import load_backend
+
+
+@pytest.mark.parametrize("backend", ["CrocoDash", "regional_mom6"])
+def test_stage_keys_differ_between_cases(backend):
+    # Cached files are named after their case, so no two cases may share an
+    # entry even when their specs match (the shared vertical grid)
+    cases = load_backend(backend).cases
+    generator = sys.modules[f"{backend}_baseline_generation"]
+    keys = {name: generator.stage_keys(name, synthetic=True) for name in cases}
+    for stage in ("hgrid", "vgrid", "bathy", "forcing"):
+        assert len({case_keys[stage] for case_keys in keys.values()}) == len(cases)
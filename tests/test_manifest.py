@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from baseline_tools import compare
+from baseline_tools.compare import compare_files
+from baseline_tools.manifest import read_manifest, sidecar_path, write_manifest
+
+
+def write(path, depth, with_manifest=True):
+    xr.Dataset(
+        {"depth": (("ny", "nx"), depth), "mask": (("ny", "nx"), depth > 0)}
+    ).to_netcdf(path)
+    if with_manifest:
+        write_manifest(path)
+    return path
+
+
+@pytest.fixture
+def depth():
+    return np.arange(-10.0, 290.0).reshape(20, 15)
+
+
+@pytest.fixture
+def no_open(monkeypatch):
+    def fail(path):
+        raise AssertionError(f"{path} was opened")
+
+    monkeypatch.setattr(compare, "open_baseline", fail)
+
+
+def test_manifest_tracks_the_file(tmp_path, depth):
+    path = write(tmp_path / "bathy.nc", depth)
+    manifest = read_manifest(path)
+    assert set(manifest["variables"]) == {"depth", "mask"}
+    assert set(manifest["tiles"]) == {"depth", "mask"}
+    write(path, depth + 1.0, with_manifest=False)
+    assert read_manifest(path) is None
+
+
+def test_identical_files_are_not_opened(tmp_path, depth, no_open):
+    old = write(tmp_path / "old.nc", depth)
+    new = write(tmp_path / "new.nc", depth)
+    result = compare_files(old, new)
+    assert result.ok
+    assert all(v.checksum_match for v in result.variables.values())
+
+
+def test_only_changed_variables_and_tiles_are_diffed(tmp_path, depth):
+    old = write(tmp_path / "old.nc", depth)
+    depth = depth.copy()
+    depth[3, 4] += 1.0
+    new = write(tmp_path / "new.nc", depth)
+    result = compare_files(old, new)
+    assert result.variables["mask"].checksum_match
+    changed = result.variables["depth"]
+    assert (changed.mismatches, changed.bbox) == (1, [(3, 4), (4, 5)])
+    assert changed.tiles_read == 1
+
+
+def test_without_both_sidecars_files_are_diffed(tmp_path, depth):
+    old = write(tmp_path / "old.nc", depth)
+    new = write(tmp_path / "new.nc", depth, with_manifest=False)
+    result = compare_files(old, new)
+    assert result.ok
+    assert not any(v.checksum_match for v in result.variables.values())
+    assert not sidecar_path(new).exists()
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from baseline_tools import storage
+from baseline_tools.storage import link_or_copy, prepare_output, promote
+
+
+@pytest.fixture
+def src(tmp_path):
+    path = tmp_path / "src.nc"
+    path.write_bytes(b"payload")
+    return path
+
+
+def test_hard_link_replaces_destination(tmp_path, src):
+    dest = tmp_path / "dest.nc"
+    dest.write_bytes(b"old")
+    assert link_or_copy(src, dest) == "link"
+    assert os.path.samefile(src, dest)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["dest.nc", "src.nc"]
+
+
+def test_falls_back_to_reflink_then_copy(tmp_path, src, monkeypatch):
+    def unsupported(src, dest):
+        raise OSError("not supported")
+
+    monkeypatch.setattr(storage, "_reflink", unsupported)
+    dest = tmp_path / "dest.nc"
+    assert link_or_copy(src, dest, hardlink=False) == "copy"
+    assert dest.read_bytes() == b"payload"
+    assert not os.path.samefile(src, dest)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["dest.nc", "src.nc"]
+
+    monkeypatch.setattr(os, "link", unsupported)
+    assert link_or_copy(src, tmp_path / "other.nc") == "copy"
+
+
+def test_promote_renames(tmp_path, src):
+    dest = tmp_path / "cache" / "dest.nc"
+    dest.parent.mkdir()
+    assert promote(src, dest) == "rename"
+    assert dest.read_bytes() == b"payload" and not src.exists()
+
+
+def test_promote_across_filesystems(tmp_path, src, monkeypatch):
+    dest = tmp_path / "dest.nc"
+    replace = os.replace
+
+    def cross_device(a, b):
+        raise OSError("Invalid cross-device link")
+
+    def replace_within_dest_dir(a, b):
+        # Only the temporary file next to dest may be renamed into place
+        if a == src:
+            cross_device(a, b)
+        replace(a, b)
+
+    monkeypatch.setattr(os, "replace", replace_within_dest_dir)
+    monkeypatch.setattr(os, "link", cross_device)
+    monkeypatch.setattr(storage, "_reflink", cross_device)
+    assert promote(src, dest) == "copy"
+    assert dest.read_bytes() == b"payload" and not src.exists()
+
+
+def test_prepare_output_breaks_links(tmp_path, src):
+    dest = tmp_path / "dest.nc"
+    link_or_copy(src, dest)
+    prepare_output(dest).write_bytes(b"new")
+    assert src.read_bytes() == b"payload"
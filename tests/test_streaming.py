@@ -0,0 +1,58 @@
+import numpy as np
+import xarray as xr
+
+from baseline_tools.streaming import (
+    append_time_chunk,
+    time_chunk_length,
+    time_length,
+    write_time_slice,
+)
+
+
+def write(path, start, count):
+    time = np.arange(count, dtype=np.float64)
+    values = np.arange(start, start + count, dtype=np.float32)[:, None] * np.ones(3)
+    xr.Dataset(
+        {"v": (("time", "x"), values.astype(np.float32)), "depth": ("x", np.ones(3))},
+        coords={"time": time},
+    ).to_netcdf(path, unlimited_dims=["time"])
+    return path
+
+
+def test_first_chunk_is_moved_with_offset(tmp_path):
+    dest = tmp_path / "out.nc"
+    chunk = write(tmp_path / "chunk.nc", 0, 2)
+    append_time_chunk(dest, chunk, time_offset=5.0)
+    assert not chunk.exists()
+    with xr.open_dataset(dest) as ds:
+        assert ds.time.values.tolist() == [5.0, 6.0]
+
+
+def test_chunks_are_appended_along_time(tmp_path):
+    dest = tmp_path / "out.nc"
+    append_time_chunk(dest, write(tmp_path / "a.nc", 0, 2))
+    append_time_chunk(dest, write(tmp_path / "b.nc", 2, 3), time_offset=2.0)
+    assert time_length(dest) == 5
+    with xr.open_dataset(dest) as ds:
+        assert ds.time.values.tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert ds.v.values[:, 0].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert ds.depth.values.tolist() == [1.0, 1.0, 1.0]
+
+
+def test_slices_reassemble_the_file(tmp_path):
+    src = write(tmp_path / "src.nc", 0, 5)
+    dest = tmp_path / "out.nc"
+    for start in range(0, 5, 2):
+        chunk = write_time_slice(src, tmp_path / f"slice{start}.nc", start, start + 2)
+        append_time_chunk(dest, chunk)
+    with xr.open_dataset(src) as old, xr.open_dataset(dest) as new:
+        xr.testing.assert_identical(old.v, new.v)
+
+
+def test_time_chunk_length(tmp_path):
+    src = write(tmp_path / "src.nc", 0, 5)
+    # Each step holds 3 float32 and 1 float64 (time)
+    step = 3 * 4 + 8
+    assert time_chunk_length(src, memory_mb=2 * step * 4 / 2**20, factor=4) == 2
+    assert time_chunk_length(src, memory_mb=0) == 1
+    assert time_chunk_length(src) == 5
@@ -0,0 +1,75 @@
+import pytest
+
+from baseline_tools.suite import DEFAULT_MANIFEST, load_cases, select_cases
+
+MANIFEST = """
+[cases.small]
+resolution = 0.1
+lon_extent = [10, 12]
+lat_extent = [0, 2]
+
+[cases.small.regional_mom6]
+resolution = 0.2
+
+[cases.world]
+global = true
+resolution = 1.0
+lat_extent = [-80, 80]
+backends = ["CrocoDash"]
+"""
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    path = tmp_path / "cases.toml"
+    path.write_text(MANIFEST)
+    return path
+
+
+def test_backend_overrides_and_filters(manifest):
+    cases = load_cases("regional_mom6", path=manifest)
+    assert list(cases) == ["small"]
+    assert cases["small"].resolution == 0.2
+    assert cases["small"].lon_extent == (10, 12)
+
+    cases = load_cases("CrocoDash", path=manifest)
+    assert list(cases) == ["small", "world"]
+    assert cases["small"].resolution == 0.1
+    assert cases["world"].is_global
+    assert cases["world"].lon_extent is None
+
+
+def test_unknown_keys(manifest):
+    typo = "[cases.typo]\nresolution = 1\nlat_extent = [0, 1]\nlonextent = [0, 1]\n"
+    manifest.write_text(MANIFEST + "\n" + typo)
+    with pytest.raises(ValueError, match="lonextent"):
+        load_cases("CrocoDash", path=manifest)
+
+
+@pytest.mark.parametrize(
+    "extra",
+    [
+        "[cases.small.CrocoDsh]\nresolution = 1\n",
+        '[cases.other]\nresolution = 1\nlat_extent = [0, 1]\nbackends = ["croco"]\n',
+    ],
+)
+def test_unknown_backends_fail_for_every_backend(manifest, extra):
+    manifest.write_text(MANIFEST + "\n" + extra)
+    for backend in ("CrocoDash", "regional_mom6", None):
+        with pytest.raises(ValueError, match="unknown backend"):
+            load_cases(backend, path=manifest)
+
+
+def test_select_cases(manifest):
+    cases = load_cases("CrocoDash", path=manifest)
+    assert select_cases(cases) == ["small"]
+    assert select_cases(cases, with_global=True) == ["small", "world"]
+    assert select_cases(cases, only=["world"]) == ["world"]
+    assert select_cases(cases, match=["w*"]) == []
+    with pytest.raises(SystemExit):
+        select_cases(cases, only=["missing"])
+
+
+def test_repository_manifest_loads():
+    for backend in ("CrocoDash", "regional_mom6"):
+        assert load_cases(backend, path=DEFAULT_MANIFEST)
@@ -0,0 +1,69 @@
+import pytest
+
+from baseline_tools.taskgraph import TaskGraph
+
+
+def fail():
+    raise RuntimeError("boom")
+
+
+def test_failure_skips_dependents_only():
+    graph = TaskGraph()
+    ran = []
+    graph.add("a", fail)
+    graph.add("b", lambda: ran.append("b"), deps=["a"])
+    graph.add("c", lambda: ran.append("c"), deps=["b"])
+    graph.add("d", lambda: ran.append("d"))
+    results = graph.run(cpu_jobs=2)
+    assert "RuntimeError: boom" in results["a"]
+    assert results["b"] == "Skipped because a failed\n"
+    assert results["c"] == "Skipped because b failed\n"
+    assert results["d"] is None
+    assert ran == ["d"]
+
+
+def test_always_runs_after_failed_deps():
+    graph = TaskGraph()
+    ran = []
+    graph.add("a", fail)
+    graph.add("b", lambda: ran.append("b"))
+    graph.add("wait", lambda: ran.append("wait"), deps=["a", "b"], always=True)
+    results = graph.run()
+    assert results["wait"] is None
+    assert ran == ["b", "wait"]
+
+
+def test_none_deps_are_ignored():
+    graph = TaskGraph()
+    graph.add("a", lambda: None)
+    graph.add("b", lambda: None, deps=[None, "a"])
+    assert graph.tasks["b"].deps == ("a",)
+
+
+def test_unknown_and_duplicate_tasks():
+    graph = TaskGraph()
+    graph.add("a", lambda: None)
+    with pytest.raises(ValueError):
+        graph.add("a", lambda: None)
+    with pytest.raises(ValueError):
+        graph.add("b", lambda: None, deps=["missing"])
+
+
+def test_interrupt_stops_the_run():
+    def interrupt():
+        raise KeyboardInterrupt
+
+    graph = TaskGraph()
+    graph.add("a", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        graph.run()
+
+
+def test_scoped_names():
+    graph = TaskGraph()
+    scoped = graph.scoped("CrocoDash")
+    first = scoped.add("hgrid", lambda: None, grid="g")
+    scoped.add("bathy", lambda: None, deps=[first], grid="g")
+    task = graph.tasks["CrocoDash/bathy"]
+    assert task.deps == ("CrocoDash/hgrid",)
+    assert task.grid == "CrocoDash/g"
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from baseline_tools.tiled import BandedNetCDFWriter, build_banded, latitude_bands
+
+RESOLUTION = 0.5
+NX = 6
+
+
+def supergrid(ystart, leny):
+    """Supergrid-like dataset: nodes on nyp, cells on ny, two rows per cell."""
+    rows = int(round(leny / RESOLUTION)) * 2
+    y = ystart + np.arange(rows + 1) * RESOLUTION / 2
+    x = np.arange(NX + 1, dtype=np.float64)
+    return xr.Dataset(
+        {
+            "y": (("nyp", "nxp"), np.repeat(y[:, None], NX + 1, axis=1)),
+            "x": (("nyp", "nxp"), np.repeat(x[None, :], rows + 1, axis=0)),
+            "area": (("ny", "nx"), np.outer(y[:-1], np.ones(NX))),
+            "tile": ((), 1),
+        },
+        attrs={"title": "test"},
+    )
+
+
+def write_band(ystart, leny, path):
+    supergrid(ystart, leny).to_netcdf(path)
+
+
+def test_latitude_bands():
+    assert latitude_bands(-10.0, 25.0, 0.5, 10.0) == [
+        (-10.0, 10.0, 20),
+        (0.0, 10.0, 20),
+        (10.0, 5.0, 10),
+    ]
+
+
+@pytest.mark.parametrize("ystart, leny", [(-10.0, 25.0), (0.0, 1.0)])
+def test_banded_file_matches_whole_grid(tmp_path, ystart, leny):
+    # Full bands have 6 file rows, so nxp == rows + 1: only the latitude
+    # dimensions may share their edge row between bands
+    path = tmp_path / "grid.nc"
+    bands = latitude_bands(ystart, leny, RESOLUTION, band_height=1.5)
+    build_banded(path, bands, write_band, ("nyp", "ny"), rows_per_cell=2)
+    with xr.open_dataset(path) as banded:
+        xr.testing.assert_identical(banded.load(), supergrid(ystart, leny))
+    assert [p.name for p in tmp_path.iterdir()] == ["grid.nc"]
+
+
+def test_latitude_dimension_must_lead(tmp_path):
+    band = supergrid(0.0, 1.0)
+    band["yx"] = (("nxp", "nyp"), band.y.values.T)
+    band.to_netcdf(tmp_path / "band.nc")
+    with pytest.raises(ValueError, match="leading axis"):
+        with BandedNetCDFWriter(tmp_path / "grid.nc", ("nyp", "ny")) as writer:
+            writer.append(tmp_path / "band.nc", 4)
+    with pytest.raises(ValueError, match="no latitude dimension"):
+        with BandedNetCDFWriter(tmp_path / "grid.nc", ("lat",)) as writer:
+            writer.append(tmp_path / "band.nc", 4)
+    # Nothing is left behind by a failed build
+    assert [p.name for p in tmp_path.iterdir()] == ["band.nc"]
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from baseline_tools.blocks import iter_blocks
+from baseline_tools.tiles import TileHasher, changed_tiles
+
+TILE = (4, 4)
+
+
+def tree_of(values, block_bytes):
+    hasher = TileHasher(values.shape, TILE)
+    for block in iter_blocks(values.shape, values.itemsize, block_bytes):
+        hasher.update(block, values[block])
+    return hasher.tree()
+
+
+@pytest.fixture
+def values():
+    return np.arange(3 * 10 * 13, dtype=np.float64).reshape(3, 10, 13)
+
+
+def test_tree_does_not_depend_on_block_size(values):
+    whole = tree_of(values, values.nbytes)
+    for block_bytes in (8, 13 * 8, 5 * 13 * 8, 10 * 13 * 8 + 8):
+        assert tree_of(values, block_bytes) == whole
+
+
+def test_changed_tiles(values):
+    old = tree_of(values, values.nbytes)
+    new_values = values.copy()
+    new_values[1, 5, 0] += 1.0  # tile (1, 0)
+    new_values[0, 9, 12] += 1.0  # tile (2, 3), the partial corner tile
+    new = tree_of(new_values, 64)
+    assert changed_tiles(old, new) == [(1, 0), (2, 3)]
+    assert changed_tiles(old, old) == []
+
+
+def test_incomparable_trees(values):
+    tree = tree_of(values, values.nbytes)
+    assert changed_tiles(None, tree) is None
+    assert changed_tiles(tree, {**tree, "tile": [8, 8]}) is None
+    assert changed_tiles(tree, tree_of(values[:, :6], values.nbytes)) is None
@@ -0,0 +1,117 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from baseline_tools.compare import _block_stats
+from baseline_tools.tolerance import (
+    DEFAULT_TOLERANCE,
+    Tolerance,
+    load_rules,
+    tolerance_for,
+)
+
+
+def test_first_matching_rule_completed_by_default():
+    rules = {"geolon*": Tolerance(period=360.0), "geo*": Tolerance(atol=1.0)}
+    assert tolerance_for("geolon_c", rules) == Tolerance(
+        rtol=DEFAULT_TOLERANCE.rtol, atol=DEFAULT_TOLERANCE.atol, period=360.0
+    )
+    assert tolerance_for("geolat", rules).atol == 1.0
+    assert tolerance_for("depth", rules) == DEFAULT_TOLERANCE
+
+
+def test_default_rules():
+    assert tolerance_for("x").period == 360.0
+    assert tolerance_for("mask").rtol == 0.0
+    assert tolerance_for("x", {}) == DEFAULT_TOLERANCE
+
+
+def test_load_rules(tmp_path):
+    path = tmp_path / "rules.toml"
+    path.write_text('["angle_*"]\natol = 1e-12\n\n[x]\nperiod = 360.0\nmax_ulp = 4\n')
+    assert load_rules(path) == {
+        "angle_*": Tolerance(atol=1e-12),
+        "x": Tolerance(period=360.0, max_ulp=4),
+    }
+
+
+def test_identical_blocks():
+    values = np.array([1.0, np.nan])
+    assert _block_stats(values, values.copy(), DEFAULT_TOLERANCE) == (None, 0.0, 0.0, 0)
+
+
+def test_nan_against_number_is_a_mismatch():
+    old = np.array([np.nan, np.nan, 1.0])
+    new = np.array([np.nan, 2.0, 1.0])
+    bad, max_abs, _, _ = _block_stats(old, new, DEFAULT_TOLERANCE)
+    assert bad.tolist() == [False, True, False]
+    assert max_abs == 0.0
+
+
+@pytest.mark.parametrize(
+    "old, new", [(1.0, np.inf), (np.inf, -np.inf), (np.inf, 1.0), (np.nan, np.inf)]
+)
+def test_infinity_is_outside_any_tolerance(old, new):
+    tol = Tolerance(rtol=1e-9, atol=0.0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        bad, max_abs, max_rel, _ = _block_stats(
+            np.array([old, 2.0]), np.array([new, 2.0]), tol
+        )
+    assert bad.tolist() == [True, False]
+    assert (max_abs, max_rel) == (0.0, 0.0)
+
+
+def test_equal_infinities_match():
+    old = np.array([np.inf, -np.inf, 1.0])
+    new = np.array([np.inf, -np.inf, 2.0])
+    bad, _, _, _ = _block_stats(old, new, Tolerance(rtol=1.0, atol=0.0))
+    assert not bad.any()
+
+
+def test_infinity_is_outside_periods_and_ulps():
+    # Infinities are neither wrapped by the period nor within max_ulp, and do
+    # not count in the ULP error
+    old = np.array([np.inf, -np.inf, 10.0, np.inf], dtype=np.float32)
+    new = np.array([np.inf, np.inf, 10.0, np.finfo(np.float32).max])
+    tol = Tolerance(rtol=0.0, atol=0.0, period=360.0, max_ulp=2**30)
+    bad, _, _, max_ulp = _block_stats(old, new.astype(np.float32), tol)
+    assert bad.tolist() == [False, True, False, True]
+    assert max_ulp == 0
+
+
+def test_period_wraps_only_far_values():
+    old = np.array([0.0, 359.5, 10.0])
+    new = np.array([360.0, -0.5, np.nextafter(10.0, 11.0)])
+    tol = Tolerance(rtol=0.0, atol=0.0, period=360.0)
+    bad, max_abs, _, max_ulp = _block_stats(old, new, tol)
+    assert bad.tolist() == [False, False, True]
+    assert max_abs == np.spacing(10.0)
+    assert max_ulp == 1
+
+
+def test_max_ulp_with_period():
+    old = np.array([0.0, 10.0], dtype=np.float32)
+    new = np.array([360.0, np.nextafter(np.float32(10.0), np.float32(11.0))])
+    new = new.astype(np.float32)
+    tol = Tolerance(rtol=0.0, atol=0.0, period=360.0, max_ulp=1)
+    bad, _, _, max_ulp = _block_stats(old, new, tol)
+    assert not bad.any()
+    assert max_ulp == 1
+
+
+def test_ulp_across_zero():
+    old = np.array([-0.0, np.float64(-5e-324)])
+    new = np.array([0.0, np.float64(5e-324)])
+    _, _, _, max_ulp = _block_stats(old, new, Tolerance(rtol=0.0, atol=0.0))
+    assert max_ulp == 2
+
+
+def test_mixed_types_have_no_ulp():
+    old = np.array([1.0, 2.0])
+    new = np.array([1.0, 2.5], dtype=np.float32)
+    bad, _, max_rel, max_ulp = _block_stats(old, new, DEFAULT_TOLERANCE)
+    assert bad.tolist() == [False, True]
+    assert max_rel == 0.2
+    assert max_ulp is None
@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+from baseline_tools import profiling
+from baseline_tools.writer import (
+    ArtifactWriter,
+    WriteError,
+    close_shared_writer,
+    shared_writer,
+)
+
+
+@pytest.fixture
+def writer():
+    writer = ArtifactWriter(jobs=2, max_pending=2)
+    yield writer
+    writer.shutdown()
+
+
+def test_saves_run_in_the_background_under_the_submitting_grid(writer):
+    release = threading.Event()
+    saved = []
+
+    def save(what):
+        release.wait(5)
+        saved.append((what, profiling.current_grid(), threading.current_thread()))
+
+    group = writer.group("north")
+    with profiling.grid("north"):
+        group.submit("hgrid", save, "hgrid")
+    assert saved == []  # submit returned while the save waits
+    release.set()
+    group.flush()
+    [(what, grid, thread)] = saved
+    assert (what, grid) == ("hgrid", "north")
+    assert thread is not threading.current_thread()
+
+
+def test_submit_blocks_while_the_queue_is_full(writer):
+    release = threading.Event()
+    group = writer.group("north")
+    for i in range(2):
+        group.submit(f"save {i}", release.wait, 5)
+    third = threading.Thread(target=group.submit, args=("save 2", lambda: None))
+    third.start()
+    third.join(0.2)
+    assert third.is_alive()
+    release.set()
+    third.join(5)
+    assert not third.is_alive()
+    group.flush()
+
+
+def test_flush_reports_every_failure_in_order(writer):
+    def fail(message):
+        raise OSError(message)
+
+    group = writer.group("north")
+    group.submit("bathy", fail, "disk full")
+    group.submit("hgrid", lambda: None)
+    group.submit("vgrid", fail, "read-only")
+    with pytest.raises(WriteError) as error:
+        group.flush()
+    message = str(error.value)
+    assert message.startswith("2 write(s) of north failed")
+    assert message.index("Writing bathy failed") < message.index("Writing vgrid")
+    assert "disk full" in message and "read-only" in message
+    group.flush()  # Failures are reported once
+
+
+def test_without_threads_saves_run_at_submit():
+    writer = ArtifactWriter(jobs=0)
+    saved = []
+    future = writer.submit(saved.append, 1)
+    assert saved == [1] and future.done()
+    failed = writer.submit(lambda: 1 / 0)
+    assert isinstance(failed.exception(), ZeroDivisionError)
+
+
+def test_shared_writer_keeps_its_thread_count():
+    try:
+        writer = shared_writer(1)
+        assert shared_writer(1) is writer
+        with pytest.raises(ValueError, match="1 thread"):
+            shared_writer(2)
+        close_shared_writer()
+        assert shared_writer(2).jobs == 2
+    finally:
+        close_shared_writer()